@@ -0,0 +1,86 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import os.path as osp
+import tempfile
+import time
+import zipfile
+
+import numpy as np
+
+from labelme._storage.archive import write_archive
+from labelme._storage.archive import zstandard
+
+
+def zip_deflate_all(path, members):
+    # DatasetExporter.create_archive before the archive engine: every member is
+    # deflated, one after the other
+    with zipfile.ZipFile(path, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for filename, arcname in members:
+            zf.write(filename, arcname)
+
+
+def make_fixture(root, num_images, image_kilobytes, num_jsons):
+    rng = np.random.default_rng(0)
+    members = []
+    os.makedirs(osp.join(root, "origins/images"))
+    for i in range(num_images):
+        # random bytes stand in for jpeg data, which does not deflate either
+        filename = osp.join(root, "origins/images/frame_%06d.jpg" % i)
+        with open(filename, "wb") as f:
+            f.write(rng.bytes(image_kilobytes * 1024))
+        members.append((filename, "origins/images/frame_%06d.jpg" % i))
+    os.makedirs(osp.join(root, "annotations/labelme_jsons"))
+    for i in range(num_jsons):
+        points = np.round(rng.random((20, 50, 2)) * 1000, 2).tolist()
+        shapes = [dict(label="label", points=p, shape_type="polygon") for p in points]
+        filename = osp.join(root, "annotations/labelme_jsons/frame_%06d.json" % i)
+        with open(filename, "w") as f:
+            json.dump(dict(shapes=shapes), f, indent=2)
+        members.append((filename, "annotations/labelme_jsons/frame_%06d.json" % i))
+    return members
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--num-images", type=int, default=200, help="jpeg files")
+    parser.add_argument("--image-kilobytes", type=int, default=1024, help="jpeg size")
+    parser.add_argument("--num-jsons", type=int, default=400, help="json files")
+    parser.add_argument("--max-workers", type=int, default=None, help="threads")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        members = make_fixture(
+            osp.join(tmp_dir, "project"),
+            args.num_images,
+            args.image_kilobytes,
+            args.num_jsons,
+        )
+        input_bytes = sum(os.path.getsize(filename) for filename, _ in members)
+
+        t_start = time.time()
+        zip_deflate_all(osp.join(tmp_dir, "before.zip"), members)
+        elapsed = time.time() - t_start
+        print(
+            f"deflate-all zip: {input_bytes / 2**20:.0f} MB -> "
+            f"{os.path.getsize(osp.join(tmp_dir, 'before.zip')) / 2**20:.0f} MB "
+            f"in {elapsed:.2f}s ({input_bytes / 2**20 / elapsed:.1f} MB/s)"
+        )
+
+        formats = ["zip", "tar"] + (["tar.zst"] if zstandard is not None else [])
+        for format in formats:
+            stats = write_archive(
+                osp.join(tmp_dir, "after." + format),
+                members,
+                format=format,
+                max_workers=args.max_workers,
+            )
+            print(f"{format}: {stats}")
+
+
+if __name__ == "__main__":
+    main()
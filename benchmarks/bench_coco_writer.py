@@ -0,0 +1,159 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import os.path as osp
+import tempfile
+import time
+import tracemalloc
+import types
+
+import numpy as np
+from loguru import logger
+
+from labelme.DataSetExporter import DatasetExporter
+from labelme.DataSetExporter import annotations_path
+
+
+def write_coco_dict(coco_out, json_files, frames, cat_map):
+    # DatasetExporter.write_coco before COCO files were streamed: the whole
+    # dataset is copied into one dict and pretty-printed
+    coco = {
+        "images": [],
+        "annotations": [],
+        "categories": [{"id": i, "name": n} for n, i in cat_map.items()],
+    }
+    for jf in json_files:
+        entry = frames[jf]
+        coco["images"].append({"id": entry["image_id"], **entry["image"]})
+        for annotation in entry["annotations"]:
+            annotation = dict(annotation)
+            lbl = annotation.pop("label")
+            coco["annotations"].append(
+                {
+                    "id": annotation.pop("id"),
+                    "image_id": entry["image_id"],
+                    "category_id": cat_map[lbl],
+                    **annotation,
+                }
+            )
+    with open(coco_out, "w", encoding="utf-8") as f:
+        json.dump(coco, f, indent=2)
+
+
+def make_frames(num_frames, num_shapes, num_points):
+    rng = np.random.default_rng(0)
+    frames = {}
+    ann_id = 1
+    for i in range(num_frames):
+        annotations = []
+        for j in range(num_shapes):
+            points = np.round(rng.random((num_points, 2)) * 1000, 2).tolist()
+            annotations.append(
+                {
+                    "label": "label_%d" % (j % 5),
+                    "bbox": [0, 0, 1000, 1000],
+                    "area": 1000000,
+                    "segmentation": [sum(points, [])],
+                    "iscrowd": 0,
+                    "id": ann_id,
+                }
+            )
+            ann_id += 1
+        frames["frame_%06d.json" % i] = {
+            "image_id": i + 1,
+            "image": {
+                "file_name": "/origins/images/frame_%06d.jpg" % i,
+                "width": 1920,
+                "height": 1080,
+            },
+            "annotations": annotations,
+        }
+    return frames
+
+
+def write_manifest_frames(labelPath, frames):
+    # as export_frame leaves them: ids and labels in the manifest, the rest of
+    # every annotation in a file per frame
+    manifest_frames = {}
+    os.makedirs(osp.join(labelPath, "export_cache"), exist_ok=True)
+    for jf, entry in frames.items():
+        annotations = []
+        coco_annotations = []
+        for annotation in entry["annotations"]:
+            annotation = dict(annotation)
+            annotations.append(
+                {"label": annotation.pop("label"), "id": annotation.pop("id")}
+            )
+            coco_annotations.append(annotation)
+        with open(annotations_path(labelPath, jf), "w") as f:
+            json.dump(coco_annotations, f)
+        manifest_frames[jf] = {**entry, "annotations": annotations}
+    return manifest_frames
+
+
+def benchmark(write, *args):
+    t_start = time.time()
+    write(*args)
+    elapsed = time.time() - t_start
+    # tracing slows python down a lot, so memory is measured in a second run
+    tracemalloc.start()
+    write(*args)
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--num-frames", type=int, nargs="+", default=[1000, 4000], help="frames"
+    )
+    parser.add_argument("--num-shapes", type=int, default=10, help="shapes/frame")
+    parser.add_argument("--num-points", type=int, default=50, help="points/shape")
+    args = parser.parse_args()
+
+    logger.remove()
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        exporter = DatasetExporter(types.SimpleNamespace(labelPath=tmp_dir))
+        cat_map = {"label_%d" % i: i + 1 for i in range(5)}
+        for num_frames in args.num_frames:
+            frames = make_frames(num_frames, args.num_shapes, args.num_points)
+            json_files = sorted(frames)
+            manifest_frames = write_manifest_frames(tmp_dir, frames)
+
+            dict_out = osp.join(tmp_dir, "coco_dict.json")
+            stream_out = osp.join(tmp_dir, "coco_stream.json")
+            gzip_out = osp.join(tmp_dir, "coco_stream.json.gz")
+            before = benchmark(write_coco_dict, dict_out, json_files, frames, cat_map)
+            after = benchmark(
+                exporter.write_coco, stream_out, json_files, manifest_frames, cat_map
+            )
+            with open(dict_out) as f1, open(stream_out) as f2:
+                assert json.load(f1) == json.load(f2)
+            stream_size = os.path.getsize(stream_out)
+            # this replaces the uncompressed file
+            exporter.coco_gzip = True
+            gzipped = benchmark(
+                exporter.write_coco, gzip_out, json_files, manifest_frames, cat_map
+            )
+            exporter.coco_gzip = False
+
+            print(
+                f"{num_frames} frames x {args.num_shapes} shapes "
+                f"x {args.num_points} points: "
+                f"dict+indent={before[0]:.2f}s/{before[1] / 2**20:.0f}MB/"
+                f"{os.path.getsize(dict_out) / 2**20:.0f}MB "
+                f"streamed={after[0]:.2f}s/{after[1] / 2**20:.1f}MB/"
+                f"{stream_size / 2**20:.0f}MB "
+                f"gzip={gzipped[0]:.2f}s/{gzipped[1] / 2**20:.1f}MB/"
+                f"{os.path.getsize(gzip_out) / 2**20:.0f}MB "
+                "(time/peak memory/file size)"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,126 @@
+#!/usr/bin/env python
+
+import argparse
+import csv
+import json
+import os
+import os.path as osp
+import tempfile
+import time
+
+import numpy as np
+import PIL.Image
+from loguru import logger
+
+from labelme.label_file import LabelFile
+
+
+def load_csv_per_row(filename):
+    # LabelFile.load for .csv before rows were streamed: the image is loaded
+    # for every row. The image path is resolved like the new loader does, so
+    # that it is found.
+    labelPath = osp.dirname(osp.dirname(osp.dirname(filename)))
+    with open(filename, "r", encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        shapes = []
+        imagePath = None
+        for row in reader:
+            points = json.loads(row["points"]) if row["points"] else []
+            flags = json.loads(row["flags"]) if row["flags"] else {}
+            description = json.loads(row["description"]) if row["description"] else ""
+            mask = json.loads(row["mask"]) if row["mask"] else None
+            shapes.append(
+                {
+                    "label": row["label"],
+                    "points": points,
+                    "shape_type": row["shape_type"],
+                    "description": description,
+                    "flags": flags,
+                    "group_id": int(row["group_id"]) if row["group_id"] else None,
+                    "mask": mask,
+                }
+            )
+            if not imagePath:
+                imagePath = row["imagePath"]
+            imageData = LabelFile.load_image_file(osp.normpath(labelPath + imagePath))
+    return shapes, imageData
+
+
+def make_fixture(tmp_dir, num_shapes, num_points, csv_layout):
+    os.makedirs(osp.join(tmp_dir, "origins/images"), exist_ok=True)
+    os.makedirs(osp.join(tmp_dir, "annotations/labelme_jsons"), exist_ok=True)
+    image_file = osp.join(tmp_dir, "origins/images/frame.jpg")
+    if not osp.exists(image_file):
+        image = np.random.randint(0, 255, (135, 240, 3), dtype=np.uint8)
+        PIL.Image.fromarray(image).resize((1920, 1080)).save(image_file)
+
+    rng = np.random.default_rng(0)
+    shapes = [
+        dict(
+            label="label_%d" % (i % 10),
+            points=(rng.random((num_points, 2)) * [1920, 1080]).tolist(),
+            group_id=i,
+            description="",
+            shape_type="polygon",
+            flags={},
+            mask=None,
+        )
+        for i in range(num_shapes)
+    ]
+    filename = osp.join(tmp_dir, "annotations/labelme_jsons/frame_%s.csv" % csv_layout)
+    LabelFile().save(
+        filename=filename,
+        shapes=shapes,
+        imagePath="/origins/images/frame.jpg",
+        imageHeight=1080,
+        imageWidth=1920,
+        csv_layout=csv_layout,
+    )
+    return filename
+
+
+def benchmark(load, filename, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        t_start = time.time()
+        load(filename)
+        elapsed.append(time.time() - t_start)
+    return np.median(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--num-shapes", type=int, nargs="+", default=[500, 5000], help="csv rows"
+    )
+    parser.add_argument("--num-points", type=int, default=20, help="points/shape")
+    parser.add_argument("--repeat", type=int, default=3, help="loads per file")
+    args = parser.parse_args()
+
+    logger.remove()  # LabelFile.save logs every file it writes
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for num_shapes in args.num_shapes:
+            points_file = make_fixture(tmp_dir, num_shapes, args.num_points, "points")
+            columnar_file = make_fixture(
+                tmp_dir, num_shapes, args.num_points, "columnar"
+            )
+            assert LabelFile(points_file).shapes == LabelFile(columnar_file).shapes
+            assert LabelFile(points_file).shapes == load_csv_per_row(points_file)[0]
+
+            # the per-row loader takes too long to repeat on large files
+            before = benchmark(load_csv_per_row, points_file, 1)
+            after = benchmark(LabelFile, points_file, args.repeat)
+            columnar = benchmark(LabelFile, columnar_file, args.repeat)
+            print(
+                f"{num_shapes} shapes x {args.num_points} points: "
+                f"per-row={before * 1000:.1f}ms "
+                f"streamed={after * 1000:.1f}ms "
+                f"columnar={columnar * 1000:.1f}ms "
+                f"speedup={before / after:.1f}x/{before / columnar:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import os.path as osp
+import tempfile
+import time
+
+import numpy as np
+import PIL.Image
+import PIL.ImageDraw
+
+from labelme.DataSetExporter import export_frame
+from labelme.DataSetExporter import shape_mask
+
+
+def export_frame_full_masks(jf_path, labelPath):
+    # export_frame before masks were bbox sized: the frame is converted to
+    # RGBA up front and every shape gets a full frame mask
+    with open(jf_path, "r", encoding="utf-8") as f:
+        data = json.load(f)
+    abs_img = os.path.normpath(labelPath + data["imagePath"])
+    pil_img = PIL.Image.open(abs_img).convert("RGBA")
+    width, height = pil_img.size
+    label_count_map = {}
+    for shape in data["shapes"]:
+        lbl = shape["label"]
+        pts = shape["points"]
+        xs = [p[0] for p in pts]
+        ys = [p[1] for p in pts]
+        xmin, xmax = int(min(xs)), int(max(xs))
+        ymin, ymax = int(min(ys)), int(max(ys))
+
+        mask = PIL.Image.new("L", (width, height), 0)
+        draw = PIL.ImageDraw.Draw(mask)
+        draw.polygon([(int(p[0]), int(p[1])) for p in pts], fill=255)
+        region = pil_img.crop((xmin, ymin, xmax, ymax))
+        region.putalpha(mask.crop((xmin, ymin, xmax, ymax)))
+
+        label_count_map[lbl] = label_count_map.get(lbl, 0) + 1
+        dst_dir = os.path.join(labelPath, "images_full_masks", lbl)
+        os.makedirs(dst_dir, exist_ok=True)
+        base = os.path.splitext(os.path.basename(abs_img))[0]
+        region.save(os.path.join(dst_dir, f"{base}_{lbl}_{label_count_map[lbl]}.png"))
+
+
+def full_masks(shapes, image_size):
+    for shape in shapes:
+        pts = shape["points"]
+        xs = [p[0] for p in pts]
+        ys = [p[1] for p in pts]
+        mask = PIL.Image.new("L", image_size, 0)
+        draw = PIL.ImageDraw.Draw(mask)
+        draw.polygon([(int(p[0]), int(p[1])) for p in pts], fill=255)
+        mask.crop((int(min(xs)), int(min(ys)), int(max(xs)), int(max(ys))))
+
+
+def bbox_masks(shapes, image_size):
+    for shape in shapes:
+        shape_mask(shape, image_size)
+
+
+def make_fixture(tmp_dir, width, height, num_shapes, shape_size):
+    os.makedirs(osp.join(tmp_dir, "origins/images"), exist_ok=True)
+    os.makedirs(osp.join(tmp_dir, "annotations/labelme_jsons"), exist_ok=True)
+    image = np.random.randint(0, 255, (height // 8, width // 8, 3), dtype=np.uint8)
+    PIL.Image.fromarray(image).resize((width, height)).save(
+        osp.join(tmp_dir, "origins/images/frame.jpg")
+    )
+
+    rng = np.random.default_rng(0)
+    shapes = []
+    for i in range(num_shapes):
+        center = rng.random(2) * [width - shape_size, height - shape_size]
+        center += shape_size / 2
+        angles = np.sort(rng.random(12)) * 2 * np.pi
+        radii = (0.5 + rng.random(12) / 2) * shape_size / 2
+        points = (
+            center + np.stack([np.cos(angles), np.sin(angles)], axis=1) * radii[:, None]
+        )
+        shapes.append(
+            dict(
+                label="label_%d" % (i % 5), points=points.tolist(), shape_type="polygon"
+            )
+        )
+    jf_path = osp.join(tmp_dir, "annotations/labelme_jsons/frame.json")
+    with open(jf_path, "w") as f:
+        json.dump(dict(imagePath="/origins/images/frame.jpg", shapes=shapes), f)
+    return jf_path
+
+
+def benchmark(export, jf_path, labelPath, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        t_start = time.time()
+        export(jf_path, labelPath)
+        elapsed.append(time.time() - t_start)
+    return np.median(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--width", type=int, default=3840, help="frame width")
+    parser.add_argument("--height", type=int, default=2160, help="frame height")
+    parser.add_argument(
+        "--num-shapes", type=int, nargs="+", default=[10, 50], help="shapes/frame"
+    )
+    parser.add_argument("--shape-size", type=int, default=200, help="shape extent")
+    parser.add_argument("--repeat", type=int, default=3, help="exports per frame")
+    args = parser.parse_args()
+
+    for num_shapes in args.num_shapes:
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            jf_path = make_fixture(
+                tmp_dir, args.width, args.height, num_shapes, args.shape_size
+            )
+            before = benchmark(export_frame_full_masks, jf_path, tmp_dir, args.repeat)
+            after = benchmark(export_frame, jf_path, tmp_dir, args.repeat)
+            # most of a frame is spent encoding the crops, so time the masks too
+            with open(jf_path) as f:
+                shapes = json.load(f)["shapes"]
+            image_size = (args.width, args.height)
+            masks_before = benchmark(full_masks, shapes, image_size, args.repeat)
+            masks_after = benchmark(bbox_masks, shapes, image_size, args.repeat)
+
+            for label in os.listdir(osp.join(tmp_dir, "images")):
+                for fname in os.listdir(osp.join(tmp_dir, "images", label)):
+                    crop = PIL.Image.open(osp.join(tmp_dir, "images", label, fname))
+                    crop_full_masks = PIL.Image.open(
+                        osp.join(tmp_dir, "images_full_masks", label, fname)
+                    )
+                    crop = np.asarray(crop)
+                    crop_full_masks = np.asarray(crop_full_masks)
+                    assert np.array_equal(crop[..., :3], crop_full_masks[..., :3])
+                    # PIL fills polygons with float edges, so a pixel may land
+                    # on the other side of an edge when drawn at an offset
+                    alpha_mismatch = crop[..., 3] != crop_full_masks[..., 3]
+                    assert alpha_mismatch.mean() < 1e-3
+
+            print(
+                f"{args.width}x{args.height}, {num_shapes} shapes: "
+                f"full-masks={before * 1000:.1f}ms "
+                f"bbox-masks={after * 1000:.1f}ms "
+                f"speedup={before / after:.1f}x; masks only: "
+                f"full-masks={masks_before * 1000:.1f}ms "
+                f"bbox-masks={masks_after * 1000:.1f}ms "
+                f"speedup={masks_before / masks_after:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+
+import argparse
+import json
+import os
+import os.path as osp
+import tempfile
+import time
+import types
+
+import numpy as np
+import PIL.Image
+from loguru import logger
+
+from labelme.DataSetExporter import DatasetExporter
+
+
+def make_fixture(root, num_frames, num_shapes):
+    os.makedirs(osp.join(root, "origins/images"))
+    os.makedirs(osp.join(root, "annotations/labelme_jsons"))
+    image = np.random.randint(0, 255, (48, 64, 3), dtype=np.uint8)
+    image_file = osp.join(root, "origins/images/frame_%06d.jpg")
+    PIL.Image.fromarray(image).resize((640, 480)).save(image_file % 0)
+
+    rng = np.random.default_rng(0)
+    for i in range(num_frames):
+        if i > 0:
+            os.link(image_file % 0, image_file % i)
+        shapes = []
+        for j in range(num_shapes):
+            xy = rng.random(2) * [600, 440]
+            points = xy + rng.random((6, 2)) * 40
+            shapes.append(
+                dict(
+                    label="label_%d" % (j % 5),
+                    points=points.tolist(),
+                    shape_type="polygon",
+                )
+            )
+        with open(
+            osp.join(root, "annotations/labelme_jsons/frame_%06d.json" % i), "w"
+        ) as f:
+            json.dump(
+                dict(imagePath="/origins/images/frame_%06d.jpg" % i, shapes=shapes), f
+            )
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--num-frames", type=int, default=2000, help="json files")
+    parser.add_argument("--num-shapes", type=int, default=5, help="shapes/frame")
+    args = parser.parse_args()
+
+    logger.remove()  # the exporter logs every frame and archived file
+    with tempfile.TemporaryDirectory() as root:
+        make_fixture(root, args.num_frames, args.num_shapes)
+        exporter = DatasetExporter(types.SimpleNamespace(labelPath=root))
+        exporter.create_archive = lambda: None  # not incremental, time it apart
+
+        t_start = time.time()
+        exporter.export()
+        full = time.time() - t_start
+
+        json_file = osp.join(root, "annotations/labelme_jsons/frame_000000.json")
+        with open(json_file) as f:
+            data = json.load(f)
+        data["shapes"].pop()
+        with open(json_file, "w") as f:
+            json.dump(data, f)
+        t_start = time.time()
+        exporter.export()
+        one_changed = time.time() - t_start
+
+        t_start = time.time()
+        exporter.export()
+        unchanged = time.time() - t_start
+
+        print(
+            f"{args.num_frames} frames x {args.num_shapes} shapes: "
+            f"full={full:.2f}s one-changed={one_changed:.2f}s "
+            f"unchanged={unchanged:.2f}s speedup={full / one_changed:.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
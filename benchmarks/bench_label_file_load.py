@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+
+import argparse
+import base64
+import glob
+import io
+import json
+import os.path as osp
+import tempfile
+import time
+
+import numpy as np
+import PIL.Image
+
+from labelme import utils
+from labelme.label_file import LabelFile
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../tests/labelme_tests/data")
+
+
+class LabelFileB64Check(LabelFile):
+    @staticmethod
+    def _check_image_height_and_width(imageData, imageHeight, imageWidth):
+        # LabelFile._check_image_height_and_width before the header-only probe:
+        # the image is base64 encoded, then decoded into a full array.
+        img_arr = utils.img_b64_to_arr(base64.b64encode(imageData).decode("utf-8"))
+        return img_arr.shape[0], img_arr.shape[1]
+
+
+def make_label_files(tmp_dir, scale):
+    """Write the annotated samples scaled up, with the image data embedded."""
+    filenames = []
+    for json_file in sorted(glob.glob(osp.join(data_dir, "annotated/*.json"))):
+        with open(json_file) as f:
+            data = json.load(f)
+        image = PIL.Image.open(osp.splitext(json_file)[0] + ".jpg")
+        image = image.resize((image.width * scale, image.height * scale))
+        with io.BytesIO() as f:
+            image.save(f, format="JPEG")
+            data["imageData"] = base64.b64encode(f.getvalue()).decode("utf-8")
+        data["imageHeight"], data["imageWidth"] = image.height, image.width
+        for shape in data["shapes"]:
+            shape["points"] = [[x * scale, y * scale] for x, y in shape["points"]]
+        filename = osp.join(tmp_dir, osp.basename(json_file))
+        with open(filename, "w") as f:
+            json.dump(data, f)
+        filenames.append((filename, image.size))
+    return filenames
+
+
+def benchmark(label_file_class, filename, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        t_start = time.time()
+        label_file_class(filename)
+        elapsed.append(time.time() - t_start)
+    return np.median(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--scale", type=int, default=4, help="sample upscale")
+    parser.add_argument("--repeat", type=int, default=10, help="loads per file")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for filename, (width, height) in make_label_files(tmp_dir, args.scale):
+            before = benchmark(LabelFileB64Check, filename, args.repeat)
+            after = benchmark(LabelFile, filename, args.repeat)
+            print(
+                f"{osp.basename(filename)}: {width}x{height} load "
+                f"b64-decode-check={before * 1000:.1f}ms "
+                f"header-check={after * 1000:.1f}ms "
+                f"speedup={before / after:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+
+import argparse
+import io
+import os.path as osp
+import tempfile
+import time
+
+import numpy as np
+import PIL.Image
+from PyQt5 import QtGui
+
+from labelme import utils
+from labelme.label_file import LabelFile
+
+
+def load_image_file_reencode(filename):
+    # LabelFile.load_image_file before the pass-through path was added.
+    image_pil = PIL.Image.open(filename)
+    image_pil = utils.apply_exif_orientation(image_pil)
+    with io.BytesIO() as f:
+        ext = osp.splitext(filename)[1].lower()
+        image_pil.save(f, format="JPEG" if ext in [".jpg", ".jpeg"] else "PNG")
+        f.seek(0)
+        return f.read()
+
+
+def benchmark(load, filename, repeat):
+    elapsed = []
+    for _ in range(repeat):
+        t_start = time.time()
+        image = QtGui.QImage.fromData(load(filename))
+        elapsed.append(time.time() - t_start)
+        assert not image.isNull()
+    return np.median(elapsed)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument("--width", type=int, default=4096, help="frame width")
+    parser.add_argument("--height", type=int, default=2160, help="frame height")
+    parser.add_argument("--repeat", type=int, default=10, help="frames to load")
+    args = parser.parse_args()
+
+    app = QtGui.QGuiApplication([])  # noqa: F841
+
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        for ext in [".jpg", ".png"]:
+            filename = osp.join(tmp_dir, "frame" + ext)
+            image = np.random.randint(
+                0, 255, (args.height // 8, args.width // 8, 3), dtype=np.uint8
+            )
+            PIL.Image.fromarray(image).resize((args.width, args.height)).save(filename)
+
+            before = benchmark(load_image_file_reencode, filename, args.repeat)
+            after = benchmark(LabelFile.load_image_file, filename, args.repeat)
+            print(
+                f"{ext}: {args.width}x{args.height} per-frame load "
+                f"re-encode={before * 1000:.1f}ms "
+                f"pass-through={after * 1000:.1f}ms "
+                f"speedup={before / after:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
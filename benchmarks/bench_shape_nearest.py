@@ -0,0 +1,111 @@
+#!/usr/bin/env python
+
+import argparse
+import math
+import time
+
+import numpy as np
+from PyQt5 import QtCore
+
+from labelme import utils
+from labelme._automation.polygon_from_mask import compute_polygon_from_mask
+from labelme.shape import Shape
+
+
+def nearest_vertex_loop(shape, point, epsilon):
+    # Shape.nearestVertex before the coordinate buffer was added.
+    min_distance = float("inf")
+    min_i = None
+    point = QtCore.QPointF(point.x() * shape.scale, point.y() * shape.scale)
+    for i, p in enumerate(shape.points):
+        p = QtCore.QPointF(p.x() * shape.scale, p.y() * shape.scale)
+        dist = utils.distance(p - point)
+        if dist <= epsilon and dist < min_distance:
+            min_distance = dist
+            min_i = i
+    return min_i
+
+
+def nearest_edge_loop(shape, point, epsilon):
+    # Shape.nearestEdge before the coordinate buffer was added.
+    min_distance = float("inf")
+    post_i = None
+    point = QtCore.QPointF(point.x() * shape.scale, point.y() * shape.scale)
+    for i in range(len(shape.points)):
+        start = shape.points[i - 1]
+        end = shape.points[i]
+        start = QtCore.QPointF(start.x() * shape.scale, start.y() * shape.scale)
+        end = QtCore.QPointF(end.x() * shape.scale, end.y() * shape.scale)
+        dist = utils.distancetoline(point, [start, end])
+        if dist <= epsilon and dist < min_distance:
+            min_distance = dist
+            post_i = i
+    return post_i
+
+
+def comb_mask(size):
+    # Rows of 2px wide teeth, a bit taller than the simplification tolerance
+    # of compute_polygon_from_mask so that every tooth keeps its corners.
+    mask = np.zeros((size, size), dtype=bool)
+    tooth = math.ceil(size * 0.004 * 3) + 1
+    mask[:, :2] = True
+    for y in range(0, size - tooth, tooth + 3):
+        mask[y : y + 2, :] = True
+        for x in range(2, size, 4):
+            mask[y : y + tooth, x : x + 2] = True
+    return mask
+
+
+def benchmark(nearest, shape, points, epsilon):
+    t_start = time.time()
+    for point in points:
+        nearest(shape, point, epsilon)
+    return (time.time() - t_start) / len(points)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter
+    )
+    parser.add_argument(
+        "--mask-sizes",
+        type=int,
+        nargs="+",
+        default=[6, 90, 1500],
+        help="comb mask sizes, giving polygons of about 10, 1k and 50k vertices",
+    )
+    parser.add_argument("--queries", type=int, default=20, help="hover positions")
+    parser.add_argument("--epsilon", type=float, default=10.0, help="in pixels")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    for size in args.mask_sizes:
+        polygon = compute_polygon_from_mask(comb_mask(size))
+        shape = Shape(shape_type="polygon")
+        shape.scale = 1.0
+        shape.points = [QtCore.QPointF(x, y) for x, y in polygon]
+        shape.close()
+        points = [
+            QtCore.QPointF(x, y) for x, y in rng.uniform(0, size, (args.queries, 2))
+        ]
+
+        for name, loop, vectorized in [
+            ("nearestVertex", nearest_vertex_loop, Shape.nearestVertex),
+            ("nearestEdge", nearest_edge_loop, Shape.nearestEdge),
+        ]:
+            for point in points:
+                assert loop(shape, point, args.epsilon) == vectorized(
+                    shape, point, args.epsilon
+                )
+            before = benchmark(loop, shape, points, args.epsilon)
+            after = benchmark(vectorized, shape, points, args.epsilon)
+            print(
+                f"{name}: {len(shape)} vertices "
+                f"loop={before * 1000:.3f}ms "
+                f"vectorized={after * 1000:.3f}ms "
+                f"speedup={before / after:.1f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,18 +1,282 @@
 import os
+import gzip
+import hashlib
 import json
+import math
 import shutil
 import time
-import zipfile
+import multiprocessing
+import threading
+from concurrent import futures
 from PIL import Image, ImageDraw
 from loguru import logger
-from PyQt5.QtWidgets import QApplication
+from PyQt5 import QtCore
 from datetime import datetime
 
-class DatasetExporter:
-    def __init__(self, main_window):
+from labelme._storage.archive import ArchiveCanceled
+from labelme._storage.archive import check_archive_format
+from labelme._storage.archive import write_archive
+from labelme.label_file import atomic_open
+
+# export_frame 의 출력이 바뀌면 올려서 이전 매니페스트를 버리게 합니다
+MANIFEST_VERSION = 2
+
+
+def annotations_path(labelPath, jf):
+    """
+    프레임(JSON 파일 이름 jf)의 COCO annotation 들을 담아 두는 파일 경로.
+
+    매니페스트에는 프레임마다 해시, id, 크롭 이름만 두고 bbox 와
+    segmentation 처럼 큰 내용은 이 파일에 두어, export 하는 동안 메모리에
+    모든 프레임의 도형이 올라오지 않게 합니다.
+    """
+    return os.path.join(labelPath, 'export_cache', jf)
+
+
+def shape_mask(shape, image_size, line_width=10, point_size=5):
+    """
+    도형 하나를 bounding box 크기의 마스크("L")로 그려
+    (xmin, ymin, xmax, ymax) 와 함께 돌려줍니다.
+
+    전체 이미지 크기의 마스크 대신 bbox 주변 창에만 그립니다. PIL 은 캔버스
+    가장자리 픽셀을 다르게 채우므로 창은 bbox 보다 2픽셀 넓게(이미지
+    안쪽으로만) 잡습니다. 선 두께와 점 크기는 utils.shape_to_mask 와 같습니다.
+    """
+    pts = shape["points"]
+    shape_type = shape.get("shape_type") or "polygon"
+    xs = [p[0] for p in pts]
+    ys = [p[1] for p in pts]
+
+    if shape_type == "circle":
+        (cx, cy), (px, py) = pts[:2]
+        r = math.hypot(cx - px, cy - py)
+        extent = (cx - r, cy - r, cx + r, cy + r)
+    elif shape_type in ("line", "linestrip"):
+        r = line_width / 2
+        extent = (min(xs) - r, min(ys) - r, max(xs) + r, max(ys) + r)
+    elif shape_type == "point":
+        cx, cy = pts[0]
+        r = point_size
+        extent = (cx - r, cy - r, cx + r, cy + r)
+    else:
+        extent = None
+
+    if extent is None:
+        # polygon/rectangle: 예전과 같이 정수 좌표를 쓰고 xmax/ymax 는 포함하지 않습니다
+        xmin, xmax = int(min(xs)), int(max(xs))
+        ymin, ymax = int(min(ys)), int(max(ys))
+    else:
+        xmin, ymin = math.floor(extent[0]), math.floor(extent[1])
+        xmax, ymax = math.ceil(extent[2]), math.ceil(extent[3])
+    if xmax <= xmin or ymax <= ymin:
+        return (xmin, ymin, xmax, ymax), Image.new("L", (0, 0))
+
+    width, height = image_size
+    left, top = max(xmin - 2, 0), max(ymin - 2, 0)
+    right, bottom = min(xmax + 2, width), min(ymax + 2, height)
+    window = Image.new("L", (max(right - left, 0), max(bottom - top, 0)), 0)
+    draw = ImageDraw.Draw(window)
+    if shape_type in ("circle", "point"):
+        draw.ellipse(
+            [extent[0] - left, extent[1] - top, extent[2] - left, extent[3] - top],
+            fill=255,
+        )
+    elif shape_type in ("line", "linestrip"):
+        draw.line([(p[0] - left, p[1] - top) for p in pts], fill=255, width=line_width)
+    elif shape_type == "rectangle":
+        draw.rectangle(
+            [xmin - left, ymin - top, xmax - 1 - left, ymax - 1 - top], fill=255
+        )
+    else:
+        draw.polygon([(int(p[0]) - left, int(p[1]) - top) for p in pts], fill=255)
+    # 이미지 밖으로 나간 부분은 crop 이 0 으로 채웁니다
+    mask = window.crop((xmin - left, ymin - top, xmax - left, ymax - top))
+    return (xmin, ymin, xmax, ymax), mask
+
+
+def export_frame(jf_path, labelPath):
+    """
+    LabelMe JSON 한 개를 처리합니다: 도형마다 이미지를 크롭해 PNG 로 저장하고,
+    COCO annotation 들을 annotations_path() 에 쓴 뒤 매니페스트 항목을
+    돌려줍니다. 항목에는 이미지 정보, annotation 마다 label, 저장한 크롭
+    파일들(labelPath 기준 상대 경로)과 변경 판단에 쓸 정보가 들어갑니다.
+    프로세스 풀의 워커에서 실행됩니다.
+    """
+    label_count_map = {}
+    json_stat = os.stat(jf_path)
+    with open(jf_path, 'rb') as f:
+        raw = f.read()
+    data = json.loads(raw)
+
+    # 원본 이미지 경로 (origins 폴더로 복사해 두는 경우)
+    abs_img = os.path.normpath(labelPath + data["imagePath"])
+    image_mtime_ns = os.stat(abs_img).st_mtime_ns
+    base = os.path.splitext(os.path.basename(abs_img))[0]
+
+    # 이미지는 프레임마다 한 번만 디코딩하고, RGBA 변환은 크롭한 영역에만 합니다
+    pil_img = Image.open(abs_img)
+    pil_img.load()
+    width, height = pil_img.size
+
+    labels = []
+    annotations = []
+    crops = []
+    for shape in data.get("shapes", []):
+        lbl = shape["label"]
+        pts = shape["points"]
+
+        # bounding box 와 bbox 크기의 마스크
+        box, mask = shape_mask(shape, pil_img.size)
+        xmin, ymin, xmax, ymax = box
+
+        # COCO annotation (id 와 category 는 부모 프로세스에서 매깁니다)
+        labels.append(lbl)
+        annotations.append({
+            "bbox": [xmin, ymin, xmax - xmin, ymax - ymin],
+            "area": (xmax - xmin) * (ymax - ymin),
+            "segmentation": [sum(pts, [])],
+            "iscrowd": 0,
+        })
+
+        if mask.width == 0 or mask.height == 0:
+            logger.warning(f"크기가 0인 도형은 크롭하지 않습니다: {jf_path} {lbl}")
+            continue
+
+        region = pil_img.crop(box).convert("RGBA")
+        region.putalpha(mask)
+
+        # 크롭 이미지 저장
+        label_count_map[lbl] = label_count_map.get(lbl, 0) + 1
+        idx = label_count_map[lbl]
+        dst_dir = os.path.join(labelPath, 'images', lbl)
+        os.makedirs(dst_dir, exist_ok=True)
+        crop_fname = f"{base}_{lbl}_{idx}.png"
+        save_path = os.path.join(dst_dir, crop_fname)
+        region.save(save_path)
+        crops.append(os.path.join('images', lbl, crop_fname))
+
+    ann_path = annotations_path(labelPath, os.path.basename(jf_path))
+    os.makedirs(os.path.dirname(ann_path), exist_ok=True)
+    with atomic_open(ann_path) as f:
+        f.write(json.dumps(annotations, separators=(',', ':')))
+
+    image = {
+        "file_name": data["imagePath"],
+        "width": width,
+        "height": height,
+    }
+    return {
+        "json_mtime_ns": json_stat.st_mtime_ns,
+        "json_size": json_stat.st_size,
+        "sha1": hashlib.sha1(raw).hexdigest(),
+        "image_mtime_ns": image_mtime_ns,
+        "image": image,
+        "annotations": [{"label": lbl} for lbl in labels],
+        "crops": crops,
+    }
+
+
+class CocoWriter:
+    """
+    COCO JSON 을 항목 하나씩 파일에 씁니다.
+
+    전체를 dict 로 모았다가 json.dump 하지 않으므로 메모리 사용량이 데이터셋
+    크기와 상관없이 일정합니다. 구분자는 공백 없이 쓰고, compress=True 이면
+    gzip 으로 압축합니다. 파일은 닫을 때 한번에 바뀝니다(atomic_open).
+
+        with CocoWriter(path) as writer:
+            writer.section("images", images)
+            writer.section("annotations", annotations)
+            writer.section("categories", categories)
+    """
+
+    def __init__(self, path, compress=False):
+        self.path = path
+        self.compress = compress
+        self._encoder = json.JSONEncoder(separators=(',', ':'))
+        self._sections = 0
+
+    def __enter__(self):
+        self._file_cm = atomic_open(self.path, "wb")
+        self._file = self._file_cm.__enter__()
+        self._out = self._file
+        if self.compress:
+            # 압축 해제했을 때의 파일 이름은 .gz 를 뗀 이름으로 남깁니다
+            name = os.path.basename(self.path)
+            if name.endswith('.gz'):
+                name = name[:-3]
+            # 좌표 숫자는 압축률이 레벨에 따라 거의 차이가 없어 가장 빠른 레벨을 씁니다
+            self._out = gzip.GzipFile(
+                filename=name, mode='wb', compresslevel=1, fileobj=self._file
+            )
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        try:
+            if exc_type is None:
+                self._write('}' if self._sections else '{}')
+            if self._out is not self._file:
+                self._out.close()
+        finally:
+            self._file_cm.__exit__(exc_type, exc, tb)
+
+    def _write(self, text):
+        self._out.write(text.encode('utf-8'))
+
+    def section(self, name, items):
+        """name 키의 배열을 items 에서 하나씩 꺼내 씁니다."""
+        self._write(('{' if self._sections == 0 else ',') + json.dumps(name) + ':[')
+        self._sections += 1
+        first = True
+        for item in items:
+            if not first:
+                self._write(',')
+            first = False
+            self._write(self._encoder.encode(item))
+        self._write(']')
+
+
+class _ExportRunnable(QtCore.QRunnable):
+    def __init__(self, exporter):
+        super().__init__()
+        self._exporter = exporter
+
+    def run(self):
+        try:
+            success = self._exporter.export()
+        except Exception as e:
+            self._exporter.log(f"Export 실패: {e}", error=True)
+            success = False
+        self._exporter.finished.emit(success)
+
+
+class DatasetExporter(QtCore.QObject):
+    """
+    LabelMe JSON → COCO 변환, 크롭, 아카이브(zip, tar, tar.zst) 생성을 수행합니다.
+
+    프레임별 처리(JSON 파싱, 크롭, PNG 저장)는 프로세스 풀에서 병렬로 실행하고
+    COCO 조립은 이 프로세스에서 합니다. start() 는 export() 를 백그라운드
+    스레드에서 실행하며, 진행 상황은 progress(done, total), message(text),
+    finished(success) 시그널로 알립니다.
+    """
+
+    progress = QtCore.pyqtSignal(int, int)
+    message = QtCore.pyqtSignal(str)
+    finished = QtCore.pyqtSignal(bool)
+
+    def __init__(
+        self, main_window, max_workers=None, coco_gzip=False, archive_format="zip"
+    ):
+        super().__init__()
         self.main_window = main_window
         # labelPath 끝의 슬래시 제거
         self.labelPath = main_window.labelPath.rstrip(os.sep)
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.coco_gzip = coco_gzip
+        self.archive_format = archive_format
+        self._canceled = threading.Event()
+        self._pool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
 
     def log(self, message, warning=False, error=False):
         if warning:
@@ -21,10 +285,19 @@ class DatasetExporter:
             logger.error(message)
         else:
             logger.info(message)
-        if self.main_window:
-            # 상태바에 메시지 표시
-            self.main_window.status_bar.showMessage(message, 5000)
-            QApplication.processEvents()
+        # 상태바 표시는 시그널을 받은 GUI 스레드에서 합니다
+        self.message.emit(message)
+
+    def start(self):
+        """export() 를 백그라운드에서 실행합니다."""
+        self._canceled.clear()
+        self._pool.start(_ExportRunnable(self))
+
+    def cancel(self):
+        self._canceled.set()
+
+    def waitForDone(self, msecs=-1):
+        return self._pool.waitForDone(msecs)
 
     def ensure_dirs(self):
         """
@@ -35,7 +308,8 @@ class DatasetExporter:
             os.path.join(self.labelPath, 'annotations', 'labelme_jsons'),
             os.path.join(self.labelPath, 'images'),
             os.path.join(self.labelPath, 'origins','images'),    # 원본 이미지 디렉터리
-            os.path.join(self.labelPath, 'archive'),    # ZIP 파일을 저장할 디렉터리
+            os.path.join(self.labelPath, 'archive'),    # 아카이브를 저장할 디렉터리
+            os.path.join(self.labelPath, 'export_cache'),    # 프레임별 COCO annotation
         ]
         for d in dirs:
             os.makedirs(d, exist_ok=True)
@@ -44,8 +318,19 @@ class DatasetExporter:
     def export(self):
         """
         LabelMe JSON → COCO JSON 변환 및 이미지 크롭,
-        그리고 최종 ZIP 아카이브 생성까지 수행합니다.
+        그리고 최종 아카이브 생성까지 수행합니다.
+
+        지난 export 결과는 매니페스트(export_manifest.json)에 남겨 두고,
+        바뀌거나 새로 생긴 프레임만 다시 처리합니다. 나머지 프레임의 크롭과
+        COCO annotation(id 포함)은 그대로 다시 씁니다.
         """
+        # 프레임을 모두 처리한 뒤에야 아카이브를 못 만든다는 걸 알지 않도록 먼저 확인합니다
+        try:
+            check_archive_format(self.archive_format)
+        except (ValueError, RuntimeError) as e:
+            self.log(f"아카이브를 만들 수 없습니다: {e}", error=True)
+            return False
+
         self.ensure_dirs()
 
         json_dir = os.path.join(self.labelPath, 'annotations', 'labelme_jsons')
@@ -53,109 +338,262 @@ class DatasetExporter:
             self.log(f"JSON 디렉터리 없음: {json_dir}", error=True)
             return False
 
-        json_files = [f for f in os.listdir(json_dir) if f.lower().endswith('.json')]
+        json_files = sorted(
+            f for f in os.listdir(json_dir) if f.lower().endswith('.json')
+        )
         if not json_files:
             self.log("LabelMe JSON 파일을 찾을 수 없습니다.", warning=True)
             return False
 
-        # COCO 구조 초기화
-        coco_out = os.path.join(self.labelPath, 'annotations', 'coco', 'dataset_coco.json')
-        coco = {"images": [], "annotations": [], "categories": []}
-        cat_map = {}
-        cat_id = 1
-        ann_id = 1  # 전체 COCO용 annotation ID
+        manifest = self.load_manifest()
+        old_frames = manifest["frames"]
+        frames = {}
+        changed = []
+        for jf in json_files:
+            entry = self.current_entry(os.path.join(json_dir, jf), old_frames.get(jf))
+            if entry is None:
+                changed.append(jf)
+            else:
+                frames[jf] = entry
+        self.log(
+            f"변경된 프레임 {len(changed)}개 / 전체 {len(json_files)}개를 처리합니다."
+        )
+
+        results = self.process_frames(
+            [os.path.join(json_dir, jf) for jf in changed]
+        )
+        if results is None:
+            self.log("Export 가 취소되었습니다.", warning=True)
+            return False
 
+        # id 는 한번 매기면 유지합니다. 새 프레임과 늘어난 도형만 새 id 를 받습니다
+        next_img_id = 1 + max(
+            (e["image_id"] for e in old_frames.values()), default=0
+        )
+        next_ann_id = 1 + max(
+            (a["id"] for e in old_frames.values() for a in e["annotations"]),
+            default=0,
+        )
+        for jf, entry in zip(changed, results):
+            old = old_frames.get(jf)
+            if entry is None:
+                # 잠긴 이미지처럼 일시적인 실패로 지난 결과를 잃지 않도록
+                # 예전 항목과 크롭을 그대로 두고, 다음 export 때 다시 처리합니다
+                if old is not None:
+                    self.log(f"지난 export 결과를 유지합니다: {jf}", warning=True)
+                    frames[jf] = {**old, "retry": True}
+                continue
+            if old is None:
+                img_id, old_ann_ids = next_img_id, []
+                next_img_id += 1
+            else:
+                img_id = old["image_id"]
+                old_ann_ids = [a["id"] for a in old["annotations"]]
+            annotations = entry["annotations"]
+            for annotation, ann_id in zip(annotations, old_ann_ids):
+                annotation["id"] = ann_id
+            for annotation in annotations[len(old_ann_ids):]:
+                annotation["id"] = next_ann_id
+                next_ann_id += 1
+            entry["image_id"] = img_id
+            frames[jf] = entry
+
+        # 지워진 프레임의 annotation 파일, 지워진 프레임과 도형의 크롭 삭제
+        # (같은 이미지를 쓰는 프레임끼리는 크롭 파일 이름이 겹칠 수 있습니다)
+        kept = {crop for entry in frames.values() for crop in entry["crops"]}
+        removed = [
+            annotations_path(self.labelPath, jf)
+            for jf in old_frames
+            if jf not in frames
+        ]
+        for old in old_frames.values():
+            removed += [
+                os.path.join(self.labelPath, crop)
+                for crop in old["crops"]
+                if crop not in kept
+            ]
+        for path in removed:
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+        # category id 도 한번 매기면 유지합니다
+        cat_map = manifest["categories"]
         for jf in json_files:
-            label_count_map = {}
-            jf_path = os.path.join(json_dir, jf)
-            with open(jf_path, 'r', encoding='utf-8') as f:
-                data = json.load(f)
-
-            # 원본 이미지 경로 (origins 폴더로 복사해 두는 경우)
-            abs_img = os.path.normpath(self.labelPath + data["imagePath"])
-            
-            pil_img = Image.open(abs_img).convert("RGBA")
-            width, height = pil_img.size
-
-            # COCO images 항목 추가
-            img_id = len(coco["images"]) + 1
-            coco["images"].append({
-                "id": img_id,
-                "file_name": data["imagePath"],
-                "width": width,
-                "height": height,
-            })
-
-            for shape in data.get("shapes", []):
-                lbl = shape["label"]
-                pts = shape["points"]
-
-                # COCO category 처리
-                if lbl not in cat_map:
-                    cat_map[lbl] = cat_id
-                    coco["categories"].append({"id": cat_id, "name": lbl})
-                    cat_id += 1
-
-                # bounding box 계산
-                xs = [p[0] for p in pts]
-                ys = [p[1] for p in pts]
-                xmin, xmax = int(min(xs)), int(max(xs))
-                ymin, ymax = int(min(ys)), int(max(ys))
-
-                # COCO annotation 추가
-                coco["annotations"].append({
-                    "id": ann_id,
-                    "image_id": img_id,
-                    "category_id": cat_map[lbl],
-                    "bbox": [xmin, ymin, xmax - xmin, ymax - ymin],
-                    "area": (xmax - xmin) * (ymax - ymin),
-                    "segmentation": [sum(pts, [])],
-                    "iscrowd": 0,
-                })
-                ann_id += 1
-
-                # 마스크 생성 및 크롭
-                mask = Image.new("L", (width, height), 0)
-                draw = ImageDraw.Draw(mask)
-                draw.polygon([(int(p[0]), int(p[1])) for p in pts], fill=255)
-
-                region = pil_img.crop((xmin, ymin, xmax, ymax))
-                mask_region = mask.crop((xmin, ymin, xmax, ymax))
-                region.putalpha(mask_region)
-
-                # 크롭 이미지 저장
-                label_count_map[lbl] = label_count_map.get(lbl, 0) + 1
-                idx = label_count_map[lbl]
-                dst_dir = os.path.join(self.labelPath, 'images', lbl)
-                os.makedirs(dst_dir, exist_ok=True)
-                base = os.path.splitext(os.path.basename(abs_img))[0]
-                crop_fname = f"{base}_{lbl}_{idx}.png"
-                save_path = os.path.join(dst_dir, crop_fname)
-                region.save(save_path)
-
-            self.log(f"처리 완료: {jf_path}")
-
-        # COCO JSON 저장
-        with open(coco_out, 'w', encoding='utf-8') as f:
-            json.dump(coco, f, indent=2)
+            for annotation in frames.get(jf, {}).get("annotations", []):
+                if annotation["label"] not in cat_map:
+                    cat_map[annotation["label"]] = len(cat_map) + 1
+        unchanged = frames == old_frames
+        manifest["frames"] = frames
+
+        coco_out = self.coco_path()
+        if unchanged and os.path.exists(coco_out):
+            self.log(f"바뀐 프레임이 없어 COCO 파일을 그대로 둡니다: {coco_out}")
+        else:
+            self.write_coco(coco_out, json_files, frames, cat_map)
+            self.save_manifest(manifest)
+
+        # 아카이브 생성
+        return self.create_archive()
+
+    def coco_path(self):
+        name = 'dataset_coco.json.gz' if self.coco_gzip else 'dataset_coco.json'
+        return os.path.join(self.labelPath, 'annotations', 'coco', name)
+
+    def write_coco(self, coco_out, json_files, frames, cat_map):
+        """
+        매니페스트의 프레임 항목들로 COCO 파일을 씁니다.
+        이미지는 JSON 파일 순서대로 나열하며, annotation 은 프레임마다
+        annotations_path() 에서 읽어 쓰는 동안에만 메모리에 둡니다.
+        """
+        jfs = [jf for jf in json_files if jf in frames]
+
+        def images():
+            for jf in jfs:
+                yield {"id": frames[jf]["image_id"], **frames[jf]["image"]}
+
+        def annotations():
+            for jf in jfs:
+                entry = frames[jf]
+                with open(
+                    annotations_path(self.labelPath, jf), 'r', encoding='utf-8'
+                ) as f:
+                    coco_annotations = json.load(f)
+                for annotation, coco_annotation in zip(
+                    entry["annotations"], coco_annotations
+                ):
+                    yield {
+                        "id": annotation["id"],
+                        "image_id": entry["image_id"],
+                        "category_id": cat_map[annotation["label"]],
+                        **coco_annotation,
+                    }
+
+        with CocoWriter(coco_out, compress=self.coco_gzip) as writer:
+            writer.section("images", images())
+            writer.section("annotations", annotations())
+            writer.section(
+                "categories", ({"id": i, "name": n} for n, i in cat_map.items())
+            )
         self.log(f"COCO 파일 생성 완료: {coco_out}")
 
-        # ZIP 아카이브 생성
-        self.create_archive()
+        # 압축 설정을 바꾼 경우 다른 형식의 예전 파일은 지웁니다
+        root, ext = os.path.splitext(coco_out)
+        other = root if ext == '.gz' else coco_out + '.gz'
+        if os.path.exists(other):
+            os.remove(other)
 
-        return True
+    def manifest_path(self):
+        return os.path.join(self.labelPath, 'export_manifest.json')
+
+    def load_manifest(self):
+        """
+        지난 export 의 매니페스트를 읽습니다. 없거나 형식이 다르면 빈
+        매니페스트를 돌려주며, 이 경우 모든 프레임을 다시 처리합니다.
+        """
+        empty = {"version": MANIFEST_VERSION, "categories": {}, "frames": {}}
+        try:
+            with open(self.manifest_path(), 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except FileNotFoundError:
+            return empty
+        except (OSError, ValueError) as e:
+            self.log(f"매니페스트를 읽을 수 없어 전체를 다시 처리합니다: {e}", warning=True)
+            return empty
+        if manifest.get("version") != MANIFEST_VERSION:
+            return empty
+        return manifest
+
+    def save_manifest(self, manifest):
+        # json.dump 는 C 인코더를 쓰지 않아 큰 매니페스트에서 훨씬 느립니다
+        with atomic_open(self.manifest_path()) as f:
+            f.write(json.dumps(manifest, ensure_ascii=False, separators=(',', ':')))
+
+    def current_entry(self, jf_path, entry):
+        """
+        매니페스트 항목이 아직 유효하면 돌려주고, 프레임을 다시 처리해야 하면
+        None 을 돌려줍니다. 지난번에 처리에 실패한 프레임(retry)은 항상 다시
+        처리합니다. JSON 은 mtime 이나 크기가 바뀌었을 때만 해시를 비교하고,
+        이미지는 mtime 을 비교합니다. 크롭이나 annotation 파일이 없어졌어도
+        다시 처리합니다.
+        """
+        if entry is None or entry.get("retry"):
+            return None
+        try:
+            json_stat = os.stat(jf_path)
+            if (
+                json_stat.st_mtime_ns != entry["json_mtime_ns"]
+                or json_stat.st_size != entry["json_size"]
+            ):
+                # 저장만 다시 한 경우처럼 내용이 같으면 다시 처리하지 않습니다
+                with open(jf_path, 'rb') as f:
+                    if hashlib.sha1(f.read()).hexdigest() != entry["sha1"]:
+                        return None
+                entry = {
+                    **entry,
+                    "json_mtime_ns": json_stat.st_mtime_ns,
+                    "json_size": json_stat.st_size,
+                }
+            abs_img = os.path.normpath(self.labelPath + entry["image"]["file_name"])
+            if os.stat(abs_img).st_mtime_ns != entry["image_mtime_ns"]:
+                return None
+        except OSError:
+            return None
+        ann_path = annotations_path(self.labelPath, os.path.basename(jf_path))
+        if not os.path.exists(ann_path):
+            return None
+        for crop in entry["crops"]:
+            if not os.path.exists(os.path.join(self.labelPath, crop)):
+                return None
+        return entry
+
+    def process_frames(self, jf_paths):
+        """
+        프레임들을 프로세스 풀에서 처리해 JSON 파일 순서대로 결과를 돌려줍니다.
+        실패한 프레임 자리에는 None 이 들어가고, 취소되면 None 을 돌려줍니다.
+        """
+        total = len(jf_paths)
+        results = [None] * total
+        self.progress.emit(0, total)
+        if not jf_paths:
+            return results
+        # Qt 스레드가 떠 있는 프로세스를 fork 하지 않도록 spawn 을 씁니다
+        context = multiprocessing.get_context("spawn")
+        with futures.ProcessPoolExecutor(
+            max_workers=min(self.max_workers, total), mp_context=context
+        ) as executor:
+            jobs = {
+                executor.submit(export_frame, jf_path, self.labelPath): index
+                for index, jf_path in enumerate(jf_paths)
+            }
+            for done, job in enumerate(futures.as_completed(jobs), start=1):
+                index = jobs[job]
+                try:
+                    results[index] = job.result()
+                    self.log(f"처리 완료: {jf_paths[index]}")
+                except Exception as e:
+                    results[index] = None
+                    self.log(f"처리 실패: {jf_paths[index]}: {e}", error=True)
+                self.progress.emit(done, total)
+                if self._canceled.is_set():
+                    for pending in jobs:
+                        pending.cancel()
+                    return None
+        return results
 
     def create_archive(self):
         """
         images/, annotations/, origins/images 폴더를 묶어
-        archive/ 안에 ZIP 파일로 저장하며,
-        self.log() 로 진행 상황을 출력합니다.
+        archive/ 안에 아카이브(zip, tar, tar.zst)로 저장하며,
+        self.log() 로 결과와 처리 속도를 출력합니다.
+        취소되면 False 를 돌려줍니다.
         """
         archive_dir = os.path.join(self.labelPath, 'archive')
         os.makedirs(archive_dir, exist_ok=True)
         timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
-        zip_name = f"dataset_{timestamp}.zip"
-        zip_path = os.path.join(archive_dir, zip_name)
+        archive_name = f"dataset_{timestamp}.{self.archive_format}"
+        archive_path = os.path.join(archive_dir, archive_name)
 
         # 압축할 파일 목록 수집
         folders = {
@@ -163,32 +601,40 @@ class DatasetExporter:
             'images': os.path.join(self.labelPath, 'images'),
             'annotations': os.path.join(self.labelPath, 'annotations'),
         }
-        entries = []
+        members = []
         for arc_root, real_root in folders.items():
             if not os.path.isdir(real_root):
                 self.log(f"폴더가 없습니다, 스킵: {real_root}", warning=True)
                 continue
             for root, _, files in os.walk(real_root):
                 for fname in files:
-                    entries.append((arc_root, real_root, root, fname))
+                    abs_path = os.path.join(root, fname)
+                    rel_path = os.path.join(
+                        arc_root,
+                        os.path.relpath(abs_path, real_root)
+                    )
+                    members.append((abs_path, rel_path))
 
-        total = len(entries)
+        total = len(members)
         if total == 0:
             self.log("압축할 파일이 없습니다.", warning=True)
-            return
+            return True
 
         self.log(f"아카이브 시작: 총 {total}개 파일을 압축합니다.")
 
-        with zipfile.ZipFile(zip_path, 'w', compression=zipfile.ZIP_DEFLATED) as zf:
-            for idx, (arc_root, real_root, root, fname) in enumerate(entries, start=1):
-                abs_path = os.path.join(root, fname)
-                rel_path = os.path.join(
-                    arc_root,
-                    os.path.relpath(abs_path, real_root)
-                )
-                zf.write(abs_path, rel_path)
-
-                # 진행 상황 로그 (예: [ 10 / 123 ] 압축 중)
-                self.log(f"[{idx:>4} / {total}] 압축 중")
+        # 이미 압축된 이미지는 그대로 저장하고 나머지는 여러 스레드에서 압축합니다
+        try:
+            stats = write_archive(
+                archive_path,
+                members,
+                format=self.archive_format,
+                max_workers=self.max_workers,
+                progress=self.progress.emit,
+                canceled=self._canceled.is_set,
+            )
+        except ArchiveCanceled:
+            self.log("아카이브 생성이 취소되었습니다.", warning=True)
+            return False
 
-        self.log(f"아카이브 생성 완료: {zip_path}")
+        self.log(f"아카이브 생성 완료: {archive_path} ({stats})")
+        return True
@@ -1,6 +1,7 @@
 import argparse
 import codecs
 import contextlib
+import multiprocessing
 import os
 import os.path as osp
 import sys
@@ -58,6 +59,8 @@ def _setup_loguru(logger_level: str) -> None:
 
 
 def main():
+    # the dataset export workers start a fresh interpreter from the executable
+    multiprocessing.freeze_support()
     parser = argparse.ArgumentParser()
     parser.add_argument("--version", "-V", action="store_true", help="show version")
     parser.add_argument("--reset-config", action="store_true", help="reset qt config")
@@ -0,0 +1,145 @@
+import time
+from typing import Callable
+from typing import Hashable
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+import osam
+from loguru import logger
+from PyQt5 import QtCore
+
+from labelme._automation import polygon_from_mask
+
+
+def compute_shape_from_points(
+    model: str,
+    image_embedding: osam.types.ImageEmbedding,
+    points: list[list[float]],
+    point_labels: list[int],
+    shape_type: str,
+) -> tuple[npt.NDArray[np.float32], Optional[npt.NDArray[np.bool_]]]:
+    """Return the shape an AI model infers from prompt points.
+
+    For ``shape_type="polygon"`` this is ``(vertices, None)``; for
+    ``shape_type="mask"`` it is ``(bbox corners, mask cropped to the bbox)``.
+    Points are ``(x, y)`` and are empty when the model finds nothing.
+    """
+    t_start: float = time.time()
+    response: osam.types.GenerateResponse = osam.apis.generate(
+        osam.types.GenerateRequest(
+            model=model,
+            image_embedding=image_embedding,
+            prompt=osam.types.Prompt(points=points, point_labels=point_labels),
+        )
+    )
+    logger.debug(
+        f"Generated shape with model={model!r}, num_points={len(points)}, "
+        f"elapsed_time={time.time() - t_start:.3f} [s]"
+    )
+    if not response.annotations:
+        logger.warning("No annotations returned by AI model")
+        return np.empty((0, 2), dtype=np.float32), None
+
+    annotation: osam.types.Annotation = response.annotations[0]
+    mask: npt.NDArray[np.bool_] = annotation.mask
+    if annotation.bounding_box is None:
+        if shape_type == "mask":
+            logger.warning("No bounding box returned by AI model")
+            return np.empty((0, 2), dtype=np.float32), None
+        return polygon_from_mask.compute_polygon_from_mask(mask=mask), None
+
+    x1, y1, x2, y2 = (
+        annotation.bounding_box.xmin,
+        annotation.bounding_box.ymin,
+        annotation.bounding_box.xmax,
+        annotation.bounding_box.ymax,
+    )
+    if mask.shape != (y2 - y1 + 1, x2 - x1 + 1):
+        mask = mask[y1 : y2 + 1, x1 : x2 + 1]  # older osam returns the full image
+    if shape_type == "mask":
+        return np.array([[x1, y1], [x2, y2]], dtype=np.float32), mask
+    polygon = polygon_from_mask.compute_polygon_from_mask(mask=mask)
+    return polygon + np.array([x1, y1], dtype=np.float32), None
+
+
+class _PreviewRunnable(QtCore.QRunnable):
+    def __init__(
+        self, signal: QtCore.pyqtBoundSignal, key: Hashable, fn: Callable
+    ) -> None:
+        super().__init__()
+        self._signal = signal
+        self._key = key
+        self._fn = fn
+
+    def run(self) -> None:
+        try:
+            result = self._fn()
+        except Exception:
+            logger.exception("Failed to compute AI preview")
+            result = None
+        self._signal.emit(self._key, result)
+
+
+class AiPreviewer(QtCore.QObject):
+    """Runs AI previews off the GUI thread, newest request only.
+
+    ``request(key, fn)`` replaces any request that has not started yet, and
+    requests arriving within ``debounce_msec`` of the first one are coalesced,
+    so a burst of mouse moves costs one inference. At most one inference runs
+    at a time. ``previewReady(key, result)`` is emitted on the GUI thread for
+    the request that was newest when its inference started.
+    """
+
+    previewReady = QtCore.pyqtSignal(object, object)
+    _finished = QtCore.pyqtSignal(object, object)
+
+    def __init__(
+        self, debounce_msec: int = 30, parent: Optional[QtCore.QObject] = None
+    ) -> None:
+        super().__init__(parent)
+        self._pool: QtCore.QThreadPool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)
+        self._timer: QtCore.QTimer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(debounce_msec)
+        self._timer.timeout.connect(self._startPending)
+        self._finished.connect(self._onFinished)
+        self._pending: Optional[tuple[Hashable, Callable]] = None
+        self._running_key: Optional[Hashable] = None
+        self._running: bool = False
+
+    @property
+    def pending(self) -> bool:
+        return self._pending is not None or self._running
+
+    def request(self, key: Hashable, fn: Callable) -> None:
+        self._pending = (key, fn)
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def cancel(self) -> None:
+        """Drop the pending request and ignore the result of a running one."""
+        self._pending = None
+        self._running_key = None
+        self._timer.stop()
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
+
+    def _startPending(self) -> None:
+        if self._running or self._pending is None:
+            return
+        key, fn = self._pending
+        self._pending = None
+        self._running = True
+        self._running_key = key
+        self._pool.start(_PreviewRunnable(self._finished, key, fn))
+
+    def _onFinished(self, key: Hashable, result: object) -> None:
+        self._running = False
+        if key == self._running_key and result is not None:
+            self.previewReady.emit(key, result)
+        self._running_key = None
+        if not self._timer.isActive():
+            self._startPending()
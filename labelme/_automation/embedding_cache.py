@@ -0,0 +1,182 @@
+import collections
+import hashlib
+import os
+import os.path as osp
+import re
+import threading
+from typing import Optional
+
+import imgviz
+import numpy as np
+import numpy.typing as npt
+import osam
+from loguru import logger
+from PyQt5 import QtGui
+
+import labelme.utils
+
+
+def image_from_qimage(image: QtGui.QImage) -> npt.NDArray[np.uint8]:
+    """Return the array an AI model encodes for a QImage.
+
+    The image is first converted to the format QPixmap stores it in, so a
+    frame decoded off the GUI thread and the canvas pixmap of the same frame
+    give the same pixels (and so the same ``image_key``).
+    """
+    if image.hasAlphaChannel():
+        image = image.convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
+    else:
+        image = image.convertToFormat(QtGui.QImage.Format_RGB32)
+    return imgviz.asrgb(labelme.utils.img_qt_to_arr(image))
+
+
+def image_key(image: npt.NDArray[np.uint8]) -> str:
+    """Return a short content hash of the pixels, usable as a file name."""
+    image = np.ascontiguousarray(image)
+    h = hashlib.blake2b(digest_size=16)
+    h.update(f"{image.shape}{image.dtype.str}".encode())
+    h.update(memoryview(image).cast("B"))
+    return h.hexdigest()
+
+
+def _embedding_nbytes(embedding: osam.types.ImageEmbedding) -> int:
+    return embedding.embedding.nbytes + sum(f.nbytes for f in embedding.extra_features)
+
+
+class EmbeddingCache:
+    """LRU of image embeddings bounded by bytes, backed by an on-disk store.
+
+    Embeddings are keyed by model name and ``image_key``. With ``cache_dir``
+    set, each one is also saved as ``<cache_dir>/<model>/<key>.npz``, so an
+    image that was encoded in an earlier session is loaded instead of being
+    encoded again. The store is kept under ``max_disk_bytes`` by deleting the
+    least recently used files (by mtime, which a load refreshes).
+    """
+
+    def __init__(
+        self,
+        max_bytes: int,
+        cache_dir: Optional[str] = None,
+        max_disk_bytes: int = 1024 * 1024 * 1024,
+    ) -> None:
+        self.max_bytes: int = max_bytes
+        self.cache_dir: Optional[str] = cache_dir
+        self.max_disk_bytes: int = max_disk_bytes
+        self.num_bytes: int = 0
+        self._embeddings: collections.OrderedDict[
+            tuple[str, str], osam.types.ImageEmbedding
+        ] = collections.OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def _path(self, model_name: str, key: str) -> Optional[str]:
+        if self.cache_dir is None:
+            return None
+        model_dir = re.sub(r"[^\w.-]", "_", model_name)
+        return osp.join(self.cache_dir, model_dir, f"{key}.npz")
+
+    def __contains__(self, item: tuple[str, str]) -> bool:
+        with self._lock:
+            if item in self._embeddings:
+                return True
+        path = self._path(*item)
+        return path is not None and osp.exists(path)
+
+    def get(self, model_name: str, key: str) -> Optional[osam.types.ImageEmbedding]:
+        with self._lock:
+            embedding = self._embeddings.get((model_name, key))
+            if embedding is not None:
+                self._embeddings.move_to_end((model_name, key))
+                return embedding
+        embedding = self._load(model_name, key)
+        if embedding is not None:
+            self._insert(model_name, key, embedding)
+        return embedding
+
+    def put(
+        self, model_name: str, key: str, embedding: osam.types.ImageEmbedding
+    ) -> None:
+        self._insert(model_name, key, embedding)
+        self._save(model_name, key, embedding)
+
+    def clear(self) -> None:
+        """Drop the in-memory embeddings; the on-disk store is kept."""
+        with self._lock:
+            self._embeddings.clear()
+            self.num_bytes = 0
+
+    def _insert(
+        self, model_name: str, key: str, embedding: osam.types.ImageEmbedding
+    ) -> None:
+        with self._lock:
+            old = self._embeddings.pop((model_name, key), None)
+            if old is not None:
+                self.num_bytes -= _embedding_nbytes(old)
+            self._embeddings[(model_name, key)] = embedding
+            self.num_bytes += _embedding_nbytes(embedding)
+            while self.num_bytes > self.max_bytes and len(self._embeddings) > 1:
+                _, evicted = self._embeddings.popitem(last=False)
+                self.num_bytes -= _embedding_nbytes(evicted)
+
+    def _load(self, model_name: str, key: str) -> Optional[osam.types.ImageEmbedding]:
+        path = self._path(model_name, key)
+        if path is None or not osp.exists(path):
+            return None
+        try:
+            os.utime(path)  # recently used: evicted last
+            with np.load(path) as data:
+                num_extra_features = int(data["num_extra_features"])
+                return osam.types.ImageEmbedding(
+                    original_height=int(data["original_height"]),
+                    original_width=int(data["original_width"]),
+                    embedding=data["embedding"],
+                    extra_features=[
+                        data[f"extra_feature_{i}"] for i in range(num_extra_features)
+                    ],
+                )
+        except Exception as e:
+            logger.warning("Failed to load image embedding {!r}: {}", path, e)
+            return None
+
+    def _save(
+        self, model_name: str, key: str, embedding: osam.types.ImageEmbedding
+    ) -> None:
+        path = self._path(model_name, key)
+        if path is None:
+            return
+        try:
+            os.makedirs(osp.dirname(path), exist_ok=True)
+            tmp_path = f"{path[:-4]}.{os.getpid()}.{threading.get_ident()}.tmp.npz"
+            np.savez(
+                tmp_path,
+                original_height=embedding.original_height,
+                original_width=embedding.original_width,
+                embedding=embedding.embedding,
+                num_extra_features=len(embedding.extra_features),
+                **{
+                    f"extra_feature_{i}": feature
+                    for i, feature in enumerate(embedding.extra_features)
+                },
+            )
+            os.replace(tmp_path, path)
+            self._evictFromDisk()
+        except OSError as e:
+            logger.warning("Failed to save image embedding {!r}: {}", path, e)
+
+    def _evictFromDisk(self) -> None:
+        files = []
+        for model_dir in os.scandir(self.cache_dir):
+            if not model_dir.is_dir():
+                continue
+            for entry in os.scandir(model_dir.path):
+                if entry.name.endswith(".npz") and ".tmp." not in entry.name:
+                    stat = entry.stat()
+                    files.append((stat.st_mtime_ns, stat.st_size, entry.path))
+        num_bytes = sum(size for _, size, _ in files)
+        for _, size, path in sorted(files):
+            if num_bytes <= self.max_disk_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:  # evicted by another session
+                pass
+            num_bytes -= size
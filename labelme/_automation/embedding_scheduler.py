@@ -0,0 +1,155 @@
+import collections
+import threading
+import time
+from typing import Callable
+from typing import Optional
+
+import numpy as np
+import numpy.typing as npt
+import osam
+from loguru import logger
+from PyQt5 import QtCore
+
+from labelme._automation.embedding_cache import EmbeddingCache
+from labelme._automation.embedding_cache import image_key
+
+
+class _EncodeRunnable(QtCore.QRunnable):
+    def __init__(
+        self,
+        scheduler: "EmbeddingScheduler",
+        name: str,
+        load_image: Callable[[], Optional[npt.NDArray[np.uint8]]],
+    ) -> None:
+        super().__init__()
+        self._scheduler = scheduler
+        self._name = name
+        self._load_image = load_image
+
+    def run(self) -> None:
+        self._scheduler._encode(self._name, self._load_image)
+
+
+class EmbeddingScheduler(QtCore.QObject):
+    """Encodes image embeddings into an EmbeddingCache on a QThreadPool.
+
+    ``schedule()`` takes the images in the order they are wanted (the current
+    one first); images that are already cached are skipped, and queued images
+    that are no longer wanted by the latest ``schedule()`` are dropped.
+    ``request()`` queues one more image ahead of them, which later
+    ``schedule()`` calls keep. ``embeddingReady(name, key, seconds)`` is
+    emitted after each encode.
+    """
+
+    embeddingReady = QtCore.pyqtSignal(str, str, float)
+
+    def __init__(
+        self,
+        cache: EmbeddingCache,
+        max_threads: int = 1,
+        parent: Optional[QtCore.QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        self.cache: EmbeddingCache = cache
+        # encode_image is itself multi-threaded, so one image at a time
+        self._pool: QtCore.QThreadPool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._lock: threading.Lock = threading.Lock()
+        self._model: Optional[osam.types.Model] = None
+        self._pending: set[str] = set()
+        self._wanted: set[str] = set()
+        self._requested: set[str] = set()
+        self.encode_times: collections.deque[tuple[str, float]] = collections.deque(
+            maxlen=100
+        )
+
+    @property
+    def queue_depth(self) -> int:
+        with self._lock:
+            return len(self._pending)
+
+    def schedule(
+        self,
+        model: osam.types.Model,
+        images: list[tuple[str, Callable[[], Optional[npt.NDArray[np.uint8]]]]],
+    ) -> None:
+        with self._lock:
+            self._model = model
+            self._wanted = {name for name, _ in images}
+            for name, load_image in images:
+                if name in self._pending:
+                    continue
+                self._pending.add(name)
+                self._pool.start(_EncodeRunnable(self, name, load_image))
+
+    def request(
+        self,
+        model: osam.types.Model,
+        name: str,
+        load_image: Callable[[], Optional[npt.NDArray[np.uint8]]],
+    ) -> None:
+        with self._lock:
+            if name in self._pending:
+                return
+            self._model = model
+            self._requested.add(name)
+            self._pending.add(name)
+            self._pool.start(_EncodeRunnable(self, name, load_image), 1)
+
+    def isPending(self, name: str) -> bool:
+        with self._lock:
+            return name in self._pending
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._wanted = set()
+            self._requested = set()
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
+
+    def stats(self) -> dict:
+        with self._lock:
+            times = [seconds for _, seconds in self.encode_times]
+            return dict(
+                queue_depth=len(self._pending),
+                num_encoded=len(times),
+                last_encode_time=times[-1] if times else None,
+                mean_encode_time=sum(times) / len(times) if times else None,
+            )
+
+    def _encode(
+        self,
+        name: str,
+        load_image: Callable[[], Optional[npt.NDArray[np.uint8]]],
+    ) -> None:
+        try:
+            with self._lock:
+                if name not in self._wanted and name not in self._requested:
+                    return
+                model = self._model
+            image = load_image()
+            if image is None:
+                return
+            key = image_key(image)
+            if (model.name, key) in self.cache:
+                return
+            t_start: float = time.time()
+            embedding = model.encode_image(image=image)
+            elapsed_time: float = time.time() - t_start
+            self.cache.put(model.name, key, embedding)
+            with self._lock:
+                self.encode_times.append((name, elapsed_time))
+            logger.debug(
+                "Encoded {!r} with model {!r} in {:.3f} [s]",
+                name,
+                model.name,
+                elapsed_time,
+            )
+            self.embeddingReady.emit(name, key, elapsed_time)
+        except Exception as e:
+            logger.warning("Failed to encode image embedding {!r}: {}", name, e)
+        finally:
+            with self._lock:
+                self._pending.discard(name)
+                self._requested.discard(name)
@@ -0,0 +1,135 @@
+from __future__ import annotations
+
+from typing import Optional
+
+from PyQt5 import QtCore
+from PyQt5 import QtGui
+
+
+class _ScaleRunnable(QtCore.QRunnable):
+    """Smoothly downscale an image, to one scale or to every pyramid level."""
+
+    def __init__(
+        self,
+        signal: QtCore.pyqtBoundSignal,
+        generation: int,
+        image: QtGui.QImage,
+        scales: list[float],
+    ) -> None:
+        super().__init__()
+        self._signal = signal
+        self._generation = generation
+        self._image = image
+        self._scales = scales
+
+    def run(self) -> None:
+        # each level is scaled from the previous one, which is much cheaper
+        # than going back to the full resolution image every time
+        image = self._image
+        for scale in self._scales:
+            size = QtCore.QSize(
+                max(1, round(self._image.width() * scale)),
+                max(1, round(self._image.height() * scale)),
+            )
+            image = image.scaled(
+                size, QtCore.Qt.IgnoreAspectRatio, QtCore.Qt.SmoothTransformation
+            )
+            self._signal.emit(self._generation, scale, image)
+
+
+class ScaledPixmapCache(QtCore.QObject):
+    """Downscaled copies of a pixmap, built in the background.
+
+    ``request(scale)`` builds a mip-map pyramid (1/2, 1/4, ... of the pixmap)
+    the first time, and the pixmap at exactly ``scale``. ``pixmap(scale)``
+    returns the best copy available right away, with the scale it was made
+    for, falling back to the full resolution pixmap. ``scaledPixmapReady`` is
+    emitted when a new copy is available. Only the pyramid levels and the
+    latest exact scale are kept; exact copies for scales the zoom has moved
+    away from are dropped.
+    """
+
+    scaledPixmapReady = QtCore.pyqtSignal()
+    _scaled = QtCore.pyqtSignal(int, float, QtGui.QImage)
+
+    def __init__(
+        self, min_size: int = 256, parent: Optional[QtCore.QObject] = None
+    ) -> None:
+        super().__init__(parent)
+        self.min_size: int = min_size
+        self._pool: QtCore.QThreadPool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(2)
+        self._scaled.connect(self._onScaled)
+        self._source: Optional[QtGui.QPixmap] = None
+        self._source_image: Optional[QtGui.QImage] = None  # for the workers
+        self._generation: int = 0
+        self._levels: dict[float, QtGui.QPixmap] = {}
+        self._level_scales: set[float] = set()  # of the pyramid being built
+        self._pyramid_requested: bool = False
+        self._exact: Optional[tuple[float, QtGui.QPixmap]] = None
+        self._exact_pending: Optional[float] = None
+
+    def setPixmap(self, pixmap: Optional[QtGui.QPixmap]) -> None:
+        self._source = pixmap
+        self._source_image = None
+        self._generation += 1  # results for the previous pixmap are dropped
+        self._levels = {}
+        self._level_scales = set()
+        self._pyramid_requested = False
+        self._exact = None
+        self._exact_pending = None
+
+    def pixmap(self, scale: float) -> tuple[QtGui.QPixmap, float]:
+        if self._exact is not None and self._exact[0] == scale:
+            return self._exact[1], scale
+        level_scales = [s for s in self._levels if s >= scale]
+        if level_scales:
+            level_scale = min(level_scales)
+            return self._levels[level_scale], level_scale
+        return self._source, 1.0
+
+    def request(self, scale: float) -> None:
+        if self._source is None or self._source.isNull() or scale >= 1:
+            return
+        if self._source_image is None:
+            self._source_image = self._source.toImage()
+        if not self._pyramid_requested:
+            self._pyramid_requested = True
+            scales = []
+            level_scale = 0.5
+            while (
+                min(self._source.width(), self._source.height()) * level_scale
+                >= self.min_size
+            ):
+                scales.append(level_scale)
+                level_scale /= 2
+            self._level_scales = set(scales)
+            if scales:
+                self._pool.start(
+                    _ScaleRunnable(
+                        self._scaled, self._generation, self._source_image, scales
+                    )
+                )
+        if scale == self._exact_pending or (
+            self._exact is not None and self._exact[0] == scale
+        ):
+            return
+        self._exact_pending = scale
+        self._pool.start(
+            _ScaleRunnable(self._scaled, self._generation, self._source_image, [scale])
+        )
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
+
+    def _onScaled(self, generation: int, scale: float, image: QtGui.QImage) -> None:
+        if generation != self._generation:
+            return
+        if scale == self._exact_pending:
+            self._exact = (scale, QtGui.QPixmap.fromImage(image))
+            self._exact_pending = None
+        elif scale in self._level_scales:
+            self._levels[scale] = QtGui.QPixmap.fromImage(image)
+        else:
+            return  # an exact scale the zoom has since moved away from
+        self.scaledPixmapReady.emit()
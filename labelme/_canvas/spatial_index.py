@@ -0,0 +1,82 @@
+import collections
+import math
+from typing import Hashable
+
+
+class GridIndex:
+    """Uniform grid over the bounding boxes of items, for point queries.
+
+    Each item is registered in every cell its ``(x1, y1, x2, y2)`` box
+    overlaps, so a query only looks at the items of the few cells around the
+    query point. Items are inserted, updated and removed one by one.
+    """
+
+    def __init__(self, cell_size: float = 128.0) -> None:
+        self.cell_size: float = cell_size
+        self._bboxes: dict[Hashable, tuple[float, float, float, float]] = {}
+        self._cells: collections.defaultdict[
+            tuple[int, int], set[Hashable]
+        ] = collections.defaultdict(set)
+
+    def __len__(self) -> int:
+        return len(self._bboxes)
+
+    def __contains__(self, item: Hashable) -> bool:
+        return item in self._bboxes
+
+    def _cellRange(
+        self, bbox: tuple[float, float, float, float]
+    ) -> tuple[range, range]:
+        x1, y1, x2, y2 = bbox
+        return (
+            range(math.floor(x1 / self.cell_size), math.floor(x2 / self.cell_size) + 1),
+            range(math.floor(y1 / self.cell_size), math.floor(y2 / self.cell_size) + 1),
+        )
+
+    def bbox(self, item: Hashable) -> tuple[float, float, float, float]:
+        return self._bboxes[item]
+
+    def insert(self, item: Hashable, bbox: tuple[float, float, float, float]) -> None:
+        """Add item, or move it if it is already indexed."""
+        old_bbox = self._bboxes.get(item)
+        if old_bbox == bbox:
+            return
+        if old_bbox is not None:
+            self.remove(item)
+        self._bboxes[item] = bbox
+        xs, ys = self._cellRange(bbox)
+        for i in xs:
+            for j in ys:
+                self._cells[i, j].add(item)
+
+    def remove(self, item: Hashable) -> None:
+        bbox = self._bboxes.pop(item, None)
+        if bbox is None:
+            return
+        xs, ys = self._cellRange(bbox)
+        for i in xs:
+            for j in ys:
+                cell = self._cells[i, j]
+                cell.discard(item)
+                if not cell:
+                    del self._cells[i, j]
+
+    def clear(self) -> None:
+        self._bboxes.clear()
+        self._cells.clear()
+
+    def query(self, x: float, y: float, radius: float = 0.0) -> set[Hashable]:
+        """Return the items whose box, grown by radius, contains (x, y)."""
+        xs, ys = self._cellRange((x - radius, y - radius, x + radius, y + radius))
+        items: set[Hashable] = set()
+        for i in xs:
+            for j in ys:
+                cell = self._cells.get((i, j))
+                if cell:
+                    items.update(cell)
+        return {
+            item
+            for item in items
+            if self._bboxes[item][0] - radius <= x <= self._bboxes[item][2] + radius
+            and self._bboxes[item][1] - radius <= y <= self._bboxes[item][3] + radius
+        }
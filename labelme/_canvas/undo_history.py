@@ -0,0 +1,207 @@
+from __future__ import annotations
+
+import collections
+from typing import Optional
+
+import numpy as np
+
+from labelme.shape import Shape
+
+# rough size of a QPointF and of a list slot pointing at it
+_POINT_NBYTES = 64 + 8
+
+
+class _ShapeState:
+    """What a shape looked like when it was recorded.
+
+    Points and masks are shared with the shape, not copied: the canvas always
+    replaces them instead of editing them in place.
+    """
+
+    __slots__ = [
+        "label",
+        "points",
+        "coords",
+        "point_labels",
+        "shape_type",
+        "closed",
+        "flags",
+        "group_id",
+        "description",
+        "mask",
+        "other_data",
+    ]
+
+    def __init__(self, shape: Shape) -> None:
+        self.label = shape.label
+        self.points = tuple(shape.points)
+        self.coords = shape.coords().copy()
+        self.point_labels = tuple(shape.point_labels)
+        self.shape_type = shape.shape_type
+        self.closed = shape.isClosed()
+        self.flags = None if shape.flags is None else dict(shape.flags)
+        self.group_id = shape.group_id
+        self.description = shape.description
+        self.mask = shape.mask
+        self.other_data = dict(shape.other_data)
+
+    def matches(self, shape: Shape) -> bool:
+        return (
+            self.label == shape.label
+            and self.shape_type == shape.shape_type
+            and self.closed == shape.isClosed()
+            and self.group_id == shape.group_id
+            and self.description == shape.description
+            and self.mask is shape.mask
+            and self.flags == shape.flags
+            and self.other_data == shape.other_data
+            and np.array_equal(self.coords, shape.coords())
+            and self.point_labels == tuple(shape.point_labels)
+        )
+
+    def apply(self, shape: Shape) -> None:
+        shape.label = self.label
+        shape.points = list(self.points)
+        shape.point_labels = list(self.point_labels)
+        shape.shape_type = self.shape_type
+        if self.closed:
+            shape.close()
+        else:
+            shape.setOpen()
+        shape.flags = None if self.flags is None else dict(self.flags)
+        shape.group_id = self.group_id
+        shape.description = self.description
+        shape.mask = self.mask
+        shape.other_data = dict(self.other_data)
+
+    def nbytes(self, newer: Optional[_ShapeState]) -> int:
+        """Memory this state keeps alive on top of the newer state."""
+        nbytes = self.coords.nbytes + _POINT_NBYTES * len(self.points)
+        if self.mask is not None and (newer is None or newer.mask is not self.mask):
+            nbytes += self.mask.nbytes
+        return nbytes
+
+
+class _Edit:
+    __slots__ = ["states", "order", "nbytes"]
+
+    def __init__(
+        self,
+        states: dict[Shape, Optional[_ShapeState]],
+        order: Optional[tuple[Shape, ...]],
+        nbytes: int,
+    ) -> None:
+        self.states = states  # shape -> state before the edit, None if added
+        self.order = order  # shapes before the edit, None if unchanged
+        self.nbytes = nbytes
+
+
+class ShapeHistory:
+    """Undo stack that records only the shapes each edit changed.
+
+    Every :meth:`store` compares the shapes against the last recorded state
+    and pushes the previous state of the shapes that differ, so undoing an
+    edit only touches those shapes. The oldest edits are dropped once the
+    stack holds more than ``max_bytes`` (or ``max_edits`` edits).
+    """
+
+    def __init__(self, max_bytes: int, max_edits: Optional[int] = None) -> None:
+        self.max_bytes: int = max_bytes
+        self.max_edits: Optional[int] = max_edits
+        self.nbytes: int = 0
+        self._edits: collections.deque[_Edit] = collections.deque()
+        self._states: Optional[dict[Shape, _ShapeState]] = None
+        self._order: tuple[Shape, ...] = ()
+
+    def __len__(self) -> int:
+        return len(self._edits)
+
+    def reset(self) -> None:
+        """Forget all edits; the next :meth:`store` records the baseline."""
+        self._edits.clear()
+        self._states = None
+        self._order = ()
+        self.nbytes = 0
+
+    def store(self, shapes: list[Shape]) -> bool:
+        """Record the edit that led to shapes; return whether anything changed."""
+        if self._states is None:
+            self._states = {shape: _ShapeState(shape) for shape in shapes}
+            self._order = tuple(shapes)
+            return False
+
+        states: dict[Shape, Optional[_ShapeState]] = {}
+        nbytes = 0
+        for shape in shapes:
+            state = self._states.get(shape)
+            if state is not None and state.matches(shape):
+                continue
+            new_state = _ShapeState(shape)
+            self._states[shape] = new_state
+            states[shape] = state
+            if state is not None:
+                nbytes += state.nbytes(newer=new_state)
+
+        order = tuple(shapes)
+        if order == self._order:
+            order = None
+        else:
+            for shape in set(self._order) - set(order):
+                state = self._states.pop(shape)
+                states[shape] = state
+                nbytes += state.nbytes(newer=None)
+            order, self._order = self._order, order
+            nbytes += 8 * len(order)
+
+        if not states and order is None:
+            return False
+        self._edits.append(_Edit(states=states, order=order, nbytes=nbytes))
+        self.nbytes += nbytes
+        self._trim()
+        return True
+
+    def isModified(self, shape: Shape) -> bool:
+        """Return whether shape differs from its last recorded state."""
+        if self._states is None:
+            return False
+        state = self._states.get(shape)
+        return state is None or not state.matches(shape)
+
+    def undo(self) -> tuple[list[Shape], list[Shape]]:
+        """Revert the shapes to before the last edit.
+
+        Returns the shapes as they were, and the shapes the edit touched.
+        """
+        edit = self._popEdit()
+        for shape, state in edit.states.items():
+            if state is not None:
+                state.apply(shape)
+        return list(self._order), list(edit.states)
+
+    def discard(self) -> None:
+        """Drop the last edit from the stack, leaving the shapes as they are."""
+        if not self._edits:
+            # the last store was the baseline
+            self.reset()
+            return
+        self._popEdit()
+
+    def _popEdit(self) -> _Edit:
+        edit = self._edits.pop()
+        self.nbytes -= edit.nbytes
+        for shape, state in edit.states.items():
+            if state is None:
+                del self._states[shape]
+            else:
+                self._states[shape] = state
+        if edit.order is not None:
+            self._order = edit.order
+        return edit
+
+    def _trim(self) -> None:
+        # the newest edit is always kept, however large it is
+        while len(self._edits) > 1 and (
+            self.nbytes > self.max_bytes
+            or (self.max_edits is not None and len(self._edits) > self.max_edits)
+        ):
+            self.nbytes -= self._edits.popleft().nbytes
@@ -0,0 +1,176 @@
+import collections
+import threading
+from typing import Callable
+from typing import Optional
+
+from loguru import logger
+from PyQt5 import QtCore
+from PyQt5 import QtGui
+
+from labelme.label_file import LabelFile
+
+
+def load_frame(filename: str) -> tuple[Optional[bytes], QtGui.QImage]:
+    image_data: Optional[bytes] = LabelFile.load_image_file(filename)
+    if image_data is None:
+        return None, QtGui.QImage()
+    return image_data, QtGui.QImage.fromData(image_data)
+
+
+class FrameCache:
+    """LRU of decoded frames bounded by the bytes they hold.
+
+    Values are ``(image_data, QImage)`` pairs keyed by image filename, where
+    ``image_data`` is None for frames decoded from a video without encoding.
+    QImage (unlike QPixmap) may be created off the GUI thread, so prefetch
+    workers insert into the cache directly.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes: int = max_bytes
+        self.num_bytes: int = 0
+        self.hits: int = 0
+        self.misses: int = 0
+        self._frames: collections.OrderedDict[
+            str, tuple[Optional[bytes], QtGui.QImage]
+        ] = collections.OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    @staticmethod
+    def _sizeof(frame: tuple[Optional[bytes], QtGui.QImage]) -> int:
+        image_data, image = frame
+        return len(image_data or b"") + image.sizeInBytes()
+
+    def __contains__(self, filename: str) -> bool:
+        with self._lock:
+            return filename in self._frames
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._frames)
+
+    def get(self, filename: str) -> Optional[tuple[Optional[bytes], QtGui.QImage]]:
+        with self._lock:
+            frame = self._frames.get(filename)
+            if frame is None:
+                self.misses += 1
+                return None
+            self._frames.move_to_end(filename)
+            self.hits += 1
+            return frame
+
+    def put(
+        self, filename: str, image_data: Optional[bytes], image: QtGui.QImage
+    ) -> None:
+        frame = (image_data, image)
+        size = self._sizeof(frame)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            if filename in self._frames:
+                self.num_bytes -= self._sizeof(self._frames.pop(filename))
+            self._frames[filename] = frame
+            self.num_bytes += size
+            while self.num_bytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self.num_bytes -= self._sizeof(evicted)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._frames.clear()
+            self.num_bytes = 0
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
+
+    def stats(self) -> dict:
+        return dict(
+            frames=len(self),
+            num_bytes=self.num_bytes,
+            hits=self.hits,
+            misses=self.misses,
+            hit_rate=self.hit_rate,
+        )
+
+
+class _PrefetchRunnable(QtCore.QRunnable):
+    def __init__(self, prefetcher: "FramePrefetcher", filename: str) -> None:
+        super().__init__()
+        self._prefetcher = prefetcher
+        self._filename = filename
+
+    def run(self) -> None:
+        self._prefetcher._prefetch(self._filename)
+
+
+class FramePrefetcher:
+    """Decodes upcoming frames into a FrameCache on a QThreadPool.
+
+    Frames are decoded with ``loader`` (``load_frame`` by default), which may
+    be swapped for another frame source such as a video. Frames for which
+    ``skip(filename)`` is true are not prefetched; it is called on the worker
+    threads, so it may read the file.
+    """
+
+    def __init__(
+        self,
+        cache: FrameCache,
+        max_threads: int = 2,
+        loader: Callable[[str], tuple[Optional[bytes], QtGui.QImage]] = load_frame,
+        skip: Optional[Callable[[str], bool]] = None,
+    ) -> None:
+        self.cache: FrameCache = cache
+        self.loader: Callable[[str], tuple[Optional[bytes], QtGui.QImage]] = loader
+        self.skip: Optional[Callable[[str], bool]] = skip
+        self._pool: QtCore.QThreadPool = QtCore.QThreadPool()
+        self._pool.setMaxThreadCount(max_threads)
+        self._lock: threading.Lock = threading.Lock()
+        self._pending: set[str] = set()
+        self._wanted: set[str] = set()
+
+    def load(self, filename: str) -> tuple[Optional[bytes], QtGui.QImage]:
+        """Return the frame from the cache, decoding it here on a miss."""
+        frame = self.cache.get(filename)
+        if frame is not None:
+            return frame
+        image_data, image = self.loader(filename)
+        if not image.isNull():
+            self.cache.put(filename, image_data, image)
+        return image_data, image
+
+    def prefetch(self, filenames: list[str]) -> None:
+        """Schedule ``filenames`` in order, dropping stale queued requests."""
+        with self._lock:
+            self._wanted = set(filenames)
+            for filename in filenames:
+                if filename in self._pending or filename in self.cache:
+                    continue
+                self._pending.add(filename)
+                self._pool.start(_PrefetchRunnable(self, filename))
+
+    def _prefetch(self, filename: str) -> None:
+        try:
+            with self._lock:
+                if filename not in self._wanted:
+                    return
+            if filename in self.cache:
+                return
+            if self.skip is not None and self.skip(filename):
+                return
+            image_data, image = self.loader(filename)
+            if not image.isNull():
+                self.cache.put(filename, image_data, image)
+        except Exception as e:
+            logger.warning("Failed to prefetch {!r}: {}", filename, e)
+        finally:
+            with self._lock:
+                self._pending.discard(filename)
+
+    def cancel(self) -> None:
+        with self._lock:
+            self._wanted = set()
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
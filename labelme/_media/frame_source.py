@@ -0,0 +1,157 @@
+import collections
+import os
+import os.path as osp
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+from PyQt5 import QtGui
+
+from labelme._media.frame_cache import load_frame
+from labelme._media.video_extractor import encode_frame
+from labelme._media.video_extractor import frame_filename
+from labelme._media.video_extractor import frame_indices
+from labelme._media.video_extractor import write_frame_file
+
+# Seeking restarts decoding at the previous keyframe, so short forward jumps
+# are cheaper to reach by grabbing (demuxing without decoding) frame by frame.
+MAX_GRAB_AHEAD = 16
+
+
+class VideoFrameSource:
+    """Frames of a video, addressed by the filenames they would be extracted to.
+
+    ``filenames()`` is a virtual frame list: ``<output_dir>/<index>.jpg`` for
+    every selected frame index, whether or not the file exists. ``load()``
+    decodes a frame by seeking the video, keeping the most recently decoded
+    frames in a ring buffer, and converts it to a QImage without encoding it.
+    ``materialize()`` encodes and writes a frame out only when it is needed on
+    disk (e.g. once it is annotated).
+    """
+
+    def __init__(
+        self,
+        video_file: str,
+        output_dir: str,
+        frame_stride: int = 1,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        ring_size: int = 16,
+        jpeg_quality: int = 95,
+    ) -> None:
+        if frame_stride < 1:
+            raise ValueError(f"frame_stride must be >= 1: {frame_stride}")
+        self._capture: cv2.VideoCapture = cv2.VideoCapture(video_file)
+        if not self._capture.isOpened():
+            raise IOError(f"Failed to open video: {video_file}")
+        self.video_file: str = video_file
+        self.output_dir: str = output_dir
+        self.jpeg_quality: int = jpeg_quality
+        self.num_frames: int = int(self._capture.get(cv2.CAP_PROP_FRAME_COUNT))
+        self.fps: float = self._capture.get(cv2.CAP_PROP_FPS) or 0
+        self.frame_indices: range = frame_indices(
+            self.num_frames,
+            self.fps,
+            frame_stride=frame_stride,
+            start_time=start_time,
+            end_time=end_time,
+        )
+
+        self.ring_size: int = ring_size
+        self._ring: collections.OrderedDict[int, np.ndarray] = collections.OrderedDict()
+        self._position: int = 0  # index of the frame the next read() returns
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.frame_indices)
+
+    def filenames(self) -> list[str]:
+        return [
+            osp.join(self.output_dir, frame_filename(index))
+            for index in self.frame_indices
+        ]
+
+    def frameIndex(self, filename: str) -> int:
+        """Return the frame index ``filename`` stands for, or -1."""
+        if osp.dirname(filename) != self.output_dir:
+            return -1
+        stem, ext = osp.splitext(osp.basename(filename))
+        if ext != ".jpg" or not stem.isdigit():
+            return -1
+        index = int(stem)
+        return index if 0 <= index < self.num_frames else -1
+
+    def hasFilename(self, filename: str) -> bool:
+        return self.frameIndex(filename) != -1
+
+    def read(self, index: int) -> Optional[np.ndarray]:
+        with self._lock:
+            frame = self._ring.get(index)
+            if frame is not None:
+                self._ring.move_to_end(index)
+                return frame
+
+            if not 0 <= index - self._position <= MAX_GRAB_AHEAD:
+                self._capture.set(cv2.CAP_PROP_POS_FRAMES, index)
+                self._position = index
+            while self._position < index:
+                if not self._capture.grab():
+                    return None
+                self._position += 1
+            ok, frame = self._capture.read()
+            if not ok:
+                return None
+            self._position += 1
+
+            self._ring[index] = frame
+            while len(self._ring) > self.ring_size:
+                self._ring.popitem(last=False)
+            return frame
+
+    def load(self, filename: str) -> tuple[Optional[bytes], QtGui.QImage]:
+        """Load a frame like frame_cache.load_frame, decoding it if needed.
+
+        A frame decoded from the video is returned without image data; it is
+        only encoded by ``imageData()`` or ``materialize()``.
+        """
+        index = self.frameIndex(filename)
+        if index == -1 or osp.exists(filename):
+            return load_frame(filename)
+        frame = self.read(index)
+        if frame is None:
+            return None, QtGui.QImage()
+        rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        height, width = rgb.shape[:2]
+        image = QtGui.QImage(
+            rgb.data, width, height, rgb.strides[0], QtGui.QImage.Format_RGB888
+        )
+        return None, image.copy()  # detach from the numpy buffer
+
+    def imageData(self, filename: str) -> Optional[bytes]:
+        """Return the frame encoded as it is written by ``materialize()``."""
+        index = self.frameIndex(filename)
+        if index == -1 or osp.exists(filename):
+            image_data, _ = load_frame(filename)
+            return image_data
+        frame = self.read(index)
+        if frame is None:
+            return None
+        return encode_frame(frame, self.jpeg_quality)
+
+    def materialize(self, filename: str, image_data: Optional[bytes] = None) -> bool:
+        """Write the frame to ``filename`` unless it exists; return if written."""
+        if osp.exists(filename):
+            return False
+        if image_data is None:
+            image_data = self.imageData(filename)
+            if image_data is None:
+                raise IOError(f"Failed to decode frame: {filename}")
+        os.makedirs(osp.dirname(filename), exist_ok=True)
+        write_frame_file(filename, image_data)
+        return True
+
+    def close(self) -> None:
+        with self._lock:
+            self._capture.release()
+            self._ring.clear()
@@ -0,0 +1,458 @@
+from __future__ import annotations
+
+import collections
+import math
+import threading
+from typing import Optional
+
+import cv2
+import numpy as np
+import PIL.Image
+from loguru import logger
+from PyQt5 import QtCore
+from PyQt5 import QtGui
+
+from labelme import utils
+
+try:
+    import tifffile
+except ImportError:
+    tifffile = None
+
+# EXIF orientations that rotate the image by 90 degrees
+_TRANSPOSED_ORIENTATIONS = {5, 6, 7, 8}
+
+
+def read_image_size(filename: str) -> tuple[int, int]:
+    """Return ``(width, height)`` of an image as displayed, from its header.
+
+    Only the header is parsed; the pixels are not decoded.
+    """
+    with PIL.Image.open(filename) as image:
+        width, height = image.size
+        if utils.get_exif_orientation(image) in _TRANSPOSED_ORIENTATIONS:
+            width, height = height, width
+    return width, height
+
+
+def _to_rgb8(array: np.ndarray) -> np.ndarray:
+    """Convert a decoded array to contiguous uint8 RGB (or RGBA)."""
+    if array.dtype != np.uint8:
+        if np.issubdtype(array.dtype, np.floating):
+            array = np.clip(array, 0, 1) * 255
+        else:
+            array = array >> (8 * (array.dtype.itemsize - 1))
+        array = array.astype(np.uint8)
+    if array.ndim == 2:
+        array = array[:, :, None]
+    channels = array.shape[2]
+    if channels == 1:
+        array = np.repeat(array, 3, axis=2)
+    elif channels == 2:  # gray + alpha
+        array = np.concatenate(
+            [np.repeat(array[:, :, :1], 3, axis=2), array[:, :, 1:]], 2
+        )
+    elif channels > 4:
+        array = array[:, :, :3]
+    return np.ascontiguousarray(array)
+
+
+def _to_qimage(array: np.ndarray) -> QtGui.QImage:
+    height, width, channels = array.shape
+    image_format = (
+        QtGui.QImage.Format_RGBA8888 if channels == 4 else QtGui.QImage.Format_RGB888
+    )
+    return QtGui.QImage(
+        array.data, width, height, array.strides[0], image_format
+    ).copy()
+
+
+def _downsample(array: np.ndarray, width: int, height: int) -> np.ndarray:
+    if array.shape[1] == width and array.shape[0] == height:
+        return array
+    return cv2.resize(array, (width, height), interpolation=cv2.INTER_AREA)
+
+
+class _TileCache:
+    """LRU of decoded arrays bounded by the bytes they hold."""
+
+    def __init__(self, max_bytes: int) -> None:
+        self.max_bytes: int = max_bytes
+        self.num_bytes: int = 0
+        self._arrays: collections.OrderedDict[
+            tuple, np.ndarray
+        ] = collections.OrderedDict()
+        self._lock: threading.Lock = threading.Lock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._arrays)
+
+    def get(self, key: tuple) -> Optional[np.ndarray]:
+        with self._lock:
+            array = self._arrays.get(key)
+            if array is not None:
+                self._arrays.move_to_end(key)
+            return array
+
+    def put(self, key: tuple, array: np.ndarray) -> None:
+        if array.nbytes > self.max_bytes:
+            return
+        with self._lock:
+            if key in self._arrays:
+                self.num_bytes -= self._arrays.pop(key).nbytes
+            self._arrays[key] = array
+            self.num_bytes += array.nbytes
+            while self.num_bytes > self.max_bytes:
+                _, evicted = self._arrays.popitem(last=False)
+                self.num_bytes -= evicted.nbytes
+
+    def clear(self) -> None:
+        with self._lock:
+            self._arrays.clear()
+            self.num_bytes = 0
+
+
+class _TiffLevel:
+    """One resolution of a TIFF, read segment by segment with tifffile."""
+
+    def __init__(self, page) -> None:
+        self.page = page
+        self.height: int = page.imagelength
+        self.width: int = page.imagewidth
+        if page.is_tiled:
+            self.segment_width: int = page.tilewidth
+            self.segment_height: int = page.tilelength
+        else:  # strips span the whole width
+            self.segment_width = self.width
+            self.segment_height = min(page.rowsperstrip or self.height, self.height)
+        self.segments_across: int = math.ceil(self.width / self.segment_width)
+
+    def segments(self, left: int, top: int, right: int, bottom: int) -> list[int]:
+        cols = range(left // self.segment_width, (right - 1) // self.segment_width + 1)
+        rows = range(
+            top // self.segment_height, (bottom - 1) // self.segment_height + 1
+        )
+        return [row * self.segments_across + col for row in rows for col in cols]
+
+
+class TiledImage:
+    """Random access to a large image, one tile at a time.
+
+    The image is split into a pyramid of levels, level ``n`` being the image
+    downscaled by ``2 ** n``, and every level into ``tile_size`` square tiles.
+    ``tile(level, col, row)`` decodes a tile on first use and keeps it in an
+    LRU bounded by ``max_cache_bytes``, so memory does not grow with the size
+    of the image.
+
+    TIFFs (tiled or striped, e.g. orthomosaics and slide scans) are read with
+    tifffile, decoding only the segments a tile covers and using the overviews
+    the file carries. Other formats cannot be read partially; a whole level is
+    decoded when one of its tiles is first needed (JPEGs are decoded at the
+    reduced size directly) and kept in a second LRU bounded by
+    ``max_level_bytes``. The level in use is kept even if it alone exceeds the
+    bound: dropping it would mean decoding the whole image again for every
+    tile.
+    """
+
+    def __init__(
+        self,
+        filename: str,
+        tile_size: int = 512,
+        max_cache_bytes: int = 256 * 1024 * 1024,
+        max_level_bytes: int = 1024 * 1024 * 1024,
+    ) -> None:
+        self.filename: str = filename
+        self.tile_size: int = tile_size
+        self._cache: _TileCache = _TileCache(max_cache_bytes)
+        self._tiff = None
+        self._tiff_levels: list[_TiffLevel] = []
+        self._tiff_lock: threading.Lock = threading.Lock()
+        self._level_lock: threading.Lock = threading.Lock()
+        self._levels: collections.OrderedDict[
+            int, np.ndarray
+        ] = collections.OrderedDict()
+        self.max_level_bytes: int = max_level_bytes
+        self._open_tiff()
+        if self._tiff_levels:
+            self.width: int = self._tiff_levels[0].width
+            self.height: int = self._tiff_levels[0].height
+        else:
+            self.width, self.height = read_image_size(filename)
+        self.level_count: int = 1
+        while max(self.levelSize(self.level_count - 1)) > tile_size:
+            self.level_count += 1
+
+    def _open_tiff(self) -> None:
+        if tifffile is None:
+            return
+        try:
+            tiff = tifffile.TiffFile(self.filename)
+        except Exception:
+            return  # not a TIFF
+        try:
+            series = tiff.series[0]
+            pages = [level.pages[0] for level in series.levels]
+            if any(
+                page.planarconfig == tifffile.PLANARCONFIG.SEPARATE
+                or page.samplesperpixel > 4
+                for page in pages
+            ):
+                raise ValueError("unsupported sample layout")
+            self._tiff_levels = [_TiffLevel(page) for page in pages]
+        except Exception as e:
+            logger.debug("Reading {} without tifffile: {}", self.filename, e)
+            tiff.close()
+            return
+        self._tiff = tiff
+
+    def close(self) -> None:
+        self._cache.clear()
+        with self._level_lock:
+            self._levels.clear()
+        if self._tiff is not None:
+            self._tiff.close()
+            self._tiff = None
+
+    @property
+    def size(self) -> QtCore.QSize:
+        return QtCore.QSize(self.width, self.height)
+
+    @property
+    def cache_bytes(self) -> int:
+        return self._cache.num_bytes
+
+    @property
+    def level_bytes(self) -> int:
+        """Bytes held by whole decoded levels (formats other than TIFF)."""
+        with self._level_lock:
+            return sum(array.nbytes for array in self._levels.values())
+
+    def levelSize(self, level: int) -> tuple[int, int]:
+        return (
+            max(1, math.ceil(self.width / 2**level)),
+            max(1, math.ceil(self.height / 2**level)),
+        )
+
+    def tileRect(self, level: int, col: int, row: int) -> tuple[int, int, int, int]:
+        """Return ``(left, top, right, bottom)`` of a tile in level pixels."""
+        width, height = self.levelSize(level)
+        left = col * self.tile_size
+        top = row * self.tile_size
+        return (
+            left,
+            top,
+            min(left + self.tile_size, width),
+            min(top + self.tile_size, height),
+        )
+
+    def tileGrid(self, level: int) -> tuple[int, int]:
+        """Return the number of tile columns and rows of a level."""
+        width, height = self.levelSize(level)
+        return math.ceil(width / self.tile_size), math.ceil(height / self.tile_size)
+
+    def cached(self, level: int, col: int, row: int) -> Optional[QtGui.QImage]:
+        """Return a tile if it is already decoded, without decoding it."""
+        array = self._cache.get(("tile", level, col, row))
+        if array is None:
+            return None
+        return _to_qimage(array)
+
+    def tile(self, level: int, col: int, row: int) -> QtGui.QImage:
+        """Return a tile, decoding it if it is not cached."""
+        return _to_qimage(self._tileArray(level, col, row))
+
+    def _tileArray(self, level: int, col: int, row: int) -> np.ndarray:
+        key = ("tile", level, col, row)
+        array = self._cache.get(key)
+        if array is None:
+            if self._tiff is not None:
+                array = self._decodeTiffTile(level, col, row)
+            else:
+                left, top, right, bottom = self.tileRect(level, col, row)
+                array = np.ascontiguousarray(
+                    self._levelArray(level)[top:bottom, left:right]
+                )
+            self._cache.put(key, array)
+        return array
+
+    def _decodeTiffTile(self, level: int, col: int, row: int) -> np.ndarray:
+        left, top, right, bottom = self.tileRect(level, col, row)
+        # the finest level of the file at or below the requested resolution
+        source = self._tiff_levels[0]
+        for tiff_level in self._tiff_levels:
+            if tiff_level.width * 2**level >= self.width * (1 - 1e-6):
+                source = tiff_level
+        downscale = self.width / source.width / 2**level  # < 1
+        if level > 0 and downscale < 0.5:
+            # compose from the finer level (cached and reused) rather than
+            # decoding a region of the file many times larger than the tile
+            return self._composeTile(level, col, row)
+        factor = source.width / (self.width / 2**level)
+        region = self._readTiffRegion(
+            source,
+            int(left * factor),
+            int(top * factor),
+            min(source.width, math.ceil(right * factor)),
+            min(source.height, math.ceil(bottom * factor)),
+        )
+        return _downsample(region, right - left, bottom - top)
+
+    def _composeTile(self, level: int, col: int, row: int) -> np.ndarray:
+        left, top, right, bottom = self.tileRect(level, col, row)
+        cols, rows = self.tileGrid(level - 1)
+        children = []
+        for child_row in (2 * row, 2 * row + 1):
+            if child_row >= rows:
+                continue
+            children.append(
+                np.concatenate(
+                    [
+                        self._tileArray(level - 1, child_col, child_row)
+                        for child_col in (2 * col, 2 * col + 1)
+                        if child_col < cols
+                    ],
+                    axis=1,
+                )
+            )
+        return _downsample(np.concatenate(children, axis=0), right - left, bottom - top)
+
+    def _readTiffRegion(
+        self, source: _TiffLevel, left: int, top: int, right: int, bottom: int
+    ) -> np.ndarray:
+        page = source.page
+        region = None
+        for index in source.segments(left, top, right, bottom):
+            offset = page.dataoffsets[index]
+            bytecount = page.databytecounts[index]
+            with self._tiff_lock:  # the file handle is shared
+                page.parent.filehandle.seek(offset)
+                data = page.parent.filehandle.read(bytecount)
+            segment, indices, _ = page.decode(data, index, jpegtables=page.jpegtables)
+            if segment is None:
+                continue
+            segment = _to_rgb8(segment[0])
+            if region is None:
+                region = np.zeros(
+                    (bottom - top, right - left, segment.shape[2]), dtype=np.uint8
+                )
+            y, x = indices[-3], indices[-2]
+            y0, x0 = max(y, top), max(x, left)
+            y1 = min(y + segment.shape[0], bottom, source.height)
+            x1 = min(x + segment.shape[1], right, source.width)
+            region[y0 - top : y1 - top, x0 - left : x1 - left] = segment[
+                y0 - y : y1 - y, x0 - x : x1 - x
+            ]
+        if region is None:
+            region = np.zeros((bottom - top, right - left, 3), dtype=np.uint8)
+        return region
+
+    def _levelArray(self, level: int) -> np.ndarray:
+        with self._level_lock:  # decode each level once, not once per worker
+            array = self._levels.get(level)
+            if array is not None:
+                self._levels.move_to_end(level)
+                return array
+            array = self._decodeLevel(level)
+            self._levels[level] = array
+            num_bytes = sum(decoded.nbytes for decoded in self._levels.values())
+            while num_bytes > self.max_level_bytes and len(self._levels) > 1:
+                _, evicted = self._levels.popitem(last=False)
+                num_bytes -= evicted.nbytes
+        return array
+
+    def _decodeLevel(self, level: int) -> np.ndarray:
+        width, height = self.levelSize(level)
+        # called with _level_lock held
+        finer = [decoded for decoded in self._levels if decoded < level]
+        if finer:  # already in memory, no need to decode the file again
+            return _downsample(self._levels[max(finer)], width, height)
+        with PIL.Image.open(self.filename) as image:
+            if level > 0:
+                # JPEG decodes at 1/2, 1/4 or 1/8 of the size for much cheaper
+                draft_size = (width, height)
+                if utils.get_exif_orientation(image) in _TRANSPOSED_ORIENTATIONS:
+                    draft_size = (height, width)
+                image.draft("RGB", draft_size)
+            image = utils.apply_exif_orientation(image)
+            if image.mode not in ("RGB", "RGBA"):
+                image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+            return _downsample(np.asarray(image), width, height)
+
+
+class _TileRunnable(QtCore.QRunnable):
+    def __init__(self, loader: TileLoader, generation: int, tile: tuple) -> None:
+        super().__init__()
+        self._loader = loader
+        self._generation = generation
+        self._tile = tile
+
+    def run(self) -> None:
+        self._loader._load(self._generation, self._tile)
+
+
+class TileLoader(QtCore.QObject):
+    """Decodes the tiles of a TiledImage on a QThreadPool.
+
+    ``request(tiles)`` schedules the ``(level, col, row)`` tiles that are not
+    cached yet and ``tileReady`` is emitted as each is decoded. Tiles of a
+    previous image, or no longer requested, are dropped.
+    """
+
+    tileReady = QtCore.pyqtSignal()
+    _loaded = QtCore.pyqtSignal(int)
+
+    def __init__(
+        self, max_threads: int = 2, parent: Optional[QtCore.QObject] = None
+    ) -> None:
+        super().__init__(parent)
+        self._pool: QtCore.QThreadPool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(max_threads)
+        self._loaded.connect(self._onLoaded)
+        self._image: Optional[TiledImage] = None
+        self._generation: int = 0
+        self._lock: threading.Lock = threading.Lock()
+        self._pending: set[tuple] = set()
+        self._wanted: set[tuple] = set()
+
+    def setImage(self, image: Optional[TiledImage]) -> None:
+        with self._lock:
+            self._image = image
+            self._generation += 1
+            self._pending.clear()
+            self._wanted.clear()
+        self._pool.clear()
+
+    def request(self, tiles: list[tuple[int, int, int]]) -> None:
+        with self._lock:
+            if self._image is None:
+                return
+            self._wanted = set(tiles)
+            for tile in tiles:
+                if tile in self._pending:
+                    continue
+                self._pending.add(tile)
+                self._pool.start(_TileRunnable(self, self._generation, tile))
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        return self._pool.waitForDone(msecs)
+
+    def _load(self, generation: int, tile: tuple) -> None:
+        with self._lock:
+            image = self._image
+            if generation != self._generation or tile not in self._wanted:
+                self._pending.discard(tile)
+                return
+        try:
+            image._tileArray(*tile)
+        except Exception as e:
+            logger.warning(
+                "Failed to decode tile {} of {}: {}", tile, image.filename, e
+            )
+        with self._lock:
+            self._pending.discard(tile)
+        self._loaded.emit(generation)
+
+    def _onLoaded(self, generation: int) -> None:
+        if generation == self._generation:
+            self.tileReady.emit()
@@ -0,0 +1,180 @@
+import os
+import os.path as osp
+import sys
+import time
+from typing import Optional
+
+import cv2
+import numpy as np
+from loguru import logger
+from PyQt5 import QtCore
+
+# Marker written next to the frame directory once every frame has been written.
+EXTRACTED_MARKER = ".extracted"
+
+
+def frame_filename(frame_index: int) -> str:
+    return f"{frame_index:08d}.jpg"
+
+
+def frame_indices(
+    num_frames: Optional[int],
+    fps: float,
+    frame_stride: int = 1,
+    start_time: Optional[float] = None,
+    end_time: Optional[float] = None,
+) -> range:
+    """Return the indices of the frames selected from a video.
+
+    Every ``frame_stride``-th frame is taken, counting from the frame at
+    ``start_time`` and up to the frame at ``end_time``. The time range is
+    ignored when ``fps`` is unknown, and with ``num_frames`` None the range
+    runs to the end of the video, wherever that is.
+    """
+    if frame_stride < 1:
+        raise ValueError(f"frame_stride must be >= 1: {frame_stride}")
+    start = 0
+    stop = sys.maxsize if num_frames is None else num_frames
+    if fps > 0 and start_time:
+        start = min(int(start_time * fps), stop)
+    if fps > 0 and end_time is not None:
+        stop = min(int(end_time * fps) + 1, stop)
+    return range(start, stop, frame_stride)
+
+
+def encode_frame(frame: np.ndarray, jpeg_quality: int = 95) -> bytes:
+    ok, encoded = cv2.imencode(".jpg", frame, [cv2.IMWRITE_JPEG_QUALITY, jpeg_quality])
+    if not ok:
+        raise RuntimeError("Failed to encode frame")
+    return encoded.tobytes()
+
+
+def write_frame_file(path: str, image_data: bytes) -> None:
+    """Write via a temporary name so readers never see a partial file."""
+    with open(path + ".part", "wb") as f:
+        f.write(image_data)
+    os.replace(path + ".part", path)
+
+
+class VideoFrameExtractor(QtCore.QThread):
+    """Decodes a video with cv2.VideoCapture and writes frames as JPEG.
+
+    Frames land in ``output_dir`` one by one (written to a temporary name and
+    renamed, so readers never see a partial file) and are announced in batches
+    through ``framesExtracted``, letting the GUI show frame 0 while the rest of
+    the video is still being decoded. Frames that already exist are skipped,
+    so an interrupted extraction resumes where it stopped.
+    """
+
+    framesExtracted = QtCore.pyqtSignal(list)  # list of frame filenames
+    extractionFailed = QtCore.pyqtSignal(str)
+
+    def __init__(
+        self,
+        video_file: str,
+        output_dir: str,
+        frame_stride: int = 1,
+        start_time: Optional[float] = None,
+        end_time: Optional[float] = None,
+        jpeg_quality: int = 95,
+        emit_interval: float = 0.2,
+        parent: Optional[QtCore.QObject] = None,
+    ) -> None:
+        super().__init__(parent)
+        if frame_stride < 1:
+            raise ValueError(f"frame_stride must be >= 1: {frame_stride}")
+        self.video_file: str = video_file
+        self.output_dir: str = output_dir
+        self.frame_stride: int = frame_stride
+        self.start_time: Optional[float] = start_time
+        self.end_time: Optional[float] = end_time
+        self.jpeg_quality: int = jpeg_quality
+        self.emit_interval: float = emit_interval
+        self.num_extracted: int = 0
+        self._stopped: bool = False
+
+    def stop(self) -> None:
+        self._stopped = True
+
+    @property
+    def marker_file(self) -> str:
+        return osp.join(osp.dirname(self.output_dir), EXTRACTED_MARKER)
+
+    def run(self) -> None:
+        capture = cv2.VideoCapture(self.video_file)
+        if not capture.isOpened():
+            self.extractionFailed.emit(f"Failed to open video: {self.video_file}")
+            return
+        try:
+            self._extract(capture)
+        except Exception as e:
+            logger.exception("Failed to extract frames from {!r}", self.video_file)
+            self.extractionFailed.emit(str(e))
+        finally:
+            capture.release()
+
+    def _extract(self, capture: cv2.VideoCapture) -> None:
+        os.makedirs(self.output_dir, exist_ok=True)
+        with os.scandir(self.output_dir) as entries:
+            existing = {entry.name for entry in entries}
+
+        # the same frames VideoFrameSource lists; the frame count is not
+        # trusted, frames are read until the video ends
+        indices = frame_indices(
+            None,
+            capture.get(cv2.CAP_PROP_FPS) or 0,
+            frame_stride=self.frame_stride,
+            start_time=self.start_time,
+            end_time=self.end_time,
+        )
+        frame_index = indices.start
+        if frame_index:
+            capture.set(cv2.CAP_PROP_POS_FRAMES, frame_index)
+
+        batch: list[str] = []
+        t_emit = time.time()
+        error: Optional[str] = None
+        while not self._stopped and frame_index < indices.stop:
+            filename = frame_filename(frame_index)
+            wanted = frame_index in indices and filename not in existing
+            # grab() demuxes without decoding; only wanted frames are decoded
+            if not capture.grab():
+                break
+            if wanted:
+                ok, frame = capture.retrieve()
+                if not ok:
+                    error = f"Failed to decode frame {frame_index} of {self.video_file}"
+                    break
+                batch.append(self._write(filename, frame))
+            frame_index += 1
+
+            if batch and time.time() - t_emit >= self.emit_interval:
+                self._emit(batch)
+                batch = []
+                t_emit = time.time()
+        if batch:
+            self._emit(batch)
+
+        if error is not None:
+            # no marker: the frames after this one are missing, and the next
+            # extraction resumes from here
+            logger.warning(error)
+            self.extractionFailed.emit(error)
+        elif not self._stopped:
+            with open(self.marker_file, "w") as f:
+                f.write(self.video_file)
+            logger.info(
+                "Extracted {} frames from {!r} into {!r}",
+                self.num_extracted,
+                self.video_file,
+                self.output_dir,
+            )
+
+    def _write(self, filename: str, frame: np.ndarray) -> str:
+        path = osp.join(self.output_dir, filename)
+        write_frame_file(path, encode_frame(frame, self.jpeg_quality))
+        return path
+
+    def _emit(self, batch: list[str]) -> None:
+        self.num_extracted += len(batch)
+        self.framesExtracted.emit(batch)
@@ -0,0 +1,274 @@
+from __future__ import annotations
+
+import collections
+import contextlib
+import os
+import os.path as osp
+import sys
+import tarfile
+import time
+import zipfile
+import zlib
+from concurrent import futures
+from typing import Callable
+from typing import Optional
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+ARCHIVE_FORMATS = ("zip", "tar", "tar.zst")
+
+# already compressed: deflating them again costs a core and saves next to nothing
+STORED_SUFFIXES = frozenset(
+    {
+        ".jpg",
+        ".jpeg",
+        ".png",
+        ".gif",
+        ".webp",
+        ".heic",
+        ".jp2",
+        ".mp4",
+        ".avi",
+        ".mov",
+        ".mkv",
+        ".webm",
+        ".zip",
+        ".gz",
+        ".tgz",
+        ".zst",
+        ".bz2",
+        ".xz",
+        ".7z",
+        ".npz",
+    }
+)
+
+# members up to this size are deflated in memory by the workers, larger ones
+# are streamed through zipfile on the writing thread
+_MAX_PARALLEL_BYTES = 16 << 20
+
+# how often progress is reported at most, in seconds
+_PROGRESS_INTERVAL = 0.1
+
+# zipfile has no public API to add data that is already deflated, so members
+# deflated by the workers are written through ZipFile internals. They are the
+# same on these Python versions; elsewhere every member is deflated by
+# ZipFile.write on the writing thread instead.
+_RAW_WRITE_VERSIONS = ((3, 9), (3, 13))
+_RAW_WRITE_ATTRIBUTES = ("fp", "start_dir", "_didModify", "_writecheck")
+
+
+class ArchiveCanceled(Exception):
+    pass
+
+
+class ArchiveStats:
+    """What :func:`write_archive` wrote, and how fast."""
+
+    def __init__(
+        self, num_files: int, input_bytes: int, output_bytes: int, seconds: float
+    ) -> None:
+        self.num_files = num_files
+        self.input_bytes = input_bytes
+        self.output_bytes = output_bytes
+        self.seconds = seconds
+
+    @property
+    def megabytes_per_second(self) -> float:
+        return self.input_bytes / 2**20 / max(self.seconds, 1e-6)
+
+    def __str__(self) -> str:
+        return (
+            f"{self.num_files} files, {self.input_bytes / 2**20:.1f} MB -> "
+            f"{self.output_bytes / 2**20:.1f} MB in {self.seconds:.1f}s "
+            f"({self.megabytes_per_second:.1f} MB/s)"
+        )
+
+
+def check_archive_format(format: str) -> None:
+    """Raise if archives of ``format`` cannot be written here."""
+    if format not in ARCHIVE_FORMATS:
+        raise ValueError(f"Unsupported archive format: {format}")
+    if format == "tar.zst" and zstandard is None:
+        raise RuntimeError(
+            "Writing tar.zst archives needs the zstandard package "
+            "(pip install labelme[zstd])"
+        )
+
+
+def write_archive(
+    path: str,
+    members: list[tuple[str, str]],
+    format: str = "zip",
+    max_workers: Optional[int] = None,
+    compress_level: int = 6,
+    progress: Optional[Callable[[int, int], None]] = None,
+    canceled: Optional[Callable[[], bool]] = None,
+) -> ArchiveStats:
+    """Write the files in members, ``(filename, arcname)`` pairs, to path.
+
+    zip: members whose suffix is in :data:`STORED_SUFFIXES` are stored as they
+    are; the others are deflated by ``max_workers`` threads while the archive
+    is written in order (by the writing thread on Python versions whose
+    zipfile internals are not known). tar is written uncompressed and tar.zst is
+    compressed by zstd on ``max_workers`` threads (needs ``zstandard``).
+
+    ``progress(done, total)`` is called with the number of members written,
+    and ``canceled()`` is polled between members; ArchiveCanceled is raised
+    once it returns True. The archive appears at path only when complete.
+    """
+    check_archive_format(format)
+    max_workers = max_workers or os.cpu_count() or 1
+
+    sizes = [os.stat(filename).st_size for filename, _ in members]
+    reporter = _ProgressReporter(len(members), progress, canceled)
+    t_start = time.time()
+    tmp_path = path + ".part"
+    try:
+        with open(tmp_path, "wb") as f:
+            if format == "zip":
+                _write_zip(f, members, sizes, max_workers, compress_level, reporter)
+            elif format == "tar":
+                _write_tar(f, members, reporter)
+            else:
+                cctx = zstandard.ZstdCompressor(level=3, threads=max_workers)
+                with cctx.stream_writer(f, closefd=False) as zf:
+                    _write_tar(zf, members, reporter)
+        os.replace(tmp_path, path)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_path)
+        raise
+    reporter.report(force=True)
+    return ArchiveStats(
+        num_files=len(members),
+        input_bytes=sum(sizes),
+        output_bytes=osp.getsize(path),
+        seconds=time.time() - t_start,
+    )
+
+
+class _ProgressReporter:
+    def __init__(
+        self,
+        total: int,
+        progress: Optional[Callable[[int, int], None]],
+        canceled: Optional[Callable[[], bool]],
+    ) -> None:
+        self.total = total
+        self.done = 0
+        self._progress = progress
+        self._canceled = canceled
+        self._last_report = 0.0
+
+    def advance(self) -> None:
+        if self._canceled is not None and self._canceled():
+            raise ArchiveCanceled
+        self.done += 1
+        self.report()
+
+    def report(self, force: bool = False) -> None:
+        if self._progress is None:
+            return
+        now = time.time()
+        if force or now - self._last_report >= _PROGRESS_INTERVAL:
+            self._last_report = now
+            self._progress(self.done, self.total)
+
+
+def _is_stored(filename: str) -> bool:
+    return osp.splitext(filename)[1].lower() in STORED_SUFFIXES
+
+
+def _deflate(filename: str, compress_level: int) -> tuple[bytes, int, int, int]:
+    # zlib releases the GIL, so threads compress in parallel
+    with open(filename, "rb") as f:
+        data = f.read()
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    compressed = compressor.compress(data) + compressor.flush()
+    crc = zlib.crc32(data)
+    if len(compressed) >= len(data):
+        return data, crc, len(data), zipfile.ZIP_STORED
+    return compressed, crc, len(data), zipfile.ZIP_DEFLATED
+
+
+def _can_write_deflated(zf: zipfile.ZipFile) -> bool:
+    first, last = _RAW_WRITE_VERSIONS
+    return first <= sys.version_info[:2] <= last and all(
+        hasattr(zf, name) for name in _RAW_WRITE_ATTRIBUTES
+    )
+
+
+def _write_zip(f, members, sizes, max_workers, compress_level, reporter) -> None:
+    with zipfile.ZipFile(
+        f, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=compress_level
+    ) as zf, futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        parallel = _can_write_deflated(zf)
+        # members are deflated ahead of the writer, but only a few at a time so
+        # that memory stays bounded
+        window = collections.deque()
+        pending = iter(zip(members, sizes))
+        while True:
+            while len(window) < 2 * max_workers:
+                try:
+                    (filename, arcname), size = next(pending)
+                except StopIteration:
+                    break
+                job = None
+                if (
+                    parallel
+                    and not _is_stored(filename)
+                    and size <= _MAX_PARALLEL_BYTES
+                ):
+                    job = executor.submit(_deflate, filename, compress_level)
+                window.append((filename, arcname, job))
+            if not window:
+                break
+            filename, arcname, job = window.popleft()
+            try:
+                if job is None:
+                    compress_type = (
+                        zipfile.ZIP_STORED
+                        if _is_stored(filename)
+                        else zipfile.ZIP_DEFLATED
+                    )
+                    zf.write(filename, arcname, compress_type=compress_type)
+                else:
+                    _write_deflated(zf, filename, arcname, *job.result())
+                reporter.advance()
+            except BaseException:
+                for _, _, job in window:
+                    if job is not None:
+                        job.cancel()
+                raise
+
+
+def _write_deflated(zf, filename, arcname, data, crc, file_size, compress_type):
+    # ZipFile.writestr compresses on its own, so for data compressed by the
+    # workers this does what ZipFile._open_to_write and _ZipWriteFile.close
+    # do; zipfile still writes the central directory (and ZIP64 records).
+    # Only called when _can_write_deflated(zf).
+    zinfo = zipfile.ZipInfo.from_file(filename, arcname)
+    zinfo.compress_type = compress_type
+    zinfo.file_size = file_size
+    zinfo.compress_size = len(data)
+    zinfo.CRC = crc
+    zf.fp.seek(zf.start_dir)
+    zinfo.header_offset = zf.fp.tell()
+    zf._writecheck(zinfo)
+    zf._didModify = True
+    zf.fp.write(zinfo.FileHeader())
+    zf.fp.write(data)
+    zf.start_dir = zf.fp.tell()
+    zf.filelist.append(zinfo)
+    zf.NameToInfo[zinfo.filename] = zinfo
+
+
+def _write_tar(f, members, reporter) -> None:
+    with tarfile.open(fileobj=f, mode="w|", format=tarfile.PAX_FORMAT) as tar:
+        for filename, arcname in members:
+            tar.add(filename, arcname, recursive=False)
+            reporter.advance()
@@ -0,0 +1,86 @@
+from __future__ import annotations
+
+import os
+import os.path as osp
+import threading
+from typing import Any
+from typing import Optional
+
+from loguru import logger
+from PyQt5 import QtCore
+
+from labelme.label_file import LabelFile
+
+
+class _SaveRunnable(QtCore.QRunnable):
+    def __init__(self, queue: SaveQueue, filename: str) -> None:
+        super().__init__()
+        self._queue = queue
+        self._filename = filename
+
+    def run(self) -> None:
+        self._queue._write(self._filename)
+
+
+class SaveQueue(QtCore.QObject):
+    """Writes label files on a background thread.
+
+    ``submit(filename, tag, **kwargs)`` takes a snapshot of what
+    ``LabelFile.save`` is called with, so it must not be modified afterwards.
+    Saves are written one at a time in the order they were submitted; a save
+    that is still queued when another one for the same file comes in is
+    replaced by it, so only the newest is written. ``saved(filename, tag)``
+    or ``failed(filename, tag, message)`` is emitted after each write.
+    """
+
+    saved = QtCore.pyqtSignal(str, object)
+    failed = QtCore.pyqtSignal(str, object, str)
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None) -> None:
+        super().__init__(parent)
+        self._pool: QtCore.QThreadPool = QtCore.QThreadPool(self)
+        self._pool.setMaxThreadCount(1)  # keeps writes to a file in order
+        self._lock: threading.Lock = threading.Lock()
+        self._pending: dict[str, tuple[Any, dict]] = {}
+        self._writing: Optional[str] = None
+        self.num_submitted: int = 0
+        self.num_written: int = 0
+
+    def submit(self, filename: str, tag: Any = None, **kwargs) -> None:
+        with self._lock:
+            self.num_submitted += 1
+            queued = filename in self._pending
+            self._pending[filename] = (tag, kwargs)
+        if not queued:
+            self._pool.start(_SaveRunnable(self, filename))
+
+    def isPending(self, filename: str) -> bool:
+        """Return whether a save of filename is queued or being written."""
+        with self._lock:
+            return filename in self._pending or filename == self._writing
+
+    def waitForDone(self, msecs: int = -1) -> bool:
+        """Block until every submitted save is written."""
+        return self._pool.waitForDone(msecs)
+
+    def _write(self, filename: str) -> None:
+        with self._lock:
+            tag, kwargs = self._pending.pop(filename)
+            self._writing = filename
+        try:
+            if osp.dirname(filename):
+                os.makedirs(osp.dirname(filename), exist_ok=True)
+            LabelFile().save(filename=filename, **kwargs)
+        except Exception as e:
+            logger.error("Failed to save {}: {}", filename, e)
+            error = str(e)
+        else:
+            error = None
+        with self._lock:
+            self._writing = None
+            if error is None:
+                self.num_written += 1
+        if error is None:
+            self.saved.emit(filename, tag)
+        else:
+            self.failed.emit(filename, tag, error)
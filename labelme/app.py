@@ -22,6 +22,19 @@ from PyQt5.QtCore import QTimer
 
 from labelme import __appname__
 from labelme._automation import bbox_from_text
+from labelme._automation.embedding_cache import EmbeddingCache
+from labelme._automation.embedding_cache import image_from_qimage
+from labelme._automation.embedding_scheduler import EmbeddingScheduler
+from labelme._media.frame_cache import FrameCache
+from labelme._media.frame_cache import FramePrefetcher
+from labelme._media.frame_cache import load_frame
+from labelme._media.frame_source import VideoFrameSource
+from labelme._media.tiled_image import TiledImage
+from labelme._media.tiled_image import read_image_size
+from labelme._media.video_extractor import EXTRACTED_MARKER
+from labelme._media.video_extractor import VideoFrameExtractor
+from labelme._storage.archive import write_archive
+from labelme._storage.save_queue import SaveQueue
 from labelme.config import get_config
 from labelme.label_file import LabelFile
 from labelme.label_file import LabelFileError
@@ -30,6 +43,8 @@ from labelme.widgets import AiPromptWidget
 from labelme.widgets import BrightnessContrastDialog
 from labelme.widgets import Canvas
 from labelme.widgets import FileDialogPreview
+from labelme.widgets import FileListModel
+from labelme.widgets import FileListView
 from labelme.widgets import LabelDialog
 from labelme.widgets import LabelListWidget
 from labelme.widgets import LabelListWidgetItem
@@ -40,11 +55,9 @@ from labelme.DataSetExporter import DatasetExporter
 
 from . import utils
 
-import zipfile
 import cv2
 import json
 import shutil
-import glob
 
 # FIXME
 # - [medium] Set max zoom value to something big enough for FitWidth/Window
@@ -55,10 +68,40 @@ import glob
 
 LABEL_COLORMAP = imgviz.label_colormap()
 
+# Rows added to the file list per event-loop turn while importing a directory.
+IMPORT_CHUNK_SIZE = 2000
+
+
+def scan_label_names(label_dir):
+    """Return basenames (without extension) of the label files in label_dir."""
+    try:
+        with os.scandir(label_dir) as entries:
+            return {
+                osp.splitext(entry.name)[0]
+                for entry in entries
+                if entry.name.lower().endswith((".json", ".csv"))
+            }
+    except OSError:
+        return set()
+
+
+class _LabelScanRunnable(QtCore.QRunnable):
+    def __init__(self, signal, generation, label_dir):
+        super(_LabelScanRunnable, self).__init__()
+        self._signal = signal
+        self._generation = generation
+        self._label_dir = label_dir
+
+    def run(self):
+        self._signal.emit(self._generation, scan_label_names(self._label_dir))
+
 
 class MainWindow(QtWidgets.QMainWindow):
     FIT_WINDOW, FIT_WIDTH, MANUAL_ZOOM = 0, 1, 2
 
+    # (import generation, label basenames) from a background label scan
+    labelNamesScanned = QtCore.pyqtSignal(int, object)
+
     def __init__(
         self,
         config=None,
@@ -159,13 +202,17 @@ class MainWindow(QtWidgets.QMainWindow):
         self.fileSearch = QtWidgets.QLineEdit()
         self.fileSearch.setPlaceholderText(self.tr("Search Filename"))
         self.fileSearch.textChanged.connect(self.fileSearchChanged)
-        self.fileListWidget = QtWidgets.QListWidget()
-        self.fileListWidget.itemSelectionChanged.connect(self.fileSelectionChanged)
+        self.fileListModel = FileListModel(self)
+        self.fileListView = FileListView()
+        self.fileListView.setModel(self.fileListModel)
+        self.fileListView.selectionModel().selectionChanged.connect(
+            self.fileSelectionChanged
+        )
         fileListLayout = QtWidgets.QVBoxLayout()
         fileListLayout.setContentsMargins(0, 0, 0, 0)
         fileListLayout.setSpacing(0)
         fileListLayout.addWidget(self.fileSearch)
-        fileListLayout.addWidget(self.fileListWidget)
+        fileListLayout.addWidget(self.fileListView)
         self.file_dock = QtWidgets.QDockWidget(self.tr("File List"), self)
         self.file_dock.setObjectName("Files")
         fileListWidget = QtWidgets.QWidget()
@@ -175,11 +222,26 @@ class MainWindow(QtWidgets.QMainWindow):
         self.zoomWidget = ZoomWidget()
         self.setAcceptDrops(True)
 
+        embedding_cache = EmbeddingCache(
+            max_bytes=self._config["ai"]["embedding_cache_megabytes"] * 1024 * 1024,
+            cache_dir=osp.expanduser(self._config["ai"]["embedding_cache_dir"])
+            if self._config["ai"]["embedding_cache_dir"]
+            else None,
+            max_disk_bytes=self._config["ai"]["embedding_cache_disk_megabytes"]
+            * 1024
+            * 1024,
+        )
+        # one scheduler for the image list and the canvas, so that the same
+        # image is not encoded twice at once
+        self._embedding_scheduler = EmbeddingScheduler(embedding_cache, parent=self)
         self.canvas = self.labelList.canvas = Canvas(
             epsilon=self._config["epsilon"],
             double_click=self._config["canvas"]["double_click"],
             num_backups=self._config["canvas"]["num_backups"],
+            undo_megabytes=self._config["canvas"]["undo_megabytes"],
             crosshair=self._config["canvas"]["crosshair"],
+            embedding_cache=embedding_cache,
+            embedding_scheduler=self._embedding_scheduler,
         )
         self.canvas.zoomRequest.connect(self.zoomRequest)
         self.canvas.mouseMoved.connect(
@@ -429,7 +491,7 @@ class MainWindow(QtWidgets.QMainWindow):
             enabled=False,
         )
         createAiPolygonMode.changed.connect(
-            lambda: self.canvas.initializeAiModel(
+            lambda: self.initializeAiModel(
                 model_name=self._selectAiModelComboBox.itemData(
                     self._selectAiModelComboBox.currentIndex()
                 )
@@ -446,7 +508,7 @@ class MainWindow(QtWidgets.QMainWindow):
             enabled=False,
         )
         createAiMaskMode.changed.connect(
-            lambda: self.canvas.initializeAiModel(
+            lambda: self.initializeAiModel(
                 model_name=self._selectAiModelComboBox.itemData(
                     self._selectAiModelComboBox.currentIndex()
                 )
@@ -872,7 +934,7 @@ class MainWindow(QtWidgets.QMainWindow):
             model_index = 0
         self._selectAiModelComboBox.setCurrentIndex(model_index)
         self._selectAiModelComboBox.currentIndexChanged.connect(
-            lambda index: self.canvas.initializeAiModel(
+            lambda index: self.initializeAiModel(
                 model_name=self._selectAiModelComboBox.itemData(index)
             )
             if self.canvas.createMode in ["ai_polygon", "ai_mask"]
@@ -937,6 +999,23 @@ class MainWindow(QtWidgets.QMainWindow):
             Qt.Horizontal: {},
             Qt.Vertical: {},
         }  # key=filename, value=scroll_value
+        self._frame_cache = FrameCache(
+            max_bytes=self._config["frame_cache"]["max_megabytes"] * 1024 * 1024
+        )
+        self._frame_prefetcher = FramePrefetcher(
+            self._frame_cache, skip=self._isTiledImage
+        )
+        self._frame_direction = 1  # +1: towards next image, -1: towards prev
+        self._import_generation = 0
+        self._import_label_names = None
+        self.labelNamesScanned.connect(self._onLabelNamesScanned)
+        self._video_extractor = None
+        self._frame_source = None  # set while a video is opened directly
+        self._exporter = None  # the DatasetExporter while an export runs
+        # auto-saves are written in the background
+        self._save_queue = SaveQueue(parent=self)
+        self._save_queue.saved.connect(self._onLabelsSaved)
+        self._save_queue.failed.connect(self._onLabelsSaveFailed)
 
         if filename is not None:
             if osp.isdir(filename):
@@ -1031,7 +1110,7 @@ class MainWindow(QtWidgets.QMainWindow):
             if self.output_dir:
                 label_file_without_path = osp.basename(label_file)
                 label_file = osp.join(self.output_dir, label_file_without_path)
-            self.saveLabels(label_file)
+            self.saveLabels(label_file, background=True)
             return
         self.dirty = True
         self.actions.save.setEnabled(True)
@@ -1075,6 +1154,9 @@ class MainWindow(QtWidgets.QMainWindow):
         self.statusBar().showMessage(message, delay)
 
     def _submit_ai_prompt(self, _) -> None:
+        if self.canvas.tiledImage() is not None:
+            self.status(self.tr("AI annotation is not available for tiled images"))
+            return
         texts = self._ai_prompt_widget.get_text_prompt().split(",")
         boxes, scores, labels = bbox_from_text.get_bboxes_from_texts(
             model="yoloworld",
@@ -1179,6 +1261,13 @@ class MainWindow(QtWidgets.QMainWindow):
         self.actions.delete.setEnabled(not drawing)
 
     def toggleDrawMode(self, edit=True, createMode="polygon"):
+        if (
+            not edit
+            and createMode in ["ai_polygon", "ai_mask"]
+            and self.canvas.tiledImage() is not None
+        ):
+            self.status(self.tr("AI annotation is not available for tiled images"))
+            return
         draw_actions = {
             "polygon": self.actions.createMode,
             "rectangle": self.actions.createRectangleMode,
@@ -1305,7 +1394,6 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             return
 
-        self.canvas.storeShapes()
         for item in items:
             shape: Shape = item.shape()
 
@@ -1333,6 +1421,8 @@ class MainWindow(QtWidgets.QMainWindow):
                 self.uniqLabelList.addItem(item)
                 rgb = self._get_rgb_by_label(shape.label)
                 self.uniqLabelList.setItemLabel(item, shape.label, rgb)
+        self.canvas.storeShapes()
+        self.actions.undo.setEnabled(self.canvas.isShapeRestorable)
 
     def fileSearchChanged(self):
         self.importDirImages(
@@ -1342,20 +1432,18 @@ class MainWindow(QtWidgets.QMainWindow):
         )
 
     def fileSelectionChanged(self):
-        items = self.fileListWidget.selectedItems()
-        if not items:
+        indexes = self.fileListView.selectedIndexes()
+        if not indexes:
             return
-        item = items[0]
 
         if not self.mayContinue():
             return
 
-        currIndex = self.imageList.index(str(item.text()))
-        if currIndex < len(self.imageList):
-            filename = self.imageList[currIndex]
-            self.scrollbar_dir.setValue(currIndex)
-            if filename:
-                self.loadFile(filename)
+        currIndex = indexes[0].row()
+        filename = self.fileListModel.filenameAt(currIndex)
+        self.scrollbar_dir.setValue(currIndex)
+        if filename:
+            self.loadFile(filename)
 
     # React to canvas signals.
     def shapeSelectionChanged(self, selected_shapes):
@@ -1407,6 +1495,7 @@ class MainWindow(QtWidgets.QMainWindow):
         shape.fill_color = QtGui.QColor(r, g, b, 128)
         shape.select_line_color = QtGui.QColor(255, 255, 255)
         shape.select_fill_color = QtGui.QColor(r, g, b, 155)
+        self.canvas.markShapesEdited()
 
     def _get_rgb_by_label(self, label):
         if self._config["shape_color"] == "auto":
@@ -1490,10 +1579,14 @@ class MainWindow(QtWidgets.QMainWindow):
             item.setCheckState(Qt.Checked if flag else Qt.Unchecked)
             self.flag_widget.addItem(item)
 
-    def saveLabels(self, filename):
-        # 2025 03 18 bsg save bug fix
-        lf = LabelFile(filename)
-        # 2025 03 18 bsg save bug fix end
+    def saveLabels(self, filename, background=False):
+        """Save the labels of the current image to filename.
+
+        With background, the labels are handed over to the save queue and
+        written by a worker; errors are reported in the status bar.
+        """
+        # write only: the existing label file and its image are not read
+        lf = LabelFile()
         def format_shape(s):
             data = s.other_data.copy()
             data.update(
@@ -1503,7 +1596,7 @@ class MainWindow(QtWidgets.QMainWindow):
                     group_id=s.group_id,
                     description=s.description,
                     shape_type=s.shape_type,
-                    flags=s.flags,
+                    flags=None if s.flags is None else dict(s.flags),
                     mask=None
                     if s.mask is None
                     else utils.img_arr_to_b64(s.mask.astype(np.uint8)),
@@ -1522,24 +1615,33 @@ class MainWindow(QtWidgets.QMainWindow):
             imagePath = "\\"+os.path.relpath(self.imagePath, self.labelPath)
             imageData = None
             # imageData = self.imageData if self._config["store_data"] else None
-            if osp.dirname(filename) and not osp.exists(osp.dirname(filename)):
-                os.makedirs(osp.dirname(filename))
-            lf.save(
-                filename=filename,
+            if self._frame_source is not None and self._frame_source.hasFilename(
+                self.imagePath
+            ):
+                # only frames that get annotated are written out of the video
+                self._frame_source.materialize(self.imagePath, self.imageData)
+            data = dict(
                 shapes=shapes,
                 imagePath=imagePath,
                 imageData=imageData,
-                imageHeight=self.image.height(),
-                imageWidth=self.image.width(),
-                otherData=self.otherData,
+                imageHeight=self.canvas.imageSize().height(),
+                imageWidth=self.canvas.imageSize().width(),
+                otherData=dict(self.otherData or {}),
                 flags=flags,
+                csv_layout=self._config["csv_layout"],
             )
+            if background:
+                self._save_queue.submit(filename, tag=self.filename, **data)
+                lf.filename = filename
+                self.labelFile = lf
+                return True
+            # queued saves of the file must not land after this one
+            self._save_queue.waitForDone()
+            if osp.dirname(filename) and not osp.exists(osp.dirname(filename)):
+                os.makedirs(osp.dirname(filename))
+            lf.save(filename=filename, **data)
             self.labelFile = lf
-            items = self.fileListWidget.findItems(self.imagePath, Qt.MatchExactly)
-            if len(items) > 0:
-                if len(items) != 1:
-                    raise RuntimeError("There are duplicate files.")
-                items[0].setCheckState(Qt.Checked)
+            self.fileListModel.setChecked(self.filename, True)
             # disable allows next and previous image to proceed
             # self.filename = filename
             return True
@@ -1549,6 +1651,12 @@ class MainWindow(QtWidgets.QMainWindow):
             )
             return False
 
+    def _onLabelsSaved(self, filename, image_filename):
+        self.fileListModel.setChecked(image_filename, True)
+
+    def _onLabelsSaveFailed(self, filename, image_filename, message):
+        self.status(self.tr("Error saving %s: %s") % (filename, message), delay=0)
+
     def duplicateSelectedShape(self):
         self.copySelectedShape()
         self.pasteSelectedShape()
@@ -1621,7 +1729,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self.setDirty()
         else:
             self.canvas.undoLastLine()
-            self.canvas.shapesBackups.pop()
+            self.canvas.popShapesBackup()
 
     def scrollRequest(self, delta, orientation):
         units = -delta * 0.1  # natural scroll
@@ -1691,8 +1799,10 @@ class MainWindow(QtWidgets.QMainWindow):
         self.canvas.loadPixmap(QtGui.QPixmap.fromImage(qimage), clear_shapes=False)
 
     def brightnessContrast(self, value):
+        if self.canvas.tiledImage() is not None:
+            return
         dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
+            utils.img_data_to_pil(self._currentImageData()),
             self.onNewBrightnessContrast,
             parent=self,
         )
@@ -1718,15 +1828,14 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def loadFile(self, filename=None):
         """Load the specified file, or the last opened file if None."""
-        # changing fileListWidget loads file
-        if filename in self.imageList and (
-            self.fileListWidget.currentRow() != self.imageList.index(filename)
-        ):
-            self.fileListWidget.setCurrentRow(self.imageList.index(filename))
-            self.fileListWidget.repaint()
+        # changing fileListView loads file
+        row = self.fileListModel.rowOf(filename)
+        if row != -1 and self.fileListView.currentRow() != row:
+            self.fileListView.setCurrentRow(row)
+            self.fileListView.repaint()
             return
-        if not filename in self.imageList:
-            self.fileListWidget.clear()
+        if row == -1:
+            self.fileListModel.clear()
             self.actions.openNextImg.setEnabled(False)
             self.actions.openPrevImg.setEnabled(False)
             self.actions.export.setEnabled(False)
@@ -1764,27 +1873,28 @@ class MainWindow(QtWidgets.QMainWindow):
             for path in [origins_images_dir, annotations_coco_dir, annotations_labelme_dir, archive_dir, images_dir]:
                 os.makedirs(path, exist_ok=True)
 
-            if os.path.exists(origins_images_dir) and len(os.listdir(origins_images_dir)) > 0:
+            # Frames already on disk show up right away; the rest are decoded
+            # in the background and appended to the file list as they land.
+            if osp.exists(osp.join(directory_path, "origins", EXTRACTED_MARKER)):
                 self.importDirImages(origins_images_dir)
-                return True
+            elif self._config["video"]["direct"]:
+                self.openVideo(filename, origins_images_dir)
             else:
-                # video-toimg 실행해서 origins/images 안에 프레임 저장
-                os.system(f'video-toimg "{filename}"')
-                default_image_dir = os.path.join(directory_path)  # video-toimg가 여기에 저장한다고 가정
-                image_files = glob.glob(os.path.join(default_image_dir, "*.jpg"))  # 또는 png 등
-
-                for img_file in image_files:
-                    shutil.move(img_file, os.path.join(origins_images_dir, os.path.basename(img_file)))
                 self.importDirImages(origins_images_dir)
-                return True
+                self.startVideoExtraction(filename, origins_images_dir)
+            return True
 
-        if not QtCore.QFile.exists(filename):
+        if not QtCore.QFile.exists(filename) and not (
+            self._frame_source is not None and self._frame_source.hasFilename(filename)
+        ):
             self.errorMessage(
                 self.tr("Error opening file"),
                 self.tr("No such file: <b>%s</b>") % filename,
             )
             return False
         # assumes same name, but json extension
+        image = QtGui.QImage()
+        tiled_image = None
         self.status(str(self.tr("Loading %s...")) % osp.basename(str(filename)))
         self.labelPath=osp.dirname(osp.dirname(osp.dirname(filename)))
         label_file = self.labelPath + "/annotations/labelme_jsons/"+osp.basename(filename)[:-4]+".json"
@@ -1796,9 +1906,11 @@ class MainWindow(QtWidgets.QMainWindow):
             label_file_without_path = osp.basename(label_file)
             label_file = osp.join(self.output_dir, label_file_without_path)
 
+        if self._save_queue.isPending(label_file):
+            self._save_queue.waitForDone()  # read what was last saved
         if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file):
             try:
-                self.labelFile = LabelFile(label_file)
+                self.labelFile = LabelFile(label_file, load_image=False)
             except LabelFileError as e:
                 self.errorMessage(
                     self.tr("Error opening file"),
@@ -1813,13 +1925,22 @@ class MainWindow(QtWidgets.QMainWindow):
             self.imageData = self.labelFile.imageData
             self.imagePath = osp.normpath(self.labelPath+self.labelFile.imagePath)
             self.otherData = self.labelFile.otherData
-        else:
-            self.imageData = LabelFile.load_image_file(filename)
             if self.imageData:
+                image = QtGui.QImage.fromData(self.imageData)
+            else:
+                tiled_image = self._openTiledImage(self.imagePath)
+                if tiled_image is None:
+                    self.imageData, image = self._frame_prefetcher.load(
+                        self.imagePath
+                    )
+        else:
+            tiled_image = self._openTiledImage(filename)
+            if tiled_image is None:
+                self.imageData, image = self._frame_prefetcher.load(filename)
+            if not image.isNull() or tiled_image is not None:
                 self.imagePath = filename
             self.labelFile = None
-        image = QtGui.QImage.fromData(self.imageData)
-        if image.isNull():
+        if tiled_image is None and image.isNull():
             formats = [
                 "*.{}".format(fmt.data().decode())
                 for fmt in QtGui.QImageReader.supportedImageFormats()
@@ -1837,7 +1958,12 @@ class MainWindow(QtWidgets.QMainWindow):
         self.filename = filename
         if self._config["keep_prev"]:
             prev_shapes = self.canvas.shapes
-        self.canvas.loadPixmap(QtGui.QPixmap.fromImage(image))
+        if tiled_image is not None:
+            self.canvas.loadTiledImage(tiled_image)
+            if self.canvas.createMode in ["ai_polygon", "ai_mask"]:
+                self.setEditMode()
+        else:
+            self.canvas.loadPixmap(QtGui.QPixmap.fromImage(image))
         flags = {k: False for k in self._config["flags"] or []}
         if self.labelFile:
             self.loadLabels(self.labelFile.shapes)
@@ -1866,8 +1992,19 @@ class MainWindow(QtWidgets.QMainWindow):
                     orientation, self.scroll_values[orientation][self.filename]
                 )
         # set brightness contrast values
+        if tiled_image is None:
+            self._restoreBrightnessContrast()
+        self.paintCanvas()
+        self.addRecentFile(self.filename)
+        self.toggleActions(True)
+        self.canvas.setFocus()
+        self.status(str(self.tr("Loaded %s")) % osp.basename(str(filename)))
+        self.prefetchFrames()
+        return True
+
+    def _restoreBrightnessContrast(self):
         dialog = BrightnessContrastDialog(
-            utils.img_data_to_pil(self.imageData),
+            utils.img_data_to_pil(self._currentImageData()),
             self.onNewBrightnessContrast,
             parent=self,
         )
@@ -1889,24 +2026,106 @@ class MainWindow(QtWidgets.QMainWindow):
         self.brightnessContrast_values[self.filename] = (brightness, contrast)
         if brightness is not None or contrast is not None:
             dialog.onNewValue(None)
-        self.paintCanvas()
-        self.addRecentFile(self.filename)
-        self.toggleActions(True)
-        self.canvas.setFocus()
-        self.status(str(self.tr("Loaded %s")) % osp.basename(str(filename)))
-        return True
+
+    def _currentImageData(self):
+        # frames decoded from a video are only encoded once the bytes are needed
+        if self.imageData is None and self._frame_source is not None:
+            self.imageData = self._frame_source.imageData(self.imagePath)
+        return self.imageData
+
+    def _isTiledImage(self, filename):
+        """Return whether an image is too large to be loaded whole."""
+        if filename in self._frame_cache or (
+            self._frame_source is not None and self._frame_source.hasFilename(filename)
+        ):
+            return False
+        try:
+            width, height = read_image_size(filename)
+        except (OSError, ValueError):
+            return False
+        return width * height >= self._config["tiled_image"]["min_megapixels"] * 1e6
+
+    def _openTiledImage(self, filename):
+        if not self._isTiledImage(filename):
+            return None
+        config = self._config["tiled_image"]
+        logger.debug("Opening {} as a tiled image", filename)
+        return TiledImage(
+            filename,
+            tile_size=config["tile_size"],
+            max_cache_bytes=config["cache_megabytes"] * 1024 * 1024,
+            max_level_bytes=config["level_cache_megabytes"] * 1024 * 1024,
+        )
+
+    def prefetchFrames(self):
+        """Decode the neighbours of the current image in the background."""
+        imageList = self.imageList
+        currIndex = self.fileListModel.rowOf(self.filename)
+        if currIndex == -1:
+            return
+        num_next = self._config["frame_cache"]["prefetch_next"]
+        num_prev = self._config["frame_cache"]["prefetch_prev"]
+        d = self._frame_direction
+        indices = [currIndex + d * i for i in range(1, num_next + 1)]
+        indices += [currIndex - d * i for i in range(1, num_prev + 1)]
+        # large images are left out by the prefetch workers, which read the
+        # image headers so that the GUI thread does not
+        self._frame_prefetcher.prefetch(
+            [imageList[i] for i in indices if 0 <= i < len(imageList)]
+        )
+        logger.debug("Frame cache: {}", self._frame_cache.stats())
+        self.prefetchImageEmbeddings()
+
+    def initializeAiModel(self, model_name):
+        self.canvas.initializeAiModel(model_name=model_name)
+        self.prefetchImageEmbeddings()
+
+    def prefetchImageEmbeddings(self):
+        """Encode the current and the next images for the AI model in use."""
+        if (
+            self.canvas.createMode not in ["ai_polygon", "ai_mask"]
+            or self.canvas.aiModel is None
+        ):
+            self._embedding_scheduler.cancel()
+            return
+        imageList = self.imageList
+        currIndex = self.fileListModel.rowOf(self.filename)
+        if currIndex == -1:
+            return
+        num_next = self._config["ai"]["prefetch_embeddings"]
+        filenames = imageList[currIndex : currIndex + num_next + 1]
+        self._embedding_scheduler.schedule(
+            self.canvas.aiModel,
+            [
+                (filename, functools.partial(self._loadEmbeddingImage, filename))
+                for filename in filenames
+            ],
+        )
+        logger.debug("Embedding scheduler: {}", self._embedding_scheduler.stats())
+
+    def _loadEmbeddingImage(self, filename):
+        # shares decoded frames with the frame cache; runs off the GUI thread
+        if self._isTiledImage(filename):
+            return None  # too large to be encoded whole
+        _, image = self._frame_prefetcher.load(filename)
+        if image.isNull():
+            return None
+        return image_from_qimage(image)
 
     def resizeEvent(self, event):
         if (
             self.canvas
-            and not self.image.isNull()
+            and self._hasImage()
             and self.zoomMode != self.MANUAL_ZOOM
         ):
             self.adjustScale()
         super(MainWindow, self).resizeEvent(event)
 
+    def _hasImage(self):
+        return not self.image.isNull() or self.canvas.tiledImage() is not None
+
     def paintCanvas(self):
-        assert not self.image.isNull(), "cannot paint null image"
+        assert self._hasImage(), "cannot paint null image"
         self.canvas.scale = 0.01 * self.zoomWidget.value()
         self.canvas.adjustSize()
         self.canvas.update()
@@ -1924,15 +2143,15 @@ class MainWindow(QtWidgets.QMainWindow):
         h1 = self.centralWidget().height() - e
         a1 = w1 / h1
         # Calculate a new scale value based on the pixmap's aspect ratio.
-        w2 = self.canvas.pixmap.width() - 0.0
-        h2 = self.canvas.pixmap.height() - 0.0
+        w2 = self.canvas.imageSize().width() - 0.0
+        h2 = self.canvas.imageSize().height() - 0.0
         a2 = w2 / h2
         return w1 / w2 if a2 >= a1 else h1 / h2
 
     def scaleFitWidth(self):
         # The epsilon does not seem to work too well here.
         w = self.centralWidget().width() - 2.0
-        return w / self.canvas.pixmap.width()
+        return w / self.canvas.imageSize().width()
 
     def enableSaveImageWithData(self, enabled):
         self._config["store_data"] = enabled
@@ -1941,6 +2160,18 @@ class MainWindow(QtWidgets.QMainWindow):
     def closeEvent(self, event):
         if not self.mayContinue():
             event.ignore()
+            return
+        # the window is really closing: stop the background work
+        self._save_queue.waitForDone()
+        if self._exporter is not None:
+            # only here, past the save changes prompt: a canceled close must
+            # not throw away a long running export
+            self._exporter.cancel()
+            self._exporter.waitForDone()
+        self._frame_prefetcher.cancel()
+        self._embedding_scheduler.cancel()
+        self.stopVideoExtraction()
+        self.closeFrameSource()
         self.settings.setValue("filename", self.filename if self.filename else "")
         self.settings.setValue("window/size", self.size())
         self.settings.setValue("window/position", self.pos())
@@ -1985,13 +2216,14 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.mayContinue():
             return
 
-        if len(self.imageList) <= 0:
+        if self.fileListModel.rowCount() <= 0:
             return
 
         if self.filename is None:
             return
 
-        currIndex = self.imageList.index(self.filename)
+        currIndex = self.fileListModel.rowOf(self.filename)
+        self._frame_direction = -1
         if currIndex - 1 >= 0:
             filename = self.imageList[currIndex - 1]
             self.scrollbar_dir.setValue(currIndex-1)
@@ -2011,15 +2243,16 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.mayContinue():
             return
 
-        if len(self.imageList) <= 0:
+        if self.fileListModel.rowCount() <= 0:
             return
 
         filename = None
+        self._frame_direction = 1
         if self.filename is None:
             filename = self.imageList[0]
             self.scrollbar_dir.setValue(0)
         else:
-            currIndex = self.imageList.index(self.filename)
+            currIndex = self.fileListModel.rowOf(self.filename)
             self.scrollbar_dir.setValue(currIndex+1)
             if currIndex + 1 < len(self.imageList):
                 filename = self.imageList[currIndex + 1]
@@ -2057,8 +2290,8 @@ class MainWindow(QtWidgets.QMainWindow):
         if fileDialog.exec_():
             fileName = fileDialog.selectedFiles()[0]
             if fileName:
-                self.fileListWidget.setCurrentRow(-1)
-                self.fileListWidget.repaint()
+                self.fileListView.setCurrentRow(-1)
+                self.fileListView.repaint()
                 self.loadFile(fileName)
 
 
@@ -2092,13 +2325,15 @@ class MainWindow(QtWidgets.QMainWindow):
         current_filename = self.filename
         self.importDirImages(self.lastOpenDir, load=False)
 
-        if current_filename in self.imageList:
+        if self.fileListModel.hasFilename(current_filename):
             # retain currently selected file
-            self.fileListWidget.setCurrentRow(self.imageList.index(current_filename))
-            self.fileListWidget.repaint()
+            self.fileListView.setCurrentRow(
+                self.fileListModel.rowOf(current_filename)
+            )
+            self.fileListView.repaint()
 
     def saveFile(self, _value=False):
-        assert not self.image.isNull(), "cannot save empty image"
+        assert self._hasImage(), "cannot save empty image"
         if self.labelFile:
             # DL20180323 - overwrite when in directory
             self._saveFile(self.labelFile.filename)
@@ -2109,7 +2344,7 @@ class MainWindow(QtWidgets.QMainWindow):
             self._saveFile(self.saveFileDialog())
 
     def saveFileAs(self, _value=False):
-        assert not self.image.isNull(), "cannot save empty image"
+        assert self._hasImage(), "cannot save empty image"
         self._saveFile(self.saveFileDialog())
 
     def saveFileDialog(self):
@@ -2179,8 +2414,7 @@ class MainWindow(QtWidgets.QMainWindow):
             os.remove(label_file)
             logger.info("Label file is removed: {}".format(label_file))
 
-            item = self.fileListWidget.currentItem()
-            item.setCheckState(Qt.Unchecked)
+            self.fileListModel.setChecked(self.filename, False)
 
             self.resetState()
 
@@ -2290,11 +2524,8 @@ class MainWindow(QtWidgets.QMainWindow):
 
     @property
     def imageList(self):
-        lst = []
-        for i in range(self.fileListWidget.count()):
-            item = self.fileListWidget.item(i)
-            lst.append(item.text())
-        return lst
+        # read-only view; use fileListModel.rowOf() for lookups
+        return self.fileListModel.filenames()
 
     def importDroppedImageFiles(self, imageFiles):
         extensions = [
@@ -2303,22 +2534,24 @@ class MainWindow(QtWidgets.QMainWindow):
         ]
 
         self.filename = None
+        files = []
+        checked = []
         for file in imageFiles:
-            if file in self.imageList or not file.lower().endswith(tuple(extensions)):
+            if self.fileListModel.hasFilename(file) or not file.lower().endswith(
+                tuple(extensions)
+            ):
                 continue
             label_file = osp.splitext(file)[0] + ".json"
             if self.output_dir:
                 label_file_without_path = osp.basename(label_file)
                 label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(file)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
+            files.append(file)
+            checked.append(
+                QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file)
+            )
+        self.fileListModel.appendFilenames(files, checked)
 
-        if len(self.imageList) > 1:
+        if self.fileListModel.rowCount() > 1:
             self.actions.openNextImg.setEnabled(True)
             self.actions.openPrevImg.setEnabled(True)
 
@@ -2334,11 +2567,24 @@ class MainWindow(QtWidgets.QMainWindow):
         if not self.mayContinue() or not dirpath:
             return
 
+        if dirpath != self.lastOpenDir:
+            self._frame_prefetcher.cancel()
+            self._frame_cache.clear()
+        if (
+            self._video_extractor is not None
+            and self._video_extractor.output_dir != dirpath
+        ):
+            self.stopVideoExtraction()
+        if self._frame_source is not None and self._frame_source.output_dir != dirpath:
+            self.closeFrameSource()
         self.lastOpenDir = dirpath
         self.filename = None
-        self.fileListWidget.clear()
+        self.fileListModel.clear()
 
-        filenames = self.scanAllImages(dirpath)
+        if self._frame_source is not None:
+            filenames = self._frame_source.filenames()
+        else:
+            filenames = self.scanAllImages(dirpath)
 
         if pattern:
             try:
@@ -2347,35 +2593,151 @@ class MainWindow(QtWidgets.QMainWindow):
                 pass
 
         if filenames:
-            self.image_frames = filenames  
+            # valueChanged is connected to updateFrame once in __init__, and
+            # the list is still empty here, so this does not load a frame.
             self.scrollbar_dir.setVisible(True)
-            self.scrollbar_dir.setRange(0, len(filenames) - 1)  
-            self.scrollbar_dir.setValue(0) 
-            
-            self.scrollbar_dir.valueChanged.connect(self.updateFrame)
-            
-            self.updateFrame(0)
+            self.scrollbar_dir.setRange(0, len(filenames) - 1)
+            self.scrollbar_dir.setValue(0)
         else:
             self.scrollbar_dir.setVisible(False)
 
-        for filename in filenames:
-            label_file = osp.splitext(filename)[0] + ".json"
-            if self.output_dir:
-                label_file_without_path = osp.basename(label_file)
-                label_file = osp.join(self.output_dir, label_file_without_path)
-            item = QtWidgets.QListWidgetItem(filename)
-            item.setFlags(Qt.ItemIsEnabled | Qt.ItemIsSelectable)
-            if QtCore.QFile.exists(label_file) and LabelFile.is_label_file(label_file):
-                item.setCheckState(Qt.Checked)
-            else:
-                item.setCheckState(Qt.Unchecked)
-            self.fileListWidget.addItem(item)
+        # Check states are filled in once the label directory has been listed
+        # in the background, so rows show up before any label file is probed.
+        self._import_generation += 1
+        self._import_label_names = None
+        QtCore.QThreadPool.globalInstance().start(
+            _LabelScanRunnable(
+                self.labelNamesScanned,
+                self._import_generation,
+                self.labelDirPath(dirpath),
+            )
+        )
+        self._importDirImagesChunk(self._import_generation, filenames, 0)
 
         self.openNextImg(load=load)
 
+    def labelDirPath(self, dirpath):
+        if self.output_dir:
+            return self.output_dir
+        # <project>/origins/images -> <project>/annotations/labelme_jsons
+        return osp.join(
+            osp.dirname(osp.dirname(dirpath)), "annotations", "labelme_jsons"
+        )
+
+    def _isLabeled(self, filename):
+        return (
+            self._import_label_names is not None
+            and osp.splitext(osp.basename(filename))[0] in self._import_label_names
+        )
+
+    def _importDirImagesChunk(self, generation, filenames, start):
+        if generation != self._import_generation:
+            return  # superseded by another import
+        chunk = filenames[start : start + IMPORT_CHUNK_SIZE]
+        self.fileListModel.appendFilenames(
+            chunk, [self._isLabeled(filename) for filename in chunk]
+        )
+        if start + IMPORT_CHUNK_SIZE < len(filenames):
+            QtCore.QTimer.singleShot(
+                0,
+                functools.partial(
+                    self._importDirImagesChunk,
+                    generation,
+                    filenames,
+                    start + IMPORT_CHUNK_SIZE,
+                ),
+            )
+
+    def _onLabelNamesScanned(self, generation, label_names):
+        if generation != self._import_generation:
+            return
+        self._import_label_names = label_names
+        self.fileListModel.markChecked(self._isLabeled)
+
+    def openVideo(self, video_file, output_dir):
+        """Navigate the frames of video_file without extracting them."""
+        self.stopVideoExtraction()
+        self.closeFrameSource()
+        try:
+            self._frame_source = VideoFrameSource(
+                video_file,
+                output_dir,
+                frame_stride=self._config["video"]["frame_stride"],
+                start_time=self._config["video"]["start_time"],
+                end_time=self._config["video"]["end_time"],
+                ring_size=self._config["video"]["ring_size"],
+            )
+        except IOError as e:
+            self.errorMessage(self.tr("Error opening file"), str(e))
+            return
+        self._frame_prefetcher.loader = self._frame_source.load
+        self.importDirImages(output_dir)
+
+    def closeFrameSource(self):
+        if self._frame_source is None:
+            return
+        self._frame_prefetcher.cancel()
+        self._frame_prefetcher.loader = load_frame
+        self._frame_source.close()
+        self._frame_source = None
+
+    def startVideoExtraction(self, video_file, output_dir):
+        if (
+            self._video_extractor is not None
+            and self._video_extractor.output_dir == output_dir
+        ):
+            return  # already extracting into this directory
+        self.stopVideoExtraction()
+        self._video_extractor = VideoFrameExtractor(
+            video_file,
+            output_dir,
+            frame_stride=self._config["video"]["frame_stride"],
+            start_time=self._config["video"]["start_time"],
+            end_time=self._config["video"]["end_time"],
+            parent=self,
+        )
+        self._video_extractor.framesExtracted.connect(self._onVideoFramesExtracted)
+        self._video_extractor.extractionFailed.connect(self._onVideoExtractionFailed)
+        self._video_extractor.finished.connect(self._onVideoExtractionFinished)
+        self._video_extractor.start()
+        self.status(self.tr("Extracting frames from %s...") % osp.basename(video_file))
+
+    def stopVideoExtraction(self):
+        if self._video_extractor is None:
+            return
+        extractor = self._video_extractor
+        self._video_extractor = None
+        extractor.stop()
+        extractor.wait()
+        extractor.deleteLater()
+
+    def _onVideoFramesExtracted(self, filenames):
+        if self.sender() is not self._video_extractor:
+            return  # a stopped extractor flushing its last batch
+        self.fileListModel.appendFilenames(filenames)
+        count = self.fileListModel.rowCount()
+        self.scrollbar_dir.setVisible(True)
+        self.scrollbar_dir.setRange(0, count - 1)
+        self.status(self.tr("Extracting frames... %d") % count)
+        if self.filename is None:
+            self.openNextImg()
+
+    def _onVideoExtractionFailed(self, message):
+        if self.sender() is not self._video_extractor:
+            return
+        self.errorMessage(self.tr("Error extracting video frames"), message)
+
+    def _onVideoExtractionFinished(self):
+        if self.sender() is not self._video_extractor:
+            return
+        self.status(
+            self.tr("Extracted %d frames") % self._video_extractor.num_extracted
+        )
+        self._video_extractor = None
+
     def updateFrame(self, value):
-        if value < len(self.imageList):
-            filename = self.image_frames[value]
+        if value < self.fileListModel.rowCount():
+            filename = self.fileListModel.filenameAt(value)
             if filename:
                 self.loadFile(filename)
     #2025 03 21 bsg Add Mp4_Edit_ScrollBar end 
@@ -2387,15 +2749,11 @@ class MainWindow(QtWidgets.QMainWindow):
         ]
 
         images = []
-        # for root, dirs, files in os.walk(folderPath):
-        for file in os.listdir(folderPath):
-            file_path = osp.join(folderPath, file)
-            # for file in files:
-            #     if file.lower().endswith(tuple(extensions)):
-            #         relativePath = os.path.normpath(osp.join(root, file))
-            #         images.append(relativePath)
-            if osp.isfile(file_path) and file.lower().endswith(tuple(extensions)):
-                images.append(file_path)
+        # one directory listing; DirEntry.is_file() reuses its cached type
+        with os.scandir(folderPath) as entries:
+            for entry in entries:
+                if entry.name.lower().endswith(tuple(extensions)) and entry.is_file():
+                    images.append(entry.path)
         images = natsort.os_sorted(images)
         return images
 
@@ -2464,21 +2822,53 @@ class MainWindow(QtWidgets.QMainWindow):
 
     def zip_dir(self,dir_path):
         zip_path = dir_path+".zip"
-        new_zips = zipfile.ZipFile(zip_path, 'w')
         dir_path = dir_path + '/'
 
+        members = []
         for root, directory, files in os.walk(dir_path):
             for file in files:
                 path = os.path.join(root, file)
-                new_zips.write(path, arcname=os.path.relpath(os.path.join(root, file), dir_path), compress_type=zipfile.ZIP_DEFLATED)
+                members.append((path, os.path.relpath(path, dir_path)))
 
-        new_zips.close()
+        # images are stored as they are, the rest is deflated in parallel
+        stats = write_archive(zip_path, members)
+        logger.info(f"Archived {zip_path}: {stats}")
 
     def openExportDialog(self):
         # dialog = ExportDialog(self)
         # dialog.exec_()
-        exporter = DatasetExporter(self)
-        success = exporter.export()
+        if self._exporter is not None:
+            return  # an export is already running
+        exporter = DatasetExporter(
+            self,
+            coco_gzip=self._config["export"]["coco_gzip"],
+            archive_format=self._config["export"]["archive_format"],
+        )
+        dialog = QtWidgets.QProgressDialog(
+            self.tr("Exporting dataset..."), self.tr("Cancel"), 0, 0, self
+        )
+        dialog.setWindowModality(Qt.WindowModal)
+        dialog.setMinimumDuration(0)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+        dialog.canceled.connect(exporter.cancel)
+        exporter.progress.connect(
+            lambda done, total: (dialog.setMaximum(total), dialog.setValue(done))
+        )
+        exporter.message.connect(lambda message: self.status_bar.showMessage(message, 5000))
+        exporter.finished.connect(
+            lambda success: self._onExportFinished(success, dialog, exporter)
+        )
+        self._exporter = exporter
+        exporter.start()
+
+    def _onExportFinished(self, success, dialog, exporter):
+        dialog.close()
+        # the dialog is parented to the main window and its canceled signal
+        # keeps the exporter (and its thread pool) alive, so both are deleted
+        dialog.deleteLater()
+        exporter.deleteLater()
+        self._exporter = None
         if success:
             print("로컬 데이터셋 Export 완료!")
         else:
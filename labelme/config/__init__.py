@@ -48,6 +48,14 @@ def validate_config_item(key, value):
         raise ValueError(
             "Unexpected value for config key 'shape_color': {}".format(value)
         )
+    if key == "csv_layout" and value not in ["points", "columnar"]:
+        raise ValueError(
+            "Unexpected value for config key 'csv_layout': {}".format(value)
+        )
+    if key == "archive_format" and value not in ["zip", "tar", "tar.zst"]:
+        raise ValueError(
+            "Unexpected value for config key 'archive_format': {}".format(value)
+        )
     if key == "labels" and value is not None and len(value) != len(set(value)):
         raise ValueError(
             "Duplicates are detected for config key 'labels': {}".format(value)
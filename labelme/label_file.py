@@ -5,6 +5,7 @@ import json
 import csv
 import os
 import os.path as osp
+import tempfile
 import cv2
 import numpy as np
 
@@ -17,6 +18,16 @@ import zipfile
 
 PIL.Image.MAX_IMAGE_PIXELS = None
 
+# Formats whose encoded bytes QImage.fromData decodes as-is.
+PASSTHROUGH_IMAGE_FORMATS = ["JPEG", "PNG"]
+# EXIF orientations for which apply_exif_orientation changes the pixels.
+EXIF_TRANSPOSE_ORIENTATIONS = [2, 3, 4, 5, 6, 7, 8]
+
+
+# read once at import, as os.umask can only be read by setting it
+_UMASK = os.umask(0)
+os.umask(_UMASK)
+
 
 @contextlib.contextmanager
 def open(name, mode):
@@ -25,20 +36,43 @@ def open(name, mode):
     yield io.open(name, mode, encoding=encoding)
     return
 
+
+@contextlib.contextmanager
+def atomic_open(name, mode="w"):
+    """Open a temporary file for writing that replaces name once closed.
+
+    Readers never see a half written file, and an error while writing
+    leaves the previous file in place.
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        prefix=osp.basename(name) + ".", suffix=".tmp", dir=osp.dirname(name) or "."
+    )
+    try:
+        encoding = None if "b" in mode else "utf-8"
+        with io.open(fd, mode, encoding=encoding) as f:
+            yield f
+        os.chmod(tmp_name, 0o666 & ~_UMASK)  # mkstemp creates it private
+        os.replace(tmp_name, name)
+    except BaseException:
+        with contextlib.suppress(OSError):
+            os.remove(tmp_name)
+        raise
+
 class LabelFileError(Exception):
     pass
 
 class LabelFile(object):
     suffix = ".json"
 
-    def __init__(self, filename=None):
+    def __init__(self, filename=None, load_image=True):
+        """Load filename, or start empty to only save a new file with save()."""
         self.shapes = []
         self.imagePath = None
         self.imageData = None
-        if filename.endswith(".csv"):
+        if filename is not None and filename.endswith(".csv"):
             LabelFile.suffix=".csv"
         if filename is not None:
-            self.load(filename)
+            self.load(filename, load_image=load_image)
             self.labelPath=osp.dirname(osp.dirname(osp.dirname(filename)))
         else:
             self.labelPath=None
@@ -47,11 +81,20 @@ class LabelFile(object):
     @staticmethod
     def load_image_file(filename):
         try:
-            image_pil = PIL.Image.open(filename)
+            with io.open(filename, "rb") as f:
+                image_data = f.read()
+            image_pil = PIL.Image.open(io.BytesIO(image_data))
         except IOError:
             logger.error("Failed opening image file: {}".format(filename))
             return
 
+        # JPEG/PNG bytes that need no exif transpose already decode to the
+        # image we want to show, so hand them over without a re-encode.
+        if image_pil.format in PASSTHROUGH_IMAGE_FORMATS and (
+            utils.get_exif_orientation(image_pil) not in EXIF_TRANSPOSE_ORIENTATIONS
+        ):
+            return image_data
+
         # apply orientation to image according to exif
         image_pil = utils.apply_exif_orientation(image_pil)
 
@@ -65,7 +108,7 @@ class LabelFile(object):
             f.seek(0)
             return f.read()
 
-    def load(self, filename):
+    def load(self, filename, load_image=True):
         keys = [
             "version",
             "imageData",
@@ -87,13 +130,19 @@ class LabelFile(object):
         if not os.path.exists(filename):
             return
         #2025 03 14 load seperate .json and .csv
-        if LabelFile.suffix==".json":
+        # by the file's own extension: LabelFile.suffix is that of the last
+        # label file opened, which may be of the other kind
+        is_csv = osp.splitext(filename)[1].lower() == ".csv"
+        if not is_csv:
             try:
                 with open(filename, "r") as f:
                     data = json.load(f)
 
                 if data["imageData"] is not None:
                     imageData = base64.b64decode(data["imageData"])
+                elif not load_image:
+                    # the caller resolves imagePath itself (e.g. from a cache)
+                    imageData = None
                 else:
                     self.labelPath=osp.dirname(osp.dirname(osp.dirname(filename)))
                     # relative path from label file to relative path from cwd
@@ -102,11 +151,12 @@ class LabelFile(object):
                     imageData = self.load_image_file(imagePath)
                 flags = data.get("flags") or {}
                 imagePath = data["imagePath"]
-                self._check_image_height_and_width(
-                    base64.b64encode(imageData).decode("utf-8"),
-                    data.get("imageHeight"),
-                    data.get("imageWidth"),
-                )
+                if imageData is not None:
+                    self._check_image_height_and_width(
+                        imageData,
+                        data.get("imageHeight"),
+                        data.get("imageWidth"),
+                    )
                 shapes = [
                     dict(
                         label=s["label"],
@@ -137,74 +187,95 @@ class LabelFile(object):
             self.imageData = imageData
             self.filename = filename
             self.otherData = otherData
-        elif LabelFile.suffix==".csv":
+        else:
             try:
-                with open(filename, "r") as f:
-                    reader = csv.DictReader(f)
-                    
-                    shapes = []
-                    flags = {}
-                    description = ""
-                    imagePath = None
-                    imageHeight = None
-                    imageWidth = None
-                    imageData = None
-
-                    for row in reader:
-                        points = json.loads(row["points"]) if row["points"] else []
-
-                        flags = json.loads(row["flags"]) if row["flags"] else {}
-
-                        description = json.loads(row["description"]) if row["description"] else ""
-
-                        mask = json.loads(row["mask"]) if row["mask"] else None
-                        
-                        shape = {
-                            "label": row["label"],
-                            "points": points,
-                            "shape_type": row["shape_type"],
-                            "description": description,
-                            "flags": flags,
-                            "group_id": int(row["group_id"]) if row["group_id"] else None,
-                            "mask": mask,
-                        }
-                        shapes.append(shape)
-
-                        if not imagePath:
-                            imagePath = row["imagePath"]
-                        imagePath = osp.join(osp.dirname(filename), imagePath)
-                        imageData = self.load_image_file(imagePath)
-
+                imagePath, shapes = self._read_csv(filename)
+                imageData = None
+                if load_image and imagePath:
+                    # one image per file, however many shapes it has
+                    self.labelPath=osp.dirname(osp.dirname(osp.dirname(filename)))
+                    imageData = self.load_image_file(
+                        os.path.normpath(self.labelPath + imagePath)
+                    )
             except Exception as e:
                 raise LabelFileError(e)
 
-            self.flags = flags
+            self.flags = {}
             self.shapes = shapes
             self.imagePath = imagePath
             self.imageData = imageData
-            # self.imageHeight = imageHeight
-            # self.imageWidth = imageWidth
             self.imageHeight = None
             self.imageWidth = None
             self.filename = filename
             self.otherData = {}
         #2025 03 14 load seperate .json and .csv end 
 
+    @staticmethod
+    def _read_csv(filename):
+        """Read the shapes of a csv label file, in either csv layout.
+
+        Rows are streamed and their points collected as text, then parsed
+        in one go for the whole file.
+        """
+        shapes = []
+        points_text = []
+        imagePath = None
+        with open(filename, "r") as f:
+            reader = csv.reader(f)
+            header = next(reader, None) or []
+            column = {name: i for i, name in enumerate(header)}
+            columnar = "xs" in column
+            for row in reader:
+                if not row:
+                    continue
+                flags = row[column["flags"]]
+                mask = row[column["mask"]]
+                group_id = row[column["group_id"]]
+                shapes.append(
+                    dict(
+                        label=row[column["label"]],
+                        shape_type=row[column["shape_type"]],
+                        description=row[column["description"]],
+                        flags=json.loads(flags) if flags not in ("", "{}") else {},
+                        group_id=int(group_id) if group_id else None,
+                        mask=utils.img_b64_to_arr(mask).astype(bool) if mask else None,
+                    )
+                )
+                if columnar:
+                    points_text.append((row[column["xs"]], row[column["ys"]]))
+                else:
+                    points_text.append(row[column["points"]] or "[]")
+                if not imagePath:
+                    imagePath = row[column["imagePath"]]
+
+        if columnar:
+            counts = [xs.count(" ") + 1 if xs else 0 for xs, _ in points_text]
+            xs = np.fromstring(" ".join(xs for xs, _ in points_text), sep=" ")
+            ys = np.fromstring(" ".join(ys for _, ys in points_text), sep=" ")
+            points = np.split(np.stack([xs, ys], axis=1), np.cumsum(counts)[:-1])
+            points = [p.tolist() for p in points]
+        else:
+            points = json.loads("[" + ",".join(points_text) + "]")
+        for shape, shape_points in zip(shapes, points):
+            shape["points"] = shape_points
+        return imagePath, shapes
+
     @staticmethod
     def _check_image_height_and_width(imageData, imageHeight, imageWidth):
-        img_arr = utils.img_b64_to_arr(imageData)
-        if imageHeight is not None and img_arr.shape[0] != imageHeight:
+        # only the image header is read, the pixels are not decoded
+        actualWidth, actualHeight = utils.img_data_to_size(imageData)
+        if imageHeight is not None and actualHeight != imageHeight:
             logger.error(
                 "imageHeight does not match with imageData or imagePath, "
                 "so getting imageHeight from actual image."
             )
-            imageHeight = img_arr.shape[0]
-        if imageWidth is not None and img_arr.shape[1] != imageWidth:
+            imageHeight = actualHeight
+        if imageWidth is not None and actualWidth != imageWidth:
             logger.error(
                 "imageWidth does not match with imageData or imagePath, "
                 "so getting imageWidth from actual image."
             )
-            imageWidth = img_arr.shape[1]
+            imageWidth = actualWidth
         return imageHeight, imageWidth
 
     def save(
@@ -217,13 +288,14 @@ class LabelFile(object):
         imageData=None,
         otherData=None,
         flags=None,
+        csv_layout="points",
     ):
         logger.info(f"bsg -------------- save -------------------- filename : {filename}\n")
         if imageData is not None:
-            imageData = base64.b64encode(imageData).decode("utf-8")
             imageHeight, imageWidth = self._check_image_height_and_width(
                 imageData, imageHeight, imageWidth
             )
+            imageData = base64.b64encode(imageData).decode("utf-8")
         if otherData is None:
             otherData = {}
         if flags is None:
@@ -243,14 +315,15 @@ class LabelFile(object):
                 assert key not in data
                 data[key] = value
             try:
-                with open(filename, "w") as f:
+                with atomic_open(filename) as f:
                     json.dump(data, f, ensure_ascii=False, indent=2)
                 self.filename = filename
             except Exception as e:
                 raise LabelFileError(e)
 
         elif filename.endswith(".csv"):
-            self.save_csv(filename,data)
+            self.save_csv(filename,data,layout=csv_layout)
+            self.filename = filename
         #2025 03 13 seperate .json and .csv end
 
     @staticmethod
@@ -268,7 +341,14 @@ class LabelFile(object):
     #2025 03 13 csv type recognize end
 
     #2025 03 13 save csv file
-    def save_csv(self, filename, json_data):
+    def save_csv(self, filename, json_data, layout="points"):
+        """Write the shapes one per row.
+
+        The points are a json list in the "points" layout, and space
+        separated x and y coordinates in the "columnar" layout, which is
+        faster to read and write.
+        """
+        assert layout in ["points", "columnar"]
         data = {
             "version": json_data.get('version', 'unknown'),
             "flags": json_data.get('flags', {}),
@@ -280,18 +360,26 @@ class LabelFile(object):
             # "imageData" : json_data.get('imageData',''),
 
         try:
-            with open(filename, mode="w") as file:
+            with atomic_open(filename) as file:
                 writer = csv.writer(file)
 
-                writer.writerow(["label", "points", "group_id","description", "shape_type", "flags", "mask","imagePath"])#, "imageHeight", "imageWidth","imageData"])
+                points_columns = ["points"] if layout == "points" else ["xs", "ys"]
+                writer.writerow(["label"] + points_columns + ["group_id","description", "shape_type", "flags", "mask","imagePath"])#, "imageHeight", "imageWidth","imageData"])
 
                 for index, shape in enumerate(data["shapes"]):
                     points = shape.get("points", [])
                     flags = shape.get("flags", {})
-                    
+                    if layout == "points":
+                        points_values = [json.dumps(points)]
+                    else:
+                        points_values = [
+                            " ".join(repr(float(point[0])) for point in points),
+                            " ".join(repr(float(point[1])) for point in points),
+                        ]
+
                     writer.writerow([
                         shape["label"],
-                        json.dumps(points),
+                        *points_values,
                         shape["group_id"],
                         shape["description"],
                         shape["shape_type"],
@@ -305,7 +393,7 @@ class LabelFile(object):
                 
             logger.warning(f"CSV file save : {filename}")
         except Exception as e:
-            logger.error(f"CSV file save error : {e}")
+            raise LabelFileError(e)
     #2025 03 13 bsg save csv file end
 
     
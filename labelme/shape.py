@@ -72,12 +72,44 @@ class Shape(object):
 
         self._closed = False
 
+        # (mask, key, value) of what was last rendered for self.mask
+        self._mask_image_cache = None
+        self._mask_path_cache = None
+
         if line_color is not None:
             # Override the class line_color attribute
             # with an object attribute. Currently this
             # is used for drawing the pending line a different color.
             self.line_color = line_color
 
+    def __getstate__(self):
+        # QImage/QPainterPath do not copy; caches are rebuilt on next paint
+        state = self.__dict__.copy()
+        state["_mask_image_cache"] = None
+        state["_mask_path_cache"] = None
+        return state
+
+    @property
+    def points(self):
+        return self._points
+
+    @points.setter
+    def points(self, value):
+        self._points = value
+        self._coords = None
+
+    def coords(self) -> np.ndarray:
+        """Return the points as a contiguous (N, 2) float64 array.
+
+        The array is built on first use and kept in sync by the methods that
+        edit points; do not modify it.
+        """
+        if self._coords is None or len(self._coords) != len(self._points):
+            self._coords = np.array(
+                [(p.x(), p.y()) for p in self._points], dtype=np.float64
+            ).reshape(-1, 2)
+        return self._coords
+
     def _scale_point(self, point: QtCore.QPointF) -> QtCore.QPointF:
         return QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
 
@@ -124,6 +156,7 @@ class Shape(object):
         else:
             self.points.append(point)
             self.point_labels.append(label)
+            self._coords = None
 
     def canAddPoint(self):
         return self.shape_type in ["polygon", "linestrip"]
@@ -132,12 +165,15 @@ class Shape(object):
         if self.points:
             if self.point_labels:
                 self.point_labels.pop()
+            self._coords = None
             return self.points.pop()
         return None
 
     def insertPoint(self, i, point, label=1):
         self.points.insert(i, point)
         self.point_labels.insert(i, label)
+        if self._coords is not None:
+            self._coords = np.insert(self._coords, i, (point.x(), point.y()), axis=0)
 
     def removePoint(self, i):
         if not self.canAddPoint():
@@ -165,6 +201,8 @@ class Shape(object):
 
         self.points.pop(i)
         self.point_labels.pop(i)
+        if self._coords is not None:
+            self._coords = np.delete(self._coords, i, axis=0)
 
     def isClosed(self):
         return self._closed
@@ -183,33 +221,11 @@ class Shape(object):
         painter.setPen(pen)
 
         if self.mask is not None:
-            image_to_draw = np.zeros(self.mask.shape + (4,), dtype=np.uint8)
-            fill_color = (
-                self.select_fill_color.getRgb()
-                if self.selected
-                else self.fill_color.getRgb()
-            )
-            image_to_draw[self.mask] = fill_color
-            qimage = QtGui.QImage.fromData(labelme.utils.img_arr_to_data(image_to_draw))
-            qimage = qimage.scaled(
-                qimage.size() * self.scale,
-                QtCore.Qt.IgnoreAspectRatio,
-                QtCore.Qt.SmoothTransformation,
+            fill_color = self.select_fill_color if self.selected else self.fill_color
+            painter.drawImage(
+                self._scale_point(point=self.points[0]), self._maskImage(fill_color)
             )
-
-            painter.drawImage(self._scale_point(point=self.points[0]), qimage)
-            line_path = QtGui.QPainterPath()
-            contours = skimage.measure.find_contours(np.pad(self.mask, pad_width=1))
-            for contour in contours:
-                contour += [self.points[0].y(), self.points[0].x()]
-                line_path.moveTo(
-                    self._scale_point(QtCore.QPointF(contour[0, 1], contour[0, 0]))
-                )
-                for point in contour[1:]:
-                    line_path.lineTo(
-                        self._scale_point(QtCore.QPointF(point[1], point[0]))
-                    )
-            painter.drawPath(line_path)
+            painter.drawPath(self._maskPath())
 
         if self.points:
             line_path = QtGui.QPainterPath()
@@ -276,6 +292,54 @@ class Shape(object):
             painter.drawPath(negative_vrtx_path)
             painter.fillPath(negative_vrtx_path, QtGui.QColor(255, 0, 0, 255))
 
+    def _maskImage(self, fill_color):
+        """Return the mask colored with fill_color at the current scale."""
+        key = (fill_color.rgba(), self.scale)
+        cache = self._mask_image_cache
+        if cache is not None and cache[0] is self.mask and cache[1] == key:
+            return cache[2]
+
+        height, width = self.mask.shape
+        image_to_draw = np.zeros((height, width, 4), dtype=np.uint8)
+        image_to_draw[self.mask] = fill_color.getRgb()
+        # convertToFormat copies, so the QImage does not outlive its buffer
+        qimage = QtGui.QImage(
+            image_to_draw.data, width, height, width * 4, QtGui.QImage.Format_RGBA8888
+        ).convertToFormat(QtGui.QImage.Format_ARGB32_Premultiplied)
+        if self.scale != 1:
+            qimage = qimage.scaled(
+                qimage.size() * self.scale,
+                QtCore.Qt.IgnoreAspectRatio,
+                QtCore.Qt.SmoothTransformation,
+            )
+        self._mask_image_cache = (self.mask, key, qimage)
+        return qimage
+
+    def _maskPath(self):
+        """Return the contour of the mask, placed and scaled for painting."""
+        key = (self.points[0].x(), self.points[0].y(), self.scale)
+        cache = self._mask_path_cache
+        if cache is not None and cache[0] is self.mask:
+            if cache[2] == key:
+                return cache[3]
+            contours = cache[1]  # only moved or rescaled
+        else:
+            contours = [
+                contour[:, ::-1]  # yx -> xy
+                for contour in skimage.measure.find_contours(
+                    np.pad(self.mask, pad_width=1)
+                )
+            ]
+
+        line_path = QtGui.QPainterPath()
+        for contour in contours:
+            contour = (contour + [key[0], key[1]]) * self.scale
+            line_path.addPolygon(
+                QtGui.QPolygonF([QtCore.QPointF(x, y) for x, y in contour])
+            )
+        self._mask_path_cache = (self.mask, contours, key, line_path)
+        return line_path
+
     def drawVertex(self, path, i):
         d = self.point_size
         shape = self.point_type
@@ -295,32 +359,48 @@ class Shape(object):
             assert False, "unsupported vertex shape"
 
     def nearestVertex(self, point, epsilon):
-        min_distance = float("inf")
-        min_i = None
-        point = QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
-        for i, p in enumerate(self.points):
-            p = QtCore.QPointF(p.x() * self.scale, p.y() * self.scale)
-            dist = labelme.utils.distance(p - point)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                min_i = i
-        return min_i
+        coords = self.coords()
+        if len(coords) == 0:
+            return None
+        # distances are compared in widget pixels, i.e. scaled by self.scale
+        dist = np.hypot(coords[:, 0] - point.x(), coords[:, 1] - point.y())
+        i = int(np.argmin(dist))
+        if dist[i] * self.scale <= epsilon:
+            return i
+        return None
 
     def nearestEdge(self, point, epsilon):
-        min_distance = float("inf")
-        post_i = None
-        point = QtCore.QPointF(point.x() * self.scale, point.y() * self.scale)
-        for i in range(len(self.points)):
-            start = self.points[i - 1]
-            end = self.points[i]
-            start = QtCore.QPointF(start.x() * self.scale, start.y() * self.scale)
-            end = QtCore.QPointF(end.x() * self.scale, end.y() * self.scale)
-            line = [start, end]
-            dist = labelme.utils.distancetoline(point, line)
-            if dist <= epsilon and dist < min_distance:
-                min_distance = dist
-                post_i = i
-        return post_i
+        coords = self.coords()
+        if len(coords) == 0:
+            return None
+        # edge i runs from point i - 1 to point i, as in the polygon path
+        start = np.roll(coords, 1, axis=0)
+        edge = coords - start
+        p = np.array([point.x(), point.y()])
+        to_start = p - start
+        to_end = p - coords
+        length = np.hypot(edge[:, 0], edge[:, 1])
+        dist_start = np.hypot(to_start[:, 0], to_start[:, 1])
+        dist_end = np.hypot(to_end[:, 0], to_end[:, 1])
+        with np.errstate(divide="ignore", invalid="ignore"):
+            dist_line = (
+                np.abs(edge[:, 0] * to_start[:, 1] - edge[:, 1] * to_start[:, 0])
+                / length
+            )
+        # same cases as labelme.utils.distancetoline
+        dist = np.where(
+            np.einsum("ij,ij->i", to_start, edge) < 0,
+            dist_start,
+            np.where(
+                np.einsum("ij,ij->i", to_end, edge) > 0,
+                dist_end,
+                np.where(length == 0, dist_start, dist_line),
+            ),
+        )
+        i = int(np.argmin(dist))
+        if dist[i] * self.scale <= epsilon:
+            return i
+        return None
 
     def containsPoint(self, point):
         if self.mask is not None:
@@ -357,10 +437,15 @@ class Shape(object):
         return self.makePath().boundingRect()
 
     def moveBy(self, offset):
+        coords = self._coords
         self.points = [p + offset for p in self.points]
+        if coords is not None:
+            self._coords = coords + (offset.x(), offset.y())
 
     def moveVertexBy(self, i, offset):
         self.points[i] = self.points[i] + offset
+        if self._coords is not None:
+            self._coords[i] = (self.points[i].x(), self.points[i].y())
 
     def highlightVertex(self, i, action):
         """Highlight a vertex appropriately based on the current action
@@ -388,3 +473,4 @@ class Shape(object):
 
     def __setitem__(self, key, value):
         self.points[key] = value
+        self._coords = None
@@ -3,12 +3,14 @@
 from ._io import lblsave
 
 from .image import apply_exif_orientation
+from .image import get_exif_orientation
 from .image import img_arr_to_b64
 from .image import img_arr_to_data
 from .image import img_b64_to_arr
 from .image import img_data_to_arr
 from .image import img_data_to_pil
 from .image import img_data_to_png_data
+from .image import img_data_to_size
 from .image import img_pil_to_data
 from .image import img_qt_to_arr
 
@@ -23,6 +23,12 @@ def img_data_to_arr(img_data):
     return img_arr
 
 
+def img_data_to_size(img_data):
+    """Return (width, height) of encoded image bytes without decoding pixels."""
+    with PIL.Image.open(io.BytesIO(img_data)) as img_pil:
+        return img_pil.size
+
+
 def img_b64_to_arr(img_b64):
     img_data = base64.b64decode(img_b64)
     img_arr = img_data_to_arr(img_data)
@@ -66,20 +72,26 @@ def img_qt_to_arr(img_qt):
     return img_arr
 
 
-def apply_exif_orientation(image):
+def get_exif_orientation(image):
     try:
         exif = image._getexif()
     except AttributeError:
         exif = None
 
     if exif is None:
-        return image
+        return None
 
     exif = {PIL.ExifTags.TAGS[k]: v for k, v in exif.items() if k in PIL.ExifTags.TAGS}
 
-    orientation = exif.get("Orientation", None)
+    return exif.get("Orientation", None)
 
-    if orientation == 1:
+
+def apply_exif_orientation(image):
+    orientation = get_exif_orientation(image)
+
+    if orientation is None:
+        return image
+    elif orientation == 1:
         # do nothing
         return image
     elif orientation == 2:
@@ -10,6 +10,9 @@ from .color_dialog import ColorDialog
 
 from .file_dialog_preview import FileDialogPreview
 
+from .file_list_model import FileListModel
+from .file_list_model import FileListView
+
 from .label_dialog import LabelDialog
 from .label_dialog import LabelQLineEdit
 
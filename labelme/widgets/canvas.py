@@ -1,15 +1,24 @@
-import collections
+import functools
+import math
 from typing import Optional
 
-import imgviz
 from loguru import logger
 from PyQt5 import QtCore
 from PyQt5 import QtGui
 from PyQt5 import QtWidgets
 
 import osam
-import numpy as np
-from labelme._automation import polygon_from_mask
+from labelme._automation.ai_preview import AiPreviewer
+from labelme._automation.ai_preview import compute_shape_from_points
+from labelme._automation.embedding_cache import EmbeddingCache
+from labelme._automation.embedding_cache import image_from_qimage
+from labelme._automation.embedding_cache import image_key
+from labelme._automation.embedding_scheduler import EmbeddingScheduler
+from labelme._canvas.scaled_pixmap import ScaledPixmapCache
+from labelme._canvas.spatial_index import GridIndex
+from labelme._canvas.undo_history import ShapeHistory
+from labelme._media.tiled_image import TiledImage
+from labelme._media.tiled_image import TileLoader
 import labelme.utils
 from labelme.shape import Shape
 
@@ -25,6 +34,9 @@ CURSOR_GRAB = QtCore.Qt.OpenHandCursor
 
 MOVE_SPEED = 5.0
 
+# the zoom is settled once it has not changed for this long
+ZOOM_SETTLE_MSEC = 200
+
 
 class Canvas(QtWidgets.QWidget):
     zoomRequest = QtCore.pyqtSignal(int, QtCore.QPoint)
@@ -50,7 +62,12 @@ class Canvas(QtWidgets.QWidget):
             raise ValueError(
                 "Unexpected value for double_click event: {}".format(self.double_click)
             )
-        self.num_backups = kwargs.pop("num_backups", 10)
+        self.num_backups = kwargs.pop("num_backups", None)
+        self.undo_megabytes = kwargs.pop("undo_megabytes", 64)
+        embedding_cache = kwargs.pop("embedding_cache", None)
+        if embedding_cache is None:
+            embedding_cache = EmbeddingCache(max_bytes=512 * 1024 * 1024)
+        embedding_scheduler = kwargs.pop("embedding_scheduler", None)
         self._crosshair = kwargs.pop(
             "crosshair",
             {
@@ -68,7 +85,13 @@ class Canvas(QtWidgets.QWidget):
         # Initialise local state.
         self.mode = self.EDIT
         self.shapes = []
-        self.shapesBackups = []
+        # bounding boxes of self.shapes, so hovering only tests nearby shapes
+        self._shape_index = GridIndex()
+        # edits to self.shapes, stored AFTER each edit
+        self._history = ShapeHistory(
+            max_bytes=int(self.undo_megabytes * 1024 * 1024),
+            max_edits=self.num_backups,
+        )
         self.current = None
         self.selectedShapes = []  # save the selected shapes here
         self.selectedShapesCopy = []
@@ -106,10 +129,41 @@ class Canvas(QtWidgets.QWidget):
         self.setFocusPolicy(QtCore.Qt.WheelFocus)
 
         self._model: Optional[osam.types.Model] = None
-        self._image_embeddings: collections.OrderedDict[
-            bytes, osam.types.ImageEmbedding
-        ] = collections.OrderedDict()
+        self._image_embeddings: EmbeddingCache = embedding_cache
+        self._image_key: Optional[str] = None  # content hash of self.pixmap
+        if embedding_scheduler is None:
+            embedding_scheduler = EmbeddingScheduler(embedding_cache, parent=self)
+        self._embedding_scheduler: EmbeddingScheduler = embedding_scheduler
+        self._embedding_scheduler.embeddingReady.connect(
+            lambda name, key, elapsed_time: self.imageEmbeddingReady(key)
+        )
         self._ai_model=None
+        # AI inference runs off the GUI thread; paintEvent draws the newest
+        # preview that has come back for the shape being drawn.
+        self._ai_previewer: AiPreviewer = AiPreviewer(parent=self)
+        self._ai_previewer.previewReady.connect(self._onAiPreviewReady)
+        self._ai_preview_key = None  # prompt of the last preview request
+        self._ai_preview = None  # (prompt, (points, mask), Shape) of the newest
+        # image and shapes that are not being edited, composited in paintEvent
+        self._static_layer = None  # (key, QPixmap, masks)
+        # bumped on every shape edit, so the layer key need not look at points
+        self._shapes_generation = 0
+        self._damage = QtGui.QRegion()  # see updateDamage
+        # downscaled copies of self.pixmap, made once the zoom settles; until
+        # then the nearest one is drawn with fast transform
+        self._scaled_pixmaps = ScaledPixmapCache(parent=self)
+        self._scaled_pixmaps.scaledPixmapReady.connect(self.update)
+        self._zooming = False
+        self._painted_scale = None
+        self._zoom_timer = QtCore.QTimer(self)
+        self._zoom_timer.setSingleShot(True)
+        self._zoom_timer.setInterval(ZOOM_SETTLE_MSEC)
+        self._zoom_timer.timeout.connect(self._onZoomSettled)
+        # images too large for a pixmap are drawn from tiles decoded on demand
+        self._tiled_image: Optional[TiledImage] = None
+        self._tile_loader = TileLoader(parent=self)
+        self._tile_loader.tileReady.connect(self._onTileReady)
+        self._tiles_loaded = 0
 
     def fillDrawing(self):
         return self._fill_drawing
@@ -147,35 +201,62 @@ class Canvas(QtWidgets.QWidget):
             logger.warning("bsg initializeAiModel 2222222222222222222222222")
             logger.debug("Initializing AI model {!r}", model_name)
             self._model = osam.apis.get_model_type_by_name(model_name)()
-            self._image_embeddings.clear()
-        #
-        image: np.ndarray = imgviz.asrgb(
-            labelme.utils.img_qt_to_arr(self.pixmap.toImage())
-        )
-        if image.tobytes() not in self._image_embeddings:
-            logger.debug("Computing image embeddings for model {!r}", self._model.name)
-            self._image_embeddings[image.tobytes()] = self._model.encode_image(
-                image=image
-            )
+        # the embedding itself is computed in the background, see
+        # MainWindow.prefetchImageEmbeddings
         self._ai_model = self._model
         logger.warning("bsg initializeAiModel 33333333333333333333")
 
+    @property
+    def aiModel(self) -> Optional[osam.types.Model]:
+        return self._model
+
+    def imageKey(self) -> str:
+        """Return the content hash the pixmap's embeddings are cached by."""
+        if self._image_key is None:
+            self._image_key = image_key(image_from_qimage(self.pixmap.toImage()))
+        return self._image_key
+
+    def getImageEmbedding(
+        self, block: bool = True
+    ) -> Optional[osam.types.ImageEmbedding]:
+        """Return the embedding of the pixmap.
+
+        On a cache miss it is encoded here, unless ``block`` is false, in which
+        case None is returned and the pixmap is queued for encoding in the
+        background (it may not be in the image list, e.g. after a brightness
+        change); imageEmbeddingReady repaints once it is done.
+        """
+        key = self.imageKey()
+        embedding = self._image_embeddings.get(self._model.name, key)
+        if embedding is None and not block:
+            if not self._embedding_scheduler.isPending(key):
+                image = image_from_qimage(self.pixmap.toImage())
+                self._embedding_scheduler.request(self._model, key, lambda: image)
+        elif embedding is None:
+            logger.debug("Computing image embeddings for model {!r}", self._model.name)
+            embedding = self._model.encode_image(
+                image=image_from_qimage(self.pixmap.toImage())
+            )
+            self._image_embeddings.put(self._model.name, key, embedding)
+        return embedding
+
+    def imageEmbeddingReady(self, key):
+        """Repaint once the embedding of the pixmap has been encoded."""
+        if key == self._image_key:
+            self.update()
+
     def storeShapes(self):
-        shapesBackup = []
-        for shape in self.shapes:
-            shapesBackup.append(shape.copy())
-        if len(self.shapesBackups) > self.num_backups:
-            self.shapesBackups = self.shapesBackups[-self.num_backups - 1 :]
-        self.shapesBackups.append(shapesBackup)
+        self._history.store(self.shapes)
+
+    def popShapesBackup(self):
+        """Forget the last stored edit without reverting the shapes."""
+        self._history.discard()
 
     @property
     def isShapeRestorable(self):
-        # We save the state AFTER each edit (not before) so for an
-        # edit to be undoable, we expect the CURRENT and the PREVIOUS state
-        # to be in the undo stack.
-        if len(self.shapesBackups) < 2:
-            return False
-        return True
+        # We save the state AFTER each edit (not before), and the first state
+        # is the baseline, so any recorded edit can be undone.
+        return len(self._history) > 0
 
     def restoreShape(self):
         # This does _part_ of the job of restoring shapes.
@@ -183,12 +264,12 @@ class Canvas(QtWidgets.QWidget):
         # and app.py::loadShapes and our own Canvas::loadShapes function.
         if not self.isShapeRestorable:
             return
-        self.shapesBackups.pop()  # latest
-
-        # The application will eventually call Canvas.loadShapes which will
-        # push this right back onto the stack.
-        shapesBackup = self.shapesBackups.pop()
-        self.shapes = shapesBackup
+        self.shapes, touched = self._history.undo()
+        for shape in touched:
+            if shape in self.shapes:
+                self._indexShape(shape)
+            else:
+                self._unindexShape(shape)
         self.selectedShapes = []
         for shape in self.shapes:
             shape.selected = False
@@ -261,7 +342,7 @@ class Canvas(QtWidgets.QWidget):
 
             self.overrideCursor(CURSOR_DRAW)
             if not self.current:
-                self.repaint()  # draw crosshair
+                self.updateDamage()  # draw crosshair
                 return
 
             if self.outOfPixmap(pos):
@@ -305,7 +386,7 @@ class Canvas(QtWidgets.QWidget):
                 self.line.point_labels = [1]
                 self.line.close()
             assert len(self.line.points) == len(self.line.point_labels)
-            self.repaint()
+            self.updateDamage()
             self.current.highlightClear()
             return
 
@@ -314,22 +395,22 @@ class Canvas(QtWidgets.QWidget):
             if self.selectedShapesCopy and self.prevPoint:
                 self.overrideCursor(CURSOR_MOVE)
                 self.boundedMoveShapes(self.selectedShapesCopy, pos)
-                self.repaint()
+                self.updateDamage()
             elif self.selectedShapes:
                 self.selectedShapesCopy = [s.copy() for s in self.selectedShapes]
-                self.repaint()
+                self.updateDamage()
             return
 
         # Polygon/Vertex moving.
         if QtCore.Qt.LeftButton & ev.buttons():
             if self.selectedVertex():
                 self.boundedMoveVertex(pos)
-                self.repaint()
+                self.updateDamage()
                 self.movingShape = True
             elif self.selectedShapes and self.prevPoint:
                 self.overrideCursor(CURSOR_MOVE)
                 self.boundedMoveShapes(self.selectedShapes, pos)
-                self.repaint()
+                self.updateDamage()
                 self.movingShape = True
             return
 
@@ -338,11 +419,13 @@ class Canvas(QtWidgets.QWidget):
         # - Highlight vertex
         # Update shape/vertex fill and tooltip value accordingly.
         self.setToolTip(self.tr("Image"))
-        for shape in reversed([s for s in self.shapes if self.isVisible(s)]):
+        for shape in reversed(self._shapesNear(pos, self.epsilon / self.scale)):
             # Look for a nearby vertex to highlight. If that fails,
             # check if we happen to be inside a shape.
             index = shape.nearestVertex(pos, self.epsilon)
-            index_edge = shape.nearestEdge(pos, self.epsilon)
+            index_edge = (
+                shape.nearestEdge(pos, self.epsilon) if index is None else None
+            )
             if index is not None:
                 if self.selectedVertex():
                     self.hShape.highlightClear()
@@ -359,7 +442,7 @@ class Canvas(QtWidgets.QWidget):
                     )
                 )
                 self.setStatusTip(self.toolTip())
-                self.update()
+                self.updateDamage()
                 break
             elif index_edge is not None and shape.canAddPoint():
                 if self.selectedVertex():
@@ -371,7 +454,7 @@ class Canvas(QtWidgets.QWidget):
                 self.overrideCursor(CURSOR_POINT)
                 self.setToolTip(self.tr("ALT + Click to create point"))
                 self.setStatusTip(self.toolTip())
-                self.update()
+                self.updateDamage()
                 break
             elif shape.containsPoint(pos):
                 if self.selectedVertex():
@@ -386,12 +469,47 @@ class Canvas(QtWidgets.QWidget):
                 )
                 self.setStatusTip(self.toolTip())
                 self.overrideCursor(CURSOR_GRAB)
-                self.update()
+                self.updateDamage()
                 break
         else:  # Nothing found, clear highlights, reset state.
             self.unHighlight()
         self.vertexSelected.emit(self.hVertex is not None)
 
+    def markShapesEdited(self):
+        """Repaint the shapes after they were edited outside the canvas."""
+        self._shapes_generation += 1
+        self.update()
+
+    def _indexShape(self, shape):
+        # called whenever a shape is added or its points change
+        self._shapes_generation += 1
+        rect = shape.boundingRect()
+        self._shape_index.insert(
+            shape, (rect.left(), rect.top(), rect.right(), rect.bottom())
+        )
+
+    def _unindexShape(self, shape):
+        self._shapes_generation += 1
+        self._shape_index.remove(shape)
+
+    def _rebuildShapeIndex(self):
+        self._shape_index.clear()
+        for shape in self.shapes:
+            self._indexShape(shape)
+
+    def _shapesNear(self, point, radius=0.0):
+        """Visible shapes whose bounding box is within radius of point.
+
+        The shapes keep their order in self.shapes (i.e. drawing order).
+        """
+        if len(self._shape_index) != len(self.shapes):
+            # self.shapes was replaced from outside the canvas
+            self._rebuildShapeIndex()
+        candidates = self._shape_index.query(point.x(), point.y(), radius)
+        if not candidates:
+            return []
+        return [s for s in self.shapes if s in candidates and self.isVisible(s)]
+
     def addPointToEdge(self):
         shape = self.prevhShape
         index = self.prevhEdge
@@ -399,6 +517,7 @@ class Canvas(QtWidgets.QWidget):
         if shape is None or index is None or point is None:
             return
         shape.insertPoint(index, point)
+        self._indexShape(shape)
         shape.highlightVertex(index, shape.MOVE_VERTEX)
         self.hShape = shape
         self.hVertex = index
@@ -411,6 +530,7 @@ class Canvas(QtWidgets.QWidget):
         if shape is None or index is None:
             return
         shape.removePoint(index)
+        self._indexShape(shape)
         shape.highlightClear()
         self.hShape = shape
         self.prevhVertex = None
@@ -518,8 +638,7 @@ class Canvas(QtWidgets.QWidget):
                     )
 
         if self.movingShape and self.hShape:
-            index = self.shapes.index(self.hShape)
-            if self.shapesBackups[-1][index].points != self.shapes[index].points:
+            if self._history.isModified(self.hShape):
                 self.storeShapes()
                 self.shapeMoved.emit()
 
@@ -531,11 +650,13 @@ class Canvas(QtWidgets.QWidget):
         if copy:
             for i, shape in enumerate(self.selectedShapesCopy):
                 self.shapes.append(shape)
+                self._indexShape(shape)
                 self.selectedShapes[i].selected = False
                 self.selectedShapes[i] = shape
         else:
             for i, shape in enumerate(self.selectedShapesCopy):
                 self.selectedShapes[i].points = shape.points
+                self._indexShape(self.selectedShapes[i])
         self.selectedShapesCopy = []
         self.repaint()
         self.storeShapes()
@@ -580,8 +701,8 @@ class Canvas(QtWidgets.QWidget):
             index, shape = self.hVertex, self.hShape
             shape.highlightVertex(index, shape.MOVE_VERTEX)
         else:
-            for shape in reversed(self.shapes):
-                if self.isVisible(shape) and shape.containsPoint(point):
+            for shape in reversed(self._shapesNear(point)):
+                if shape.containsPoint(point):
                     self.setHiding()
                     if shape not in self.selectedShapes:
                         if multiple_selection_mode:
@@ -596,9 +717,9 @@ class Canvas(QtWidgets.QWidget):
         self.deSelectShape()
 
     def calculateOffsets(self, point):
-        left = self.pixmap.width() - 1
+        left = self.imageSize().width() - 1
         right = 0
-        top = self.pixmap.height() - 1
+        top = self.imageSize().height() - 1
         bottom = 0
         for s in self.selectedShapes:
             rect = s.boundingRect()
@@ -623,6 +744,7 @@ class Canvas(QtWidgets.QWidget):
         if self.outOfPixmap(pos):
             pos = self.intersectionPoint(point, pos)
         shape.moveVertexBy(index, pos - point)
+        self._indexShape(shape)
 
     def boundedMoveShapes(self, shapes, pos):
         if self.outOfPixmap(pos):
@@ -633,8 +755,8 @@ class Canvas(QtWidgets.QWidget):
         o2 = pos + self.offsets[1]
         if self.outOfPixmap(o2):
             pos += QtCore.QPointF(
-                min(0, self.pixmap.width() - o2.x()),
-                min(0, self.pixmap.height() - o2.y()),
+                min(0, self.imageSize().width() - o2.x()),
+                min(0, self.imageSize().height() - o2.y()),
             )
         # XXX: The next line tracks the new position of the cursor
         # relative to the shape, but also results in making it
@@ -645,6 +767,9 @@ class Canvas(QtWidgets.QWidget):
         if dp:
             for shape in shapes:
                 shape.moveBy(dp)
+                # the shadow copies of a copy-move are not on the canvas yet
+                if shape in self._shape_index:
+                    self._indexShape(shape)
             self.prevPoint = pos
             return True
         return False
@@ -661,6 +786,7 @@ class Canvas(QtWidgets.QWidget):
         if self.selectedShapes:
             for shape in self.selectedShapes:
                 self.shapes.remove(shape)
+                self._unindexShape(shape)
                 deleted_shapes.append(shape)
             self.storeShapes()
             self.selectedShapes = []
@@ -672,30 +798,218 @@ class Canvas(QtWidgets.QWidget):
             self.selectedShapes.remove(shape)
         if shape in self.shapes:
             self.shapes.remove(shape)
+            self._unindexShape(shape)
         self.storeShapes()
         self.update()
 
+    def _showCrosshair(self):
+        return (
+            self._crosshair[self._createMode]
+            and self.drawing()
+            and self.prevMovePoint
+            and not self.outOfPixmap(self.prevMovePoint)
+        )
+
+    def _isPainted(self, shape):
+        return (shape.selected or not self._hideBackround) and self.isVisible(shape)
+
+    def _isStatic(self, shape):
+        # shapes that change on hover, drag or selection are drawn on top of
+        # the cached layer instead of into it
+        return not shape.selected and shape is not self.hShape
+
+    def _widgetRect(self, rect: QtCore.QRectF) -> QtCore.QRect:
+        """Map a rect in image coordinates to the widget, with room for vertices."""
+        offset = self.offsetToCenter() * self.scale
+        margin = Shape.point_size * 2 + Shape.PEN_WIDTH
+        return (
+            QtCore.QRectF(
+                rect.topLeft() * self.scale + offset,
+                rect.bottomRight() * self.scale + offset,
+            )
+            .adjusted(-margin, -margin, margin, margin)
+            .toAlignedRect()
+        )
+
+    def _damageRegion(self) -> QtGui.QRegion:
+        """Return the widget region covered by everything that is not static."""
+        shapes = [s for s in self.shapes if not self._isStatic(s)]
+        shapes += self.selectedShapesCopy
+        if self.current:
+            shapes += [self.current, self.line]
+        if self._ai_preview is not None:
+            shapes.append(self._ai_preview[2])
+
+        region = QtGui.QRegion()
+        for shape in shapes:
+            if shape.points:
+                region += self._widgetRect(shape.boundingRect())
+        if self._showCrosshair():
+            offset = self.offsetToCenter() * self.scale
+            x = int(self.prevMovePoint.x() * self.scale + offset.x())
+            y = int(self.prevMovePoint.y() * self.scale + offset.y())
+            region += QtCore.QRect(0, y - 1, self.width(), 3)
+            region += QtCore.QRect(x - 1, 0, 3, self.height())
+        return region
+
+    def updateDamage(self):
+        """Schedule a repaint of what changed since the last call.
+
+        That is what is drawn on top of the static layer now, and what was
+        drawn there before.
+        """
+        region = self._damageRegion()
+        self.update(region.united(self._damage))
+        self._damage = region
+
+    def _staticLayer(self, rect: QtCore.QRect) -> QtGui.QPixmap:
+        """Return the image and the static shapes, painted over rect."""
+        offset = self.offsetToCenter()
+        shapes = [s for s in self.shapes if self._isPainted(s) and self._isStatic(s)]
+        pixmap, pixmap_scale = self._scaled_pixmaps.pixmap(self.scale)
+        key = (
+            rect,
+            self.devicePixelRatioF(),
+            self.scale,
+            (offset.x(), offset.y()),
+            pixmap.cacheKey(),
+            (id(self._tiled_image), self._tiles_loaded),
+            self._zooming,
+            Shape.point_size,
+            self._shapes_generation,
+            tuple(shapes),
+        )
+        if self._static_layer is not None and self._static_layer[0] == key:
+            return self._static_layer[1]
+
+        layer = QtGui.QPixmap(rect.size() * self.devicePixelRatioF())
+        layer.setDevicePixelRatio(self.devicePixelRatioF())
+        layer.fill(QtCore.Qt.transparent)
+        p = QtGui.QPainter(layer)
+        p.setRenderHint(QtGui.QPainter.Antialiasing)
+        p.setRenderHint(QtGui.QPainter.HighQualityAntialiasing)
+        p.translate(-rect.topLeft())
+        p.translate(offset * self.scale)
+        p.save()
+        p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, not self._zooming)
+        p.scale(self.scale / pixmap_scale, self.scale / pixmap_scale)
+        p.drawPixmap(0, 0, pixmap)
+        p.restore()
+        if self._tiled_image is not None:
+            self._paintTiles(p, rect)
+        for shape in shapes:
+            shape.fill = False
+            shape.paint(p)
+        p.end()
+        # the masks keep their ids in the key from being reused
+        self._static_layer = (key, layer, [s.mask for s in shapes])
+        return layer
+
+    def _paintTiles(self, p: QtGui.QPainter, rect: QtCore.QRect) -> None:
+        """Draw the tiles of the tiled image that cover rect.
+
+        Tiles are taken from the level matching the zoom; those not decoded
+        yet are requested from the loader, and stood in for by a coarser
+        level in the meantime.
+        """
+        tiled = self._tiled_image
+        level = 0
+        if self.scale < 1:
+            level = min(int(math.log2(1 / self.scale)), tiled.level_count - 1)
+        factor = 2**level
+        offset = self.offsetToCenter()
+        left = max(0.0, rect.left() / self.scale - offset.x()) / factor
+        top = max(0.0, rect.top() / self.scale - offset.y()) / factor
+        right = ((rect.right() + 1) / self.scale - offset.x()) / factor
+        bottom = ((rect.bottom() + 1) / self.scale - offset.y()) / factor
+        cols, rows = tiled.tileGrid(level)
+        tiles = [
+            (level, col, row)
+            for row in range(
+                int(top) // tiled.tile_size,
+                min(rows, math.ceil(bottom / tiled.tile_size)),
+            )
+            for col in range(
+                int(left) // tiled.tile_size,
+                min(cols, math.ceil(right / tiled.tile_size)),
+            )
+        ]
+
+        images = {}
+        missing = []
+        for tile in tiles:
+            image = tiled.cached(*tile)
+            if image is None:
+                missing.append(tile)
+            else:
+                images[tile] = image
+        fallbacks = {}
+        for _, col, row in missing:
+            for coarser in range(level + 1, tiled.level_count):
+                d = coarser - level
+                parent = (coarser, col >> d, row >> d)
+                image = fallbacks.get(parent) or tiled.cached(*parent)
+                if image is not None:
+                    fallbacks[parent] = image
+                    break
+        self._tile_loader.request(missing)
+
+        p.save()
+        p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform, not self._zooming)
+        p.scale(self.scale, self.scale)
+        # coarsest first, so that finer tiles are drawn over them
+        for tile, image in sorted(fallbacks.items(), reverse=True) + list(
+            images.items()
+        ):
+            factor = 2 ** tile[0]
+            x1, y1, x2, y2 = tiled.tileRect(*tile)
+            p.drawImage(
+                QtCore.QRectF(
+                    x1 * factor, y1 * factor, (x2 - x1) * factor, (y2 - y1) * factor
+                ),
+                image,
+            )
+        p.restore()
+
+    def _onTileReady(self):
+        self._tiles_loaded += 1
+        self.update()
+
+    def _onZoomSettled(self):
+        self._zooming = False
+        self._scaled_pixmaps.request(self.scale)
+        self.update()
+
     def paintEvent(self, event: QtGui.QPaintEvent) -> None:
-        if not self.pixmap:
+        # a null QPixmap is not falsy on every PyQt5 version
+        if (
+            self.pixmap is None or self.pixmap.isNull()
+        ) and self._tiled_image is None:
             return super(Canvas, self).paintEvent(event)
 
+        if self.scale != self._painted_scale:
+            if self._painted_scale is None:  # first paint of this pixmap
+                self._scaled_pixmaps.request(self.scale)
+            else:
+                self._zooming = True
+                self._zoom_timer.start()
+            self._painted_scale = self.scale
+        Shape.scale = self.scale
+        visible = self.visibleRegion().boundingRect()
+        if visible.isEmpty():
+            visible = self.rect()
+        layer = self._staticLayer(visible)
+
         p = self._painter
         p.begin(self)
+        p.setClipRegion(event.region())
+        p.drawPixmap(visible.topLeft(), layer)
         p.setRenderHint(QtGui.QPainter.Antialiasing)
         p.setRenderHint(QtGui.QPainter.HighQualityAntialiasing)
-        p.setRenderHint(QtGui.QPainter.SmoothPixmapTransform)
-        p.scale(self.scale, self.scale)
-        p.translate(self.offsetToCenter())
-        p.drawPixmap(0, 0, self.pixmap)
-        p.scale(1 / self.scale, 1 / self.scale)
+        p.translate(self.offsetToCenter() * self.scale)
 
         # draw crosshair
-        if (
-            self._crosshair[self._createMode]
-            and self.drawing()
-            and self.prevMovePoint
-            and not self.outOfPixmap(self.prevMovePoint)
-        ):
+        if self._showCrosshair():
             p.setPen(QtGui.QColor(0, 0, 0))
             p.drawLine(
                 0,
@@ -710,9 +1024,12 @@ class Canvas(QtWidgets.QWidget):
                 self.height() - 1,
             )
 
-        Shape.scale = self.scale
         for shape in self.shapes:
-            if (shape.selected or not self._hideBackround) and self.isVisible(shape):
+            if (
+                self._isPainted(shape)
+                and not self._isStatic(shape)
+                and event.rect().intersects(self._widgetRect(shape.boundingRect()))
+            ):
                 shape.fill = shape.selected or shape == self.hShape
                 shape.paint(p)
         if self.current:
@@ -746,63 +1063,83 @@ class Canvas(QtWidgets.QWidget):
             p.end()
             return
 
-        drawing_shape = self.current.copy()
-        drawing_shape.addPoint(
-            point=self.line.points[1],
-            label=self.line.point_labels[1],
-        )
-        image: np.ndarray = imgviz.asrgb(
-            labelme.utils.img_qt_to_arr(self.pixmap.toImage())
-        )
-        response: osam.types.GenerateResponse = osam.apis.generate(
-            osam.types.GenerateRequest(
-                model=self._model.name,
-                image_embedding=self._image_embeddings[image.tobytes()],
-                prompt=osam.types.Prompt(
-                    points=[[point.x(), point.y()] for point in drawing_shape.points],
-                    point_labels=drawing_shape.point_labels,
-                ),
-            )
-        )
-        if not response.annotations:
-            logger.warning("No annotations returned by AI model")
+        image_embedding = self.getImageEmbedding(block=False)
+        if image_embedding is None:
+            # still being encoded in the background; see imageEmbeddingReady
             p.end()
             return
-
-        if self.createMode == "ai_mask" and response.annotations[0].bounding_box:
-            y1, x1, y2, x2 = (
-                response.annotations[0].bounding_box.ymin,
-                response.annotations[0].bounding_box.xmin,
-                response.annotations[0].bounding_box.ymax,
-                response.annotations[0].bounding_box.xmax,
-            )
-            drawing_shape.setShapeRefined(
-                shape_type="mask",
-                points=[QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2)],
-                point_labels=[1, 1],
-                mask=response.annotations[0].mask[y1 : y2 + 1, x1 : x2 + 1],
+        prompt = self._aiPrompt(
+            self.current.points + [self.line.points[1]],
+            self.current.point_labels + [self.line.point_labels[1]],
+        )
+        if prompt != self._ai_preview_key:
+            self._ai_preview_key = prompt
+            self._ai_previewer.request(
+                prompt,
+                functools.partial(
+                    compute_shape_from_points,
+                    model=self._model.name,
+                    image_embedding=image_embedding,
+                    points=[list(point) for point in prompt[-2]],
+                    point_labels=list(prompt[-1]),
+                    shape_type=prompt[2],
+                ),
             )
-            drawing_shape.selected = True
-            drawing_shape.paint(p)
-            p.end()
-            return
+        # Until the newest prompt comes back, keep showing the previous preview
+        # of the same shape rather than blocking on the model here.
+        if self._ai_preview is not None and self._ai_preview[0][0] == id(
+            self.current
+        ):
+            self._ai_preview[2].paint(p)
+        p.end()
 
-        points = polygon_from_mask.compute_polygon_from_mask(
-            mask=response.annotations[0].mask
+    def _aiPrompt(self, points, point_labels):
+        """Identify an AI request: shape being drawn, image, model and prompt."""
+        return (
+            id(self.current),
+            self.imageKey(),
+            "mask" if self.createMode == "ai_mask" else "polygon",
+            self._model.name,
+            tuple((point.x(), point.y()) for point in points),
+            tuple(point_labels),
         )
+
+    def _onAiPreviewReady(self, prompt, result):
+        if self.current is None or prompt[:2] != (id(self.current), self._image_key):
+            return  # the shape or the image has changed since
+        points, mask = result
         if len(points) < 2:
-            p.end()
             return
-
+        drawing_shape = self.current.copy()
         drawing_shape.setShapeRefined(
-            shape_type="polygon",
+            shape_type="polygon" if mask is None else "mask",
             points=[QtCore.QPointF(point[0], point[1]) for point in points],
             point_labels=[1] * len(points),
+            mask=mask,
         )
-        drawing_shape.fill = self.fillDrawing()
+        drawing_shape.fill = mask is None and self.fillDrawing()
         drawing_shape.selected = True
-        drawing_shape.paint(p)
-        p.end()
+        self._ai_preview = (prompt, result, drawing_shape)
+        self.update()
+
+    def resetAiPreview(self):
+        self._ai_previewer.cancel()
+        self._ai_preview_key = None
+        self._ai_preview = None
+
+    def _computeAiShape(self):
+        """Return (points, mask) for self.current, reusing a matching preview."""
+        prompt = self._aiPrompt(self.current.points, self.current.point_labels)
+        if self._ai_preview is not None and self._ai_preview[0] == prompt:
+            return self._ai_preview[1]
+        self._ai_previewer.cancel()
+        return compute_shape_from_points(
+            model=self._model.name,
+            image_embedding=self.getImageEmbedding(),
+            points=[list(point) for point in prompt[-2]],
+            point_labels=list(prompt[-1]),
+            shape_type=prompt[2],
+        )
 
     def transformPos(self, point):
         """Convert from widget-logical coordinates to painter-logical ones."""
@@ -811,14 +1148,16 @@ class Canvas(QtWidgets.QWidget):
     def offsetToCenter(self):
         s = self.scale
         area = super(Canvas, self).size()
-        w, h = self.pixmap.width() * s, self.pixmap.height() * s
+        size = self.imageSize()
+        w, h = size.width() * s, size.height() * s
         aw, ah = area.width(), area.height()
         x = (aw - w) / (2 * s) if aw > w else 0
         y = (ah - h) / (2 * s) if ah > h else 0
         return QtCore.QPointF(x, y)
 
     def outOfPixmap(self, p):
-        w, h = self.pixmap.width(), self.pixmap.height()
+        size = self.imageSize()
+        w, h = size.width(), size.height()
         return not (0 <= p.x() <= w - 1 and 0 <= p.y() <= h - 1)
 
     def finalise(self):
@@ -845,10 +1184,7 @@ class Canvas(QtWidgets.QWidget):
             logger.warning(f"bsg ----------- finalise self.line.points : {self.line.points}\n")
 
             try:
-                points = self._ai_model.predict_polygon_from_points(
-                    points=[[point.x(), point.y()] for point in self.current.points],
-                    point_labels=self.current.point_labels,
-                )
+                points, _ = self._computeAiShape()
             except Exception as e:
                 print(f"Error during AI polygon prediction: {e}")
                 return
@@ -863,20 +1199,21 @@ class Canvas(QtWidgets.QWidget):
         elif self.createMode == "ai_mask":
             # convert points to mask by an AI model
             assert self.current.shape_type == "points"
-            mask = self._ai_model.predict_mask_from_points(
-                points=[[point.x(), point.y()] for point in self.current.points],
-                point_labels=self.current.point_labels,
-            )
-            y1, x1, y2, x2 = imgviz.instances.masks_to_bboxes([mask])[0].astype(int)
+            points, mask = self._computeAiShape()
+            if mask is None:
+                logger.warning("No mask returned by AI model")
+                return
             self.current.setShapeRefined(
                 shape_type="mask",
-                points=[QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2)],
+                points=[QtCore.QPointF(point[0], point[1]) for point in points],
                 point_labels=[1, 1],
-                mask=mask[y1 : y2 + 1, x1 : x2 + 1],
+                mask=mask,
             )
+        self.resetAiPreview()
         self.current.close()
 
         self.shapes.append(self.current)
+        self._indexShape(self.current)
         self.storeShapes()
         self.current = None
         self.setHiding(False)
@@ -895,7 +1232,7 @@ class Canvas(QtWidgets.QWidget):
         # and find the one intersecting the current line segment.
         # http://paulbourke.net/geometry/lineline2d/
         logger.info(f"bsg ----------- intersectionPoint intersectionPoint intersectionPoint intersectionPoint\n")
-        size = self.pixmap.size()
+        size = self.imageSize()
         points = [
             (0, 0),
             (size.width() - 1, 0),
@@ -953,8 +1290,8 @@ class Canvas(QtWidgets.QWidget):
         return self.minimumSizeHint()
 
     def minimumSizeHint(self):
-        if self.pixmap:
-            return self.scale * self.pixmap.size()
+        if self.pixmap or self._tiled_image is not None:
+            return self.scale * self.imageSize()
         return super(Canvas, self).minimumSizeHint()
 
     def wheelEvent(self, ev):
@@ -973,7 +1310,7 @@ class Canvas(QtWidgets.QWidget):
     def moveByKeyboard(self, offset):
         if self.selectedShapes:
             self.boundedMoveShapes(self.selectedShapes, self.prevPoint + offset)
-            self.repaint()
+            self.updateDamage()
             self.movingShape = True
 
     def keyPressEvent(self, ev):
@@ -1005,8 +1342,7 @@ class Canvas(QtWidgets.QWidget):
                 self.snapping = True
         elif self.editing():
             if self.movingShape and self.selectedShapes:
-                index = self.shapes.index(self.selectedShapes[0])
-                if self.shapesBackups[-1][index].points != self.shapes[index].points:
+                if self._history.isModified(self.selectedShapes[0]):
                     self.storeShapes()
                     self.shapeMoved.emit()
 
@@ -1014,15 +1350,17 @@ class Canvas(QtWidgets.QWidget):
 
     def setLastLabel(self, text, flags):
         assert text
+        self._shapes_generation += 1
         self.shapes[-1].label = text
         self.shapes[-1].flags = flags
-        self.shapesBackups.pop()
+        self._history.discard()
         self.storeShapes()
         return self.shapes[-1]
 
     def undoLastLine(self):
         assert self.shapes
         self.current = self.shapes.pop()
+        self._unindexShape(self.current)
         self.current.setOpen()
         self.current.restoreShapeRaw()
         if self.createMode in ["polygon", "linestrip"]:
@@ -1041,22 +1379,40 @@ class Canvas(QtWidgets.QWidget):
             self.line[0] = self.current[-1]
         else:
             self.current = None
+            self.resetAiPreview()
             self.drawingPolygon.emit(False)
         self.update()
 
+    def imageSize(self) -> QtCore.QSize:
+        """Return the size of the image, in image pixels."""
+        if self._tiled_image is not None:
+            return self._tiled_image.size
+        return self.pixmap.size()
+
+    def tiledImage(self) -> Optional[TiledImage]:
+        return self._tiled_image
+
+    def _setTiledImage(self, tiled_image: Optional[TiledImage]) -> None:
+        if self._tiled_image is not None and self._tiled_image is not tiled_image:
+            self._tiled_image.close()
+        self._tiled_image = tiled_image
+        self._tile_loader.setImage(tiled_image)
+
+    def loadTiledImage(self, tiled_image: TiledImage, clear_shapes=True):
+        """Show an image too large for a pixmap, decoding tiles as needed."""
+        self.loadPixmap(QtGui.QPixmap(), clear_shapes=clear_shapes)
+        self._setTiledImage(tiled_image)
+
     def loadPixmap(self, pixmap, clear_shapes=True):
+        self._setTiledImage(None)
         self.pixmap = pixmap
-        if self._model:
-            image: np.ndarray = labelme.utils.img_qt_to_arr(self.pixmap.toImage())
-            if image.tobytes() not in self._image_embeddings:
-                logger.debug(
-                    "Computing image embeddings for model {!r}", self._model.name
-                )
-                self._image_embeddings[image.tobytes()] = self._model.encode_image(
-                    image=image
-                )
+        self._scaled_pixmaps.setPixmap(pixmap)
+        self._painted_scale = None
+        self._image_key = None
+        self.resetAiPreview()
         if clear_shapes:
             self.shapes = []
+            self._shape_index.clear()
         self.update()
 
     def loadShapes(self, shapes, replace=True):
@@ -1064,6 +1420,7 @@ class Canvas(QtWidgets.QWidget):
             self.shapes = list(shapes)
         else:
             self.shapes.extend(shapes)
+        self._rebuildShapeIndex()
         self.storeShapes()
         self.current = None
         self.hShape = None
@@ -1087,5 +1444,7 @@ class Canvas(QtWidgets.QWidget):
     def resetState(self):
         self.restoreCursor()
         self.pixmap = None
-        self.shapesBackups = []
+        self._scaled_pixmaps.setPixmap(None)
+        self._setTiledImage(None)
+        self._history.reset()
         self.update()
@@ -0,0 +1,120 @@
+from PyQt5 import QtCore
+from PyQt5 import QtWidgets
+from PyQt5.QtCore import Qt
+
+
+class FileListModel(QtCore.QAbstractListModel):
+    """Image filenames with an O(1) filename -> row lookup."""
+
+    def __init__(self, parent=None):
+        super(FileListModel, self).__init__(parent)
+        self._filenames = []
+        self._checked = []
+        self._rows = {}
+
+    def rowCount(self, parent=QtCore.QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._filenames)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        row = index.row()
+        if role in [Qt.DisplayRole, Qt.ToolTipRole]:
+            return self._filenames[row]
+        if role == Qt.CheckStateRole:
+            return Qt.Checked if self._checked[row] else Qt.Unchecked
+        return None
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    def filenames(self):
+        """Return the backing list of filenames; do not modify it."""
+        return self._filenames
+
+    def filenameAt(self, row):
+        return self._filenames[row]
+
+    def rowOf(self, filename):
+        return self._rows.get(filename, -1)
+
+    def hasFilename(self, filename):
+        return filename in self._rows
+
+    def setFilenames(self, filenames, checked=None):
+        self.beginResetModel()
+        self._filenames = list(filenames)
+        self._checked = (
+            [False] * len(self._filenames) if checked is None else list(checked)
+        )
+        self._rows = {filename: row for row, filename in enumerate(self._filenames)}
+        self.endResetModel()
+
+    def appendFilenames(self, filenames, checked=None):
+        """Append the filenames that are not in the model yet, in order."""
+        if checked is None:
+            checked = [False] * len(filenames)
+        new = {}  # filename -> checked, without the duplicates of the batch
+        for filename, is_checked in zip(filenames, checked):
+            if filename not in self._rows and filename not in new:
+                new[filename] = is_checked
+        if not new:
+            return
+        first = len(self._filenames)
+        self.beginInsertRows(QtCore.QModelIndex(), first, first + len(new) - 1)
+        for row, filename in enumerate(new, start=first):
+            self._rows[filename] = row
+        self._filenames.extend(new)
+        self._checked.extend(new.values())
+        self.endInsertRows()
+
+    def clear(self):
+        self.setFilenames([])
+
+    def isChecked(self, filename):
+        row = self.rowOf(filename)
+        return row != -1 and self._checked[row]
+
+    def markChecked(self, is_checked):
+        """Check every row for which is_checked(filename) is true."""
+        if not self._filenames:
+            return
+        self._checked = [
+            checked or bool(is_checked(filename))
+            for filename, checked in zip(self._filenames, self._checked)
+        ]
+        self.dataChanged.emit(
+            self.index(0), self.index(len(self._filenames) - 1), [Qt.CheckStateRole]
+        )
+
+    def setChecked(self, filename, checked):
+        row = self.rowOf(filename)
+        if row == -1 or self._checked[row] == checked:
+            return
+        self._checked[row] = checked
+        index = self.index(row)
+        self.dataChanged.emit(index, index, [Qt.CheckStateRole])
+
+
+class FileListView(QtWidgets.QListView):
+    def __init__(self, parent=None):
+        super(FileListView, self).__init__(parent)
+        # Rows share one height, so the view only lays out what is visible.
+        self.setUniformItemSizes(True)
+        self.setLayoutMode(QtWidgets.QListView.Batched)
+        self.setSelectionMode(QtWidgets.QAbstractItemView.SingleSelection)
+        self.setEditTriggers(QtWidgets.QAbstractItemView.NoEditTriggers)
+
+    def currentRow(self):
+        return self.currentIndex().row()
+
+    def setCurrentRow(self, row):
+        if row < 0:
+            self.selectionModel().clear()
+            self.setCurrentIndex(QtCore.QModelIndex())
+            return
+        self.setCurrentIndex(self.model().index(row))
@@ -0,0 +1,41 @@
+import threading
+
+import pytest
+
+from labelme._automation.ai_preview import AiPreviewer
+
+
+@pytest.mark.gui
+def test_AiPreviewer_coalesces_requests(qtbot):
+    previewer = AiPreviewer(debounce_msec=50)
+    calls = []
+    ready = []
+    previewer.previewReady.connect(lambda key, result: ready.append((key, result)))
+
+    def fn(value):
+        calls.append((value, threading.current_thread()))
+        return value * 10
+
+    for value in range(5):
+        previewer.request(value, lambda value=value: fn(value))
+    qtbot.waitUntil(lambda: len(ready) > 0)
+    previewer.waitForDone()
+
+    # only the newest request of the burst runs, and not on this thread
+    assert [value for value, _ in calls] == [4]
+    assert calls[0][1] is not threading.current_thread()
+    assert ready == [(4, 40)]
+    assert not previewer.pending
+
+
+@pytest.mark.gui
+def test_AiPreviewer_cancel(qtbot):
+    previewer = AiPreviewer(debounce_msec=10)
+    ready = []
+    previewer.previewReady.connect(lambda key, result: ready.append(key))
+
+    previewer.request("a", lambda: 1)
+    previewer.cancel()
+    previewer.request("b", lambda: 2)
+    qtbot.waitUntil(lambda: len(ready) > 0)
+    assert ready == ["b"]
@@ -0,0 +1,77 @@
+import os
+
+import numpy as np
+import osam
+
+from labelme._automation.embedding_cache import EmbeddingCache
+from labelme._automation.embedding_cache import image_key
+
+
+def _embedding(value=0.0, num_extra_features=0):
+    return osam.types.ImageEmbedding(
+        original_height=480,
+        original_width=640,
+        embedding=np.full((4, 8, 8), value, dtype=np.float32),
+        extra_features=[
+            np.full((2, 16, 16), value, dtype=np.float32)
+            for _ in range(num_extra_features)
+        ],
+    )
+
+
+def test_image_key():
+    image = np.zeros((10, 20, 3), dtype=np.uint8)
+    assert image_key(image) == image_key(image.copy())
+    assert image_key(image) != image_key(image.reshape(20, 10, 3))
+    image2 = image.copy()
+    image2[5, 5, 0] = 1
+    assert image_key(image) != image_key(image2)
+
+
+def test_EmbeddingCache_evicts_by_bytes():
+    nbytes = _embedding().embedding.nbytes
+    cache = EmbeddingCache(max_bytes=nbytes * 2)
+    cache.put("model", "a", _embedding())
+    cache.put("model", "b", _embedding())
+    assert cache.get("model", "a") is not None  # "b" becomes least recently used
+    cache.put("model", "c", _embedding())
+
+    assert ("model", "a") in cache
+    assert ("model", "b") not in cache
+    assert ("other-model", "a") not in cache
+    assert cache.num_bytes == nbytes * 2
+
+
+def test_EmbeddingCache_on_disk(tmp_path):
+    cache = EmbeddingCache(max_bytes=1024 * 1024, cache_dir=str(tmp_path))
+    cache.put("sam2:latest", "a", _embedding(1.0, num_extra_features=2))
+    assert (tmp_path / "sam2_latest" / "a.npz").exists()
+
+    # a new session starts with an empty memory cache
+    cache = EmbeddingCache(max_bytes=1024 * 1024, cache_dir=str(tmp_path))
+    assert ("sam2:latest", "a") in cache
+    embedding = cache.get("sam2:latest", "a")
+    assert embedding.original_height == 480
+    assert embedding.original_width == 640
+    np.testing.assert_array_equal(embedding.embedding, _embedding(1.0).embedding)
+    assert len(embedding.extra_features) == 2
+    assert cache.get("efficientsam", "a") is None
+
+
+def test_EmbeddingCache_on_disk_evicts_least_recently_used(tmp_path):
+    cache = EmbeddingCache(max_bytes=1024 * 1024, cache_dir=str(tmp_path))
+    cache.put("model", "a", _embedding())
+    file_bytes = (tmp_path / "model" / "a.npz").stat().st_size
+    cache.put("model", "b", _embedding())
+    os.utime(tmp_path / "model" / "a.npz", (1, 1))
+    os.utime(tmp_path / "model" / "b.npz", (2, 2))
+
+    cache = EmbeddingCache(
+        max_bytes=1024 * 1024,
+        cache_dir=str(tmp_path),
+        max_disk_bytes=int(file_bytes * 2.5),
+    )
+    assert cache.get("model", "a") is not None  # "b" becomes least recently used
+    cache.put("model", "c", _embedding())
+
+    assert sorted(os.listdir(tmp_path / "model")) == ["a.npz", "c.npz"]
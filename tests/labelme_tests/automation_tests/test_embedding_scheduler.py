@@ -0,0 +1,98 @@
+import numpy as np
+import osam
+import pytest
+from PyQt5 import QtGui
+
+from labelme._automation.embedding_cache import EmbeddingCache
+from labelme._automation.embedding_cache import image_from_qimage
+from labelme._automation.embedding_cache import image_key
+from labelme._automation.embedding_scheduler import EmbeddingScheduler
+
+
+class _Model:
+    name = "test-model"
+
+    def __init__(self):
+        self.encoded = []
+
+    def encode_image(self, image):
+        self.encoded.append(image_key(image))
+        return osam.types.ImageEmbedding(
+            original_height=image.shape[0],
+            original_width=image.shape[1],
+            embedding=np.zeros((4, 8, 8), dtype=np.float32),
+        )
+
+
+def _image(value):
+    return np.full((24, 32, 3), value, dtype=np.uint8)
+
+
+@pytest.mark.gui
+def test_EmbeddingScheduler(qtbot):
+    cache = EmbeddingCache(max_bytes=1024 * 1024)
+    scheduler = EmbeddingScheduler(cache)
+    model = _Model()
+    ready = []
+    scheduler.embeddingReady.connect(lambda name, key, seconds: ready.append(name))
+
+    images = [(f"{i}.jpg", lambda i=i: _image(i)) for i in range(3)]
+    scheduler.schedule(model, images)
+    qtbot.waitUntil(lambda: len(ready) == 3)
+    scheduler.waitForDone()
+
+    assert ready == ["0.jpg", "1.jpg", "2.jpg"]
+    assert all((model.name, image_key(_image(i))) in cache for i in range(3))
+    stats = scheduler.stats()
+    assert stats["queue_depth"] == 0
+    assert stats["num_encoded"] == 3
+    assert stats["last_encode_time"] is not None
+
+    # already cached images are not encoded again
+    scheduler.schedule(model, images)
+    scheduler.waitForDone()
+    assert len(model.encoded) == 3
+
+
+@pytest.mark.gui
+def test_EmbeddingScheduler_request(qtbot):
+    cache = EmbeddingCache(max_bytes=1024 * 1024)
+    scheduler = EmbeddingScheduler(cache)
+    model = _Model()
+
+    scheduler.request(model, "adjusted", lambda: _image(10))
+    # not in the image list, but still encoded
+    scheduler.schedule(model, [("0.jpg", lambda: _image(0))])
+    scheduler.waitForDone()
+
+    assert not scheduler.isPending("adjusted")
+    assert (model.name, image_key(_image(10))) in cache
+    assert (model.name, image_key(_image(0))) in cache
+
+
+@pytest.mark.gui
+def test_Canvas_encodes_unscheduled_pixmap(qtbot):
+    from labelme.widgets.canvas import Canvas
+
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    image = QtGui.QImage(32, 24, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor(10, 20, 30))
+    canvas.loadPixmap(QtGui.QPixmap.fromImage(image))
+    canvas._model = _Model()
+
+    assert canvas.getImageEmbedding(block=False) is None
+    with qtbot.waitSignal(canvas._embedding_scheduler.embeddingReady):
+        pass
+    assert canvas.getImageEmbedding(block=False) is not None
+    assert len(canvas._model.encoded) == 1
+
+
+def test_image_from_qimage():
+    image = QtGui.QImage(32, 24, QtGui.QImage.Format_RGB888)
+    image.fill(QtGui.QColor(10, 20, 30))
+    pixmap_image = image.convertToFormat(QtGui.QImage.Format_RGB32)
+    assert image_from_qimage(image).shape == (24, 32, 3)
+    assert image_key(image_from_qimage(image)) == image_key(
+        image_from_qimage(pixmap_image)
+    )
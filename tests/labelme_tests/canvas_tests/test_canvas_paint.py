@@ -0,0 +1,144 @@
+import pytest
+from PyQt5 import QtCore
+from PyQt5 import QtGui
+from PyQt5 import QtWidgets
+
+from labelme.shape import Shape
+from labelme.widgets.canvas import Canvas
+
+
+@pytest.fixture
+def canvas(qtbot, monkeypatch):
+    for name, rgba in [
+        ("line_color", (0, 255, 0, 128)),
+        ("fill_color", (0, 0, 0, 64)),
+        ("select_line_color", (255, 255, 255, 255)),
+        ("select_fill_color", (0, 255, 0, 155)),
+        ("vertex_fill_color", (0, 255, 0, 255)),
+        ("hvertex_fill_color", (255, 255, 255, 255)),
+    ]:
+        monkeypatch.setattr(Shape, name, QtGui.QColor(*rgba))
+
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    image = QtGui.QImage(300, 200, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor(90, 120, 200))
+    canvas.loadPixmap(QtGui.QPixmap.fromImage(image))
+    shapes = []
+    for points in [
+        [(10, 10), (100, 20), (50, 90)],
+        [(120, 50), (200, 60), (180, 150), (130, 140)],
+        [(210, 10), (290, 10), (290, 80)],
+    ]:
+        shape = Shape(shape_type="polygon")
+        for x, y in points:
+            shape.addPoint(QtCore.QPointF(x, y))
+        shape.close()
+        shapes.append(shape)
+    canvas.loadShapes(shapes)
+    canvas.resize(400, 300)
+    canvas.show()
+    qtbot.waitExposed(canvas)
+    return canvas
+
+
+def _move(canvas, x, y):
+    offset = canvas.offsetToCenter()
+    canvas.mouseMoveEvent(
+        QtGui.QMouseEvent(
+            QtCore.QEvent.MouseMove,
+            QtCore.QPointF(x + offset.x(), y + offset.y()),
+            QtCore.Qt.NoButton,
+            QtCore.Qt.NoButton,
+            QtCore.Qt.NoModifier,
+        )
+    )
+    QtWidgets.QApplication.processEvents()
+
+
+@pytest.mark.gui
+def test_Canvas_damage_repaint(canvas):
+    paint_rects = []
+    paint_event = canvas.paintEvent
+
+    def record_paint_event(event):
+        paint_rects.append(event.rect())
+        paint_event(event)
+
+    canvas.paintEvent = record_paint_event
+
+    # hover over shapes, draw a rectangle with the crosshair on
+    for x, y in [(50, 40), (52, 42), (150, 100), (250, 40), (5, 5)]:
+        _move(canvas, x, y)
+    canvas.setEditing(False)
+    canvas.createMode = "rectangle"
+    for x, y in [(20, 30), (60, 70)]:
+        _move(canvas, x, y)
+
+    assert paint_rects
+    assert canvas.rect() not in paint_rects[:2]  # hovering repaints one shape
+
+    # what is on screen matches a full repaint
+    screen = QtWidgets.QApplication.primaryScreen().grabWindow(canvas.winId())
+    screen = screen.toImage()
+    full = canvas.grab().toImage().convertToFormat(screen.format())
+    assert screen == full
+
+
+@pytest.mark.gui
+def test_Canvas_static_layer_is_cached(canvas):
+    canvas.repaint()
+    layer = canvas._static_layer[1]
+    canvas.repaint()
+    assert canvas._static_layer[1] is layer
+
+    # edits outside the canvas are announced, points are not compared
+    canvas.shapes[0].moveBy(QtCore.QPointF(1, 0))
+    canvas.repaint()
+    assert canvas._static_layer[1] is layer
+    canvas.markShapesEdited()
+    canvas.repaint()
+    assert canvas._static_layer[1] is not layer
+
+    layer = canvas._static_layer[1]
+    canvas.deleteShape(canvas.shapes[0])
+    canvas.repaint()
+    assert canvas._static_layer[1] is not layer
+
+
+@pytest.mark.gui
+def test_Canvas_tiled_image(canvas, tmp_path):
+    from labelme._media.tiled_image import TiledImage
+
+    filename = str(tmp_path / "image.png")
+    image = QtGui.QImage(300, 200, QtGui.QImage.Format_RGB888)
+    for y in range(0, 200, 20):
+        for x in range(0, 300, 20):
+            image.setPixelColor(x, y, QtGui.QColor(x % 256, y % 256, 0))
+    image.save(filename)
+    canvas.loadPixmap(QtGui.QPixmap.fromImage(image), clear_shapes=False)
+    expected = canvas.grab().toImage()
+
+    canvas.loadTiledImage(TiledImage(filename, tile_size=64), clear_shapes=False)
+    assert canvas.imageSize() == QtCore.QSize(300, 200)
+    canvas.repaint()
+    canvas._tile_loader.waitForDone()
+    QtWidgets.QApplication.processEvents()
+    assert canvas.grab().toImage().convertToFormat(expected.format()) == expected
+
+
+@pytest.mark.gui
+def test_Canvas_paint_without_image(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    canvas.resize(100, 100)
+    with qtbot.waitExposed(canvas):
+        canvas.show()
+    painted = []
+    canvas._staticLayer = lambda rect: painted.append(rect) or QtGui.QPixmap(
+        rect.size()
+    )
+    canvas.repaint()
+    canvas.loadPixmap(QtGui.QPixmap())
+    canvas.repaint()
+    assert painted == []
@@ -0,0 +1,65 @@
+import pytest
+from PyQt5 import QtGui
+from PyQt5 import QtWidgets
+
+from labelme._canvas.scaled_pixmap import ScaledPixmapCache
+
+
+def _wait(cache):
+    assert cache.waitForDone(5000)
+    QtWidgets.QApplication.processEvents()
+
+
+@pytest.mark.gui
+def test_ScaledPixmapCache(qtbot):
+    image = QtGui.QImage(1024, 768, QtGui.QImage.Format_RGB32)
+    image.fill(QtGui.QColor(255, 0, 0))
+    pixmap = QtGui.QPixmap.fromImage(image)
+    cache = ScaledPixmapCache(min_size=128)
+    cache.setPixmap(pixmap)
+
+    assert cache.pixmap(0.3) == (pixmap, 1.0)
+    cache.request(1.5)  # upscaling is left to the painter
+    _wait(cache)
+    assert cache.pixmap(1.5) == (pixmap, 1.0)
+
+    with qtbot.waitSignal(cache.scaledPixmapReady):
+        cache.request(0.3)
+    _wait(cache)
+    scaled, scale = cache.pixmap(0.3)
+    assert scale == 0.3
+    assert scaled.size() == pixmap.size() * 0.3
+    assert scaled.toImage().pixelColor(10, 10) == QtGui.QColor(255, 0, 0)
+
+    # the pyramid stops before going under min_size
+    level, scale = cache.pixmap(0.1)
+    assert scale == 0.25
+    assert level.size() == pixmap.size() / 4
+
+
+@pytest.mark.gui
+def test_ScaledPixmapCache_drops_stale_results(qtbot):
+    image = QtGui.QImage(1024, 768, QtGui.QImage.Format_RGB32)
+    cache = ScaledPixmapCache()
+    cache.setPixmap(QtGui.QPixmap.fromImage(image))
+    cache.request(0.3)
+    pixmap = QtGui.QPixmap.fromImage(image.scaled(512, 384))
+    cache.setPixmap(pixmap)
+    _wait(cache)
+    assert cache.pixmap(0.3) == (pixmap, 1.0)
+
+
+@pytest.mark.gui
+def test_ScaledPixmapCache_keeps_only_levels(qtbot):
+    image = QtGui.QImage(1024, 768, QtGui.QImage.Format_RGB32)
+    cache = ScaledPixmapCache(min_size=128)
+    cache.setPixmap(QtGui.QPixmap.fromImage(image))
+    # zooming through many scales before the results come back
+    for i in range(10):
+        cache.request(0.3 + i / 100)
+    _wait(cache)
+
+    assert sorted(cache._levels) == [0.25, 0.5]
+    scaled, scale = cache.pixmap(0.39)
+    assert scale == 0.39
+    assert cache.pixmap(0.3)[1] == 0.5
@@ -0,0 +1,69 @@
+import pytest
+from PyQt5 import QtCore
+from PyQt5 import QtGui
+
+from labelme._canvas.spatial_index import GridIndex
+from labelme.shape import Shape
+from labelme.widgets.canvas import Canvas
+
+
+def test_GridIndex_query():
+    index = GridIndex(cell_size=10)
+    index.insert("a", (0, 0, 5, 5))
+    index.insert("b", (8, 8, 25, 12))
+    index.insert("c", (100, 100, 100, 100))
+
+    assert len(index) == 3
+    assert index.query(3, 3) == {"a"}
+    assert index.query(20, 10) == {"b"}
+    assert index.query(6, 6) == set()
+    assert index.query(6, 6, radius=2) == {"a", "b"}
+    assert index.query(98, 99, radius=2) == {"c"}
+
+
+def test_GridIndex_update_and_remove():
+    index = GridIndex(cell_size=10)
+    index.insert("a", (0, 0, 5, 5))
+    index.insert("a", (50, 50, 55, 55))
+    assert index.query(3, 3) == set()
+    assert index.query(52, 52) == {"a"}
+    assert index.bbox("a") == (50, 50, 55, 55)
+
+    index.remove("a")
+    index.remove("a")  # no-op
+    assert "a" not in index
+    assert len(index) == 0
+    assert index.query(52, 52) == set()
+
+
+def _rectangle(x1, y1, x2, y2):
+    shape = Shape(shape_type="rectangle")
+    shape.points = [QtCore.QPointF(x1, y1), QtCore.QPointF(x2, y2)]
+    shape.close()
+    return shape
+
+
+@pytest.mark.gui
+def test_Canvas_shape_index(qtbot):
+    canvas = Canvas()
+    qtbot.addWidget(canvas)
+    canvas.loadPixmap(QtGui.QPixmap(200, 200))
+    a = _rectangle(10, 10, 30, 30)
+    b = _rectangle(100, 100, 150, 150)
+    canvas.loadShapes([a, b])
+
+    assert canvas._shapesNear(QtCore.QPointF(20, 20)) == [a]
+    assert canvas._shapesNear(QtCore.QPointF(60, 60)) == []
+
+    # moving a shape keeps its entry in sync
+    canvas.prevPoint = QtCore.QPointF(20, 20)
+    canvas.boundedMoveShapes([a], QtCore.QPointF(70, 70))
+    assert canvas._shapesNear(QtCore.QPointF(20, 20)) == []
+    assert canvas._shapesNear(QtCore.QPointF(70, 70)) == [a]
+
+    canvas.selectShapePoint(QtCore.QPointF(120, 120), False)
+    assert canvas._shapesNear(QtCore.QPointF(120, 120)) == [b]
+
+    canvas.deleteShape(b)
+    assert canvas._shapesNear(QtCore.QPointF(120, 120)) == []
+    assert len(canvas._shape_index) == 1
@@ -0,0 +1,96 @@
+import numpy as np
+from PyQt5 import QtCore
+
+from labelme._canvas.undo_history import ShapeHistory
+from labelme.shape import Shape
+
+
+def _polygon(label, points):
+    shape = Shape(label=label, shape_type="polygon")
+    for x, y in points:
+        shape.addPoint(QtCore.QPointF(x, y))
+    shape.close()
+    return shape
+
+
+def test_ShapeHistory_undo():
+    a = _polygon("a", [(0, 0), (10, 0), (10, 10)])
+    b = _polygon("b", [(20, 20), (30, 20), (30, 30)])
+    history = ShapeHistory(max_bytes=1024 * 1024)
+
+    history.store([a, b])  # baseline
+    assert len(history) == 0
+    assert not history.store([a, b])
+
+    a.moveVertexBy(1, QtCore.QPointF(5, 0))
+    assert history.isModified(a)
+    assert not history.isModified(b)
+    assert history.store([a, b])
+
+    b.label = "c"
+    assert history.store([a])  # b relabeled, then deleted
+    assert len(history) == 2
+
+    shapes, touched = history.undo()
+    assert shapes == [a, b]
+    assert touched == [b]
+    assert b.label == "b"
+    assert a[1] == QtCore.QPointF(15, 0)
+
+    shapes, touched = history.undo()
+    assert shapes == [a, b]
+    assert touched == [a]
+    assert a[1] == QtCore.QPointF(10, 0)
+    np.testing.assert_array_equal(a.coords(), [[0, 0], [10, 0], [10, 10]])
+    assert len(history) == 0
+
+
+def test_ShapeHistory_discard():
+    a = _polygon("a", [(0, 0), (10, 0), (10, 10)])
+    b = _polygon("b", [(20, 20), (30, 20), (30, 30)])
+    history = ShapeHistory(max_bytes=1024 * 1024)
+    history.store([a])
+    history.store([a, b])
+    history.discard()
+    assert len(history) == 0
+    assert history.isModified(b)
+
+    # with only the baseline left, the next store becomes the baseline
+    history.discard()
+    history.store([b])
+    assert len(history) == 0
+    assert not history.isModified(b)
+
+
+def test_ShapeHistory_shares_masks():
+    mask = np.ones((1000, 1000), dtype=bool)
+    shape = Shape(label="a", shape_type="mask", mask=mask)
+    shape.points = [QtCore.QPointF(0, 0), QtCore.QPointF(999, 999)]
+    shape.point_labels = [1, 1]
+    history = ShapeHistory(max_bytes=10 * 1024)
+    history.store([shape])
+
+    for _ in range(20):
+        shape.moveBy(QtCore.QPointF(1, 0))
+        history.store([shape])
+    # moving does not copy the mask, so all the edits fit in the budget
+    assert len(history) == 20
+    assert history.nbytes < 10 * 1024
+
+    shape.mask = ~mask
+    history.store([shape])
+    # the replaced mask is kept alive by the newest edit only
+    assert len(history) == 1
+    history.undo()
+    assert shape.mask is mask
+    assert shape[0] == QtCore.QPointF(20, 0)
+
+
+def test_ShapeHistory_max_edits():
+    shape = _polygon("a", [(0, 0), (10, 0), (10, 10)])
+    history = ShapeHistory(max_bytes=1024 * 1024, max_edits=3)
+    history.store([shape])
+    for _ in range(5):
+        shape.moveBy(QtCore.QPointF(1, 0))
+        history.store([shape])
+    assert len(history) == 3
@@ -0,0 +1,70 @@
+import os.path as osp
+
+from PyQt5 import QtGui
+
+from labelme._media.frame_cache import FrameCache
+from labelme._media.frame_cache import FramePrefetcher
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "../data")
+
+
+def _image(width, height):
+    return QtGui.QImage(width, height, QtGui.QImage.Format_RGB32)
+
+
+def test_FrameCache_evicts_by_bytes():
+    image = _image(10, 10)
+    frame_bytes = image.sizeInBytes() + 1
+    cache = FrameCache(max_bytes=frame_bytes * 2)
+    cache.put("a", b"a", image)
+    cache.put("b", b"b", image)
+    assert cache.get("a") is not None  # "b" becomes least recently used
+    cache.put("c", b"c", image)
+
+    assert "a" in cache
+    assert "b" not in cache
+    assert "c" in cache
+    assert cache.num_bytes == frame_bytes * 2
+
+
+def test_FrameCache_hit_rate():
+    cache = FrameCache(max_bytes=1024 * 1024)
+    cache.put("a", b"a", _image(10, 10))
+    assert cache.get("a") is not None
+    assert cache.get("b") is None
+    assert cache.hits == 1
+    assert cache.misses == 1
+    assert cache.hit_rate == 0.5
+
+
+def test_FramePrefetcher_prefetch():
+    filenames = [
+        osp.join(data_dir, "raw/2011_000003.jpg"),
+        osp.join(data_dir, "raw/2011_000006.jpg"),
+    ]
+    cache = FrameCache(max_bytes=64 * 1024 * 1024)
+    prefetcher = FramePrefetcher(cache)
+    prefetcher.prefetch(filenames)
+    assert prefetcher.waitForDone(10000)
+
+    for filename in filenames:
+        assert filename in cache
+    image_data, image = prefetcher.load(filenames[0])
+    assert image_data is not None
+    assert not image.isNull()
+    assert cache.hits == 1
+
+
+def test_FramePrefetcher_skip():
+    filenames = [
+        osp.join(data_dir, "raw/2011_000003.jpg"),
+        osp.join(data_dir, "raw/2011_000006.jpg"),
+    ]
+    cache = FrameCache(max_bytes=64 * 1024 * 1024)
+    prefetcher = FramePrefetcher(cache, skip=lambda filename: filename == filenames[0])
+    prefetcher.prefetch(filenames)
+    assert prefetcher.waitForDone(10000)
+
+    assert filenames[0] not in cache
+    assert filenames[1] in cache
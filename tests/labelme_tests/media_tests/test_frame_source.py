@@ -0,0 +1,63 @@
+import os
+import os.path as osp
+
+import cv2
+import numpy as np
+
+from labelme._media.frame_source import VideoFrameSource
+from labelme._media.video_extractor import frame_filename
+
+
+def _write_video(filename, num_frames, fps=10):
+    writer = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*"mp4v"), fps, (32, 24))
+    for i in range(num_frames):
+        writer.write(np.full((24, 32, 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+def test_VideoFrameSource(tmp_path):
+    video_file = str(tmp_path / "video.mp4")
+    _write_video(video_file, num_frames=20)
+    output_dir = str(tmp_path / "video" / "origins" / "images")
+
+    source = VideoFrameSource(video_file, output_dir, frame_stride=2, ring_size=4)
+    filenames = source.filenames()
+    assert len(source) == len(filenames) == 10
+    assert filenames[1] == osp.join(output_dir, frame_filename(2))
+    assert source.frameIndex(filenames[1]) == 2
+    assert not source.hasFilename(osp.join(output_dir, "foo.jpg"))
+    assert not osp.exists(output_dir)  # nothing is extracted up front
+
+    # random access by seeking gives the same frames as decoding in order
+    sequential = [source.read(i).copy() for i in range(20)]
+    for i in [15, 3, 19, 0, 7, 8]:
+        source._ring.clear()
+        np.testing.assert_array_equal(source.read(i), sequential[i])
+    assert len(source._ring) == 1
+
+    # decoded frames are shown without a JPEG round trip
+    image_data, image = source.load(filenames[1])
+    assert image_data is None
+    assert image.width() == 32 and image.height() == 24
+    b, g, r = sequential[2][0, 0]
+    assert image.pixelColor(0, 0).getRgb()[:3] == (r, g, b)
+
+    image_data = source.imageData(filenames[1])
+    assert source.materialize(filenames[1])
+    assert not source.materialize(filenames[1])
+    assert os.listdir(output_dir) == [frame_filename(2)]
+    with open(filenames[1], "rb") as f:
+        assert f.read() == image_data
+    assert source.load(filenames[1])[0] == image_data
+    source.close()
+
+
+def test_VideoFrameSource_time_range(tmp_path):
+    video_file = str(tmp_path / "video.mp4")
+    _write_video(video_file, num_frames=20, fps=10)
+
+    source = VideoFrameSource(
+        video_file, str(tmp_path), start_time=0.5, end_time=1.2, frame_stride=3
+    )
+    assert list(source.frame_indices) == [5, 8, 11]
+    source.close()
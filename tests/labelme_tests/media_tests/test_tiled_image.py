@@ -0,0 +1,96 @@
+import numpy as np
+import PIL.Image
+import pytest
+import tifffile
+
+from labelme._media.tiled_image import TiledImage
+from labelme._media.tiled_image import TileLoader
+from labelme._media.tiled_image import read_image_size
+
+
+def _array(height, width):
+    rng = np.random.default_rng(0)
+    return rng.integers(0, 256, size=(height, width, 3), dtype=np.uint8)
+
+
+def test_read_image_size(tmp_path):
+    filename = str(tmp_path / "image.jpg")
+    exif = PIL.Image.Exif()
+    exif[0x0112] = 6  # rotated by 90 degrees
+    PIL.Image.fromarray(_array(30, 50)).save(filename, exif=exif)
+    assert read_image_size(filename) == (30, 50)
+
+
+@pytest.mark.parametrize("tile", [(64, 64), None])
+def test_TiledImage_tiff(tmp_path, tile):
+    array = _array(300, 500)
+    filename = str(tmp_path / "image.tif")
+    tifffile.imwrite(filename, array, tile=tile, rowsperstrip=16)
+
+    image = TiledImage(filename, tile_size=128)
+    assert (image.width, image.height) == (500, 300)
+    assert image.level_count == 3
+    assert image.tileGrid(0) == (4, 3)
+    assert image.cached(0, 1, 1) is None
+    np.testing.assert_array_equal(image._tileArray(0, 1, 1), array[128:256, 128:256])
+    np.testing.assert_array_equal(image._tileArray(0, 3, 2), array[256:, 384:])
+    assert image.tile(0, 3, 2).size().width() == 116
+    assert image.cached(0, 3, 2) is not None
+
+    level2 = image._tileArray(2, 0, 0)
+    assert level2.shape == (75, 125, 3)
+    expected = array.reshape(75, 4, 125, 4, 3).mean(axis=(1, 3))
+    assert np.abs(level2 - expected).max() <= 1
+
+
+def test_TiledImage_pil(tmp_path, monkeypatch):
+    array = _array(300, 500)
+    filename = str(tmp_path / "image.png")
+    PIL.Image.fromarray(array).save(filename)
+
+    # the decoded image is larger than the tile cache
+    image = TiledImage(filename, tile_size=128, max_cache_bytes=200 * 1024)
+    opened = []
+    open_image = PIL.Image.open
+    monkeypatch.setattr(
+        PIL.Image, "open", lambda *args: opened.append(args) or open_image(*args)
+    )
+    np.testing.assert_array_equal(image._tileArray(0, 2, 1), array[128:256, 256:384])
+    for col in range(4):
+        image._tileArray(0, col, 0)
+    assert image._tileArray(1, 1, 1).shape == (22, 122, 3)
+    assert len(opened) == 1
+    assert image.cache_bytes <= 200 * 1024
+    assert image.level_bytes == array.nbytes + 150 * 250 * 3
+    image.close()
+    assert image.level_bytes == 0
+
+
+def test_TiledImage_pil_level_bytes(tmp_path):
+    array = _array(300, 500)
+    filename = str(tmp_path / "image.png")
+    PIL.Image.fromarray(array).save(filename)
+
+    image = TiledImage(filename, tile_size=128, max_level_bytes=200 * 1024)
+    image._tileArray(0, 0, 0)
+    assert image.level_bytes == array.nbytes  # the level in use is kept
+    image._tileArray(1, 0, 0)
+    image._tileArray(2, 0, 0)
+    assert list(image._levels) == [1, 2]
+    assert image.level_bytes == (150 * 250 + 75 * 125) * 3
+    np.testing.assert_array_equal(image._tileArray(0, 1, 1), array[128:256, 128:256])
+    assert list(image._levels) == [0]
+
+
+def test_TileLoader(qtbot, tmp_path):
+    filename = str(tmp_path / "image.tif")
+    tifffile.imwrite(filename, _array(300, 500), tile=(64, 64))
+    image = TiledImage(filename, tile_size=128)
+
+    loader = TileLoader()
+    loader.setImage(image)
+    with qtbot.waitSignal(loader.tileReady):
+        loader.request([(0, 0, 0), (1, 1, 0)])
+    loader.waitForDone()
+    qtbot.waitUntil(lambda: image.cached(1, 1, 0) is not None)
+    assert image.cached(0, 0, 0) is not None
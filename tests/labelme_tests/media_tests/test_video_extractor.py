@@ -0,0 +1,107 @@
+import os
+import os.path as osp
+
+import cv2
+import numpy as np
+
+from labelme._media.video_extractor import EXTRACTED_MARKER
+from labelme._media.video_extractor import VideoFrameExtractor
+from labelme._media.frame_source import VideoFrameSource
+from labelme._media.video_extractor import frame_filename
+
+
+def _write_video(filename, num_frames, fps=10):
+    writer = cv2.VideoWriter(filename, cv2.VideoWriter_fourcc(*"mp4v"), fps, (32, 24))
+    for i in range(num_frames):
+        writer.write(np.full((24, 32, 3), i * 10, dtype=np.uint8))
+    writer.release()
+
+
+def _extract(video_file, output_dir, **kwargs):
+    extractor = VideoFrameExtractor(video_file, output_dir, **kwargs)
+    extracted = []
+    extractor.framesExtracted.connect(extracted.extend)
+    extractor.run()  # synchronously, in this thread
+    return extractor, extracted
+
+
+def test_VideoFrameExtractor(tmp_path):
+    video_file = str(tmp_path / "video.mp4")
+    _write_video(video_file, num_frames=10)
+    output_dir = str(tmp_path / "video" / "origins" / "images")
+
+    extractor, extracted = _extract(video_file, output_dir, frame_stride=3)
+
+    expected = [osp.join(output_dir, frame_filename(i)) for i in [0, 3, 6, 9]]
+    assert extracted == expected
+    assert sorted(os.listdir(output_dir)) == [osp.basename(f) for f in expected]
+    assert cv2.imread(expected[0]).shape == (24, 32, 3)
+    assert osp.exists(osp.join(osp.dirname(output_dir), EXTRACTED_MARKER))
+    assert extractor.num_extracted == 4
+
+
+def test_VideoFrameExtractor_time_range_and_resume(tmp_path):
+    video_file = str(tmp_path / "video.mp4")
+    _write_video(video_file, num_frames=20, fps=10)
+    output_dir = str(tmp_path / "frames")
+
+    _, extracted = _extract(video_file, output_dir, end_time=0.4)
+    assert [osp.basename(f) for f in extracted] == [frame_filename(i) for i in range(5)]
+
+    # frames already on disk are not written again
+    _, extracted = _extract(video_file, output_dir, end_time=0.9)
+    assert [osp.basename(f) for f in extracted] == [
+        frame_filename(i) for i in range(5, 10)
+    ]
+
+
+def test_VideoFrameExtractor_same_frames_as_source(tmp_path):
+    video_file = str(tmp_path / "video.mp4")
+    _write_video(video_file, num_frames=20, fps=10)
+    output_dir = str(tmp_path / "frames")
+    kwargs = dict(frame_stride=3, start_time=0.5, end_time=1.5)
+
+    _, extracted = _extract(video_file, output_dir, **kwargs)
+    source = VideoFrameSource(video_file, output_dir, **kwargs)
+    assert extracted == source.filenames()
+    assert [osp.basename(f) for f in extracted] == [
+        frame_filename(i) for i in [5, 8, 11, 14]
+    ]
+    # the frame written is the frame the source decodes for that name
+    assert abs(cv2.imread(extracted[1]).mean() - source.read(8).mean()) < 2
+    source.close()
+
+def test_VideoFrameExtractor_decode_error(tmp_path, monkeypatch):
+    video_file = str(tmp_path / "video.mp4")
+    _write_video(video_file, num_frames=10)
+    output_dir = str(tmp_path / "video" / "origins" / "images")
+
+    VideoCapture = cv2.VideoCapture
+
+    class Capture:
+        """Fails to decode from the fourth frame on, like a corrupt video."""
+
+        def __init__(self, filename):
+            self._capture = VideoCapture(filename)
+            self._retrieved = 0
+
+        def __getattr__(self, name):
+            return getattr(self._capture, name)
+
+        def retrieve(self):
+            self._retrieved += 1
+            if self._retrieved > 3:
+                return False, None
+            return self._capture.retrieve()
+
+    monkeypatch.setattr(cv2, "VideoCapture", Capture)
+    extractor = VideoFrameExtractor(video_file, output_dir)
+    extracted = []
+    errors = []
+    extractor.framesExtracted.connect(extracted.extend)
+    extractor.extractionFailed.connect(errors.append)
+    extractor.run()
+
+    assert [osp.basename(f) for f in extracted] == [frame_filename(i) for i in range(3)]
+    assert len(errors) == 1
+    assert not osp.exists(osp.join(osp.dirname(output_dir), EXTRACTED_MARKER))
@@ -0,0 +1,94 @@
+import os
+import tarfile
+import zipfile
+
+import numpy as np
+import pytest
+
+from labelme._storage import archive
+from labelme._storage.archive import ArchiveCanceled
+from labelme._storage.archive import write_archive
+
+
+def _members(tmp_path):
+    rng = np.random.default_rng(0)
+    files = {
+        "images/a.jpg": rng.bytes(5000),
+        "annotations/a.json": b'{"shapes": []}' * 500,
+        "annotations/empty.json": b"",
+        "annotations/random.txt": rng.bytes(5000),  # does not deflate
+    }
+    members = []
+    for arcname, data in files.items():
+        filename = tmp_path / "src" / arcname
+        filename.parent.mkdir(parents=True, exist_ok=True)
+        filename.write_bytes(data)
+        members.append((str(filename), arcname))
+    return members, files
+
+
+def test_write_archive_zip(tmp_path):
+    members, files = _members(tmp_path)
+    progress = []
+    path = str(tmp_path / "out.zip")
+
+    stats = write_archive(
+        path, members, max_workers=2, progress=lambda *args: progress.append(args)
+    )
+
+    assert stats.num_files == 4
+    assert stats.input_bytes == sum(len(data) for data in files.values())
+    assert stats.output_bytes == os.path.getsize(path)
+    assert progress[-1] == (4, 4)
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        assert {name: zf.read(name) for name in zf.namelist()} == files
+        compress_types = {info.filename: info.compress_type for info in zf.infolist()}
+    assert compress_types == {
+        "images/a.jpg": zipfile.ZIP_STORED,
+        "annotations/a.json": zipfile.ZIP_DEFLATED,
+        "annotations/empty.json": zipfile.ZIP_STORED,
+        "annotations/random.txt": zipfile.ZIP_STORED,
+    }
+
+
+def test_write_archive_zip_without_raw_writes(tmp_path, monkeypatch):
+    # zipfile internals differ on this Python version
+    monkeypatch.setattr(archive, "_RAW_WRITE_VERSIONS", ((3, 0), (3, 0)))
+    members, files = _members(tmp_path)
+    path = str(tmp_path / "out.zip")
+
+    write_archive(path, members, max_workers=2)
+
+    with zipfile.ZipFile(path) as zf:
+        assert zf.testzip() is None
+        assert {name: zf.read(name) for name in zf.namelist()} == files
+        assert zf.getinfo("images/a.jpg").compress_type == zipfile.ZIP_STORED
+        assert zf.getinfo("annotations/a.json").compress_type == zipfile.ZIP_DEFLATED
+
+
+@pytest.mark.parametrize("format", ["tar", "tar.zst"])
+def test_write_archive_tar(tmp_path, format):
+    members, files = _members(tmp_path)
+    path = str(tmp_path / ("out." + format))
+
+    if format == "tar.zst":
+        zstandard = pytest.importorskip("zstandard")
+    write_archive(path, members, format=format)
+
+    with open(path, "rb") as f:
+        if format == "tar.zst":
+            f = zstandard.ZstdDecompressor().stream_reader(f)
+        with tarfile.open(fileobj=f, mode="r|") as tar:
+            contents = {member.name: tar.extractfile(member).read() for member in tar}
+    assert contents == files
+
+
+def test_write_archive_canceled(tmp_path):
+    members, _ = _members(tmp_path)
+    path = str(tmp_path / "out.zip")
+
+    with pytest.raises(ArchiveCanceled):
+        write_archive(path, members, canceled=lambda: True)
+
+    assert sorted(os.listdir(tmp_path)) == ["src"]
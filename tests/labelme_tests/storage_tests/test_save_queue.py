@@ -0,0 +1,57 @@
+import json
+import threading
+
+from labelme._storage.save_queue import SaveQueue
+from labelme.label_file import LabelFile
+
+
+def _data(label):
+    return dict(
+        shapes=[dict(label=label, points=[[0, 0]], shape_type="point")],
+        imagePath="image.jpg",
+        imageHeight=10,
+        imageWidth=20,
+    )
+
+
+def test_SaveQueue_collapses_saves(qtbot, tmp_path, monkeypatch):
+    # hold the first write so that later saves queue up behind it
+    started = threading.Event()
+    release = threading.Event()
+    save = LabelFile.save
+
+    def slow_save(self, filename, **kwargs):
+        started.set()
+        release.wait()
+        return save(self, filename, **kwargs)
+
+    monkeypatch.setattr(LabelFile, "save", slow_save)
+
+    queue = SaveQueue()
+    saved = []
+    queue.saved.connect(lambda filename, tag: saved.append((filename, tag)))
+    label_file = str(tmp_path / "labels" / "image.json")
+    queue.submit(label_file, tag="a", **_data("a"))
+    started.wait()
+    for label in ["b", "c"]:
+        queue.submit(label_file, tag=label, **_data(label))
+    assert queue.isPending(label_file)
+    release.set()
+    queue.waitForDone()
+    qtbot.waitUntil(lambda: len(saved) == 2)
+
+    assert saved == [(label_file, "a"), (label_file, "c")]
+    assert not queue.isPending(label_file)
+    with open(label_file) as f:
+        assert json.load(f)["shapes"][0]["label"] == "c"
+
+
+def test_SaveQueue_reports_errors(qtbot, tmp_path):
+    queue = SaveQueue()
+    label_file = str(tmp_path / "image.json")
+    data = _data("a")
+    data["shapes"][0]["points"] = object()  # not serializable
+    with qtbot.waitSignal(queue.failed) as blocker:
+        queue.submit(label_file, tag="image.jpg", **data)
+    assert blocker.args[:2] == [label_file, "image.jpg"]
+    assert queue.num_written == 0
@@ -1,6 +1,7 @@
 import os.path as osp
 import shutil
 import tempfile
+import types
 
 import pytest
 
@@ -112,3 +113,61 @@ def test_MainWindow_annotate_jpg(qtbot):
 
     labelme.testing.assert_labelfile_sanity(out_file)
     shutil.rmtree(tmp_dir)
+
+
+@pytest.mark.gui
+def test_MainWindow_export_releases_dialog(qtbot, tmp_path):
+    from PyQt5 import QtCore
+    from PyQt5 import QtWidgets
+
+    win = labelme.app.MainWindow()
+    qtbot.addWidget(win)
+    win.labelPath = str(tmp_path)  # no label files: the export fails quickly
+
+    for _ in range(2):
+        win.openExportDialog()
+        exporter = win._exporter
+        destroyed = []
+        exporter.destroyed.connect(lambda: destroyed.append(True))
+        qtbot.waitUntil(lambda: win._exporter is None)
+        QtWidgets.QApplication.sendPostedEvents(None, QtCore.QEvent.DeferredDelete)
+        assert destroyed
+        assert win.findChildren(QtWidgets.QProgressDialog) == []
+    win.close()
+
+
+@pytest.mark.gui
+def test_MainWindow_vetoed_close_keeps_frame_source(qtbot):
+    win = labelme.app.MainWindow()
+    qtbot.addWidget(win)
+    win.show()
+    closed = []
+    win._frame_source = types.SimpleNamespace(close=lambda: closed.append(True))
+    win.mayContinue = lambda: False  # "Cancel" in the save changes prompt
+
+    win.close()
+
+    assert win.isVisible()
+    assert closed == []
+    assert win._frame_source is not None
+    win._frame_source = None
+
+
+@pytest.mark.gui
+def test_MainWindow_vetoed_close_keeps_export(qtbot):
+    win = labelme.app.MainWindow()
+    qtbot.addWidget(win)
+    win.show()
+    canceled = []
+    win._exporter = types.SimpleNamespace(
+        cancel=lambda: canceled.append(True), waitForDone=lambda: True
+    )
+    win.mayContinue = lambda: False  # "Cancel" in the save changes prompt
+
+    win.close()
+    assert canceled == []
+
+    win.mayContinue = lambda: True
+    win.close()
+    assert canceled == [True]
+    win._exporter = None
@@ -0,0 +1,242 @@
+import glob
+import gzip
+import json
+import os
+import os.path as osp
+import shutil
+import types
+
+import numpy as np
+import PIL.Image
+import pytest
+
+import labelme.utils
+
+from labelme._storage import archive
+from labelme.DataSetExporter import DatasetExporter
+from labelme.DataSetExporter import shape_mask
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "data")
+
+
+def _make_project(root):
+    os.makedirs(osp.join(root, "origins/images"))
+    os.makedirs(osp.join(root, "annotations/labelme_jsons"))
+    for json_file in sorted(glob.glob(osp.join(data_dir, "annotated/*.json"))):
+        base = osp.splitext(osp.basename(json_file))[0]
+        shutil.copy(
+            osp.join(data_dir, "annotated", base + ".jpg"),
+            osp.join(root, "origins/images", base + ".jpg"),
+        )
+        with open(json_file) as f:
+            data = json.load(f)
+        data["imagePath"] = "/origins/images/" + base + ".jpg"
+        with open(
+            osp.join(root, "annotations/labelme_jsons", base + ".json"), "w"
+        ) as f:
+            json.dump(data, f)
+
+
+def test_DatasetExporter_export(tmp_path):
+    root = str(tmp_path)
+    _make_project(root)
+    exporter = DatasetExporter(types.SimpleNamespace(labelPath=root), max_workers=2)
+    progress = []
+    exporter.progress.connect(lambda done, total: progress.append((done, total)))
+
+    assert exporter.export()
+
+    # frames, then archived files
+    assert progress[:2] == [(0, 3), (1, 3)]
+    assert (3, 3) in progress
+    assert progress[-1] == (25, 25)
+    with open(osp.join(root, "annotations/coco/dataset_coco.json")) as f:
+        coco = json.load(f)
+    assert [image["id"] for image in coco["images"]] == [1, 2, 3]
+    assert coco["images"][0]["file_name"] == "/origins/images/2011_000003.jpg"
+    assert [a["id"] for a in coco["annotations"]] == list(range(1, 19))
+    assert [a["image_id"] for a in coco["annotations"]] == [1] * 5 + [2] * 10 + [3] * 3
+    assert [c["name"] for c in coco["categories"]] == [
+        "person",
+        "bottle",
+        "__ignore__",
+        "chair",
+        "sofa",
+        "bus",
+        "car",
+    ]
+
+    crops = sorted(os.listdir(osp.join(root, "images/sofa")))
+    assert crops == ["2011_000006_sofa_%d.png" % i for i in range(1, 5)]
+    crop = PIL.Image.open(osp.join(root, "images/sofa", crops[0]))
+    assert crop.mode == "RGBA"
+    assert len(os.listdir(osp.join(root, "archive"))) == 1
+
+    # the manifest keeps ids and labels; the shapes are kept apart, per frame
+    manifest = exporter.load_manifest()
+    assert manifest["frames"]["2011_000003.json"]["annotations"][0] == {
+        "label": "person",
+        "id": 1,
+    }
+    assert sorted(os.listdir(osp.join(root, "export_cache"))) == sorted(
+        manifest["frames"]
+    )
+
+
+@pytest.mark.parametrize(
+    "shape_type,points",
+    [
+        ("polygon", [[10.5, 20.2], [80.7, 25.1], [40.3, 90.9]]),
+        ("polygon", [[-5.5, 50.2], [50.7, 0.1], [105.3, 95.9], [0.2, 70.4]]),
+        ("rectangle", [[70.2, 60.8], [15.1, 12.4]]),
+        ("circle", [[50.3, 50.6], [70.1, 62.2]]),
+        ("line", [[10.2, 10.7], [90.4, 60.1]]),
+        ("linestrip", [[10.2, 10.7], [50.4, 80.1], [90.9, 20.5]]),
+        ("point", [[40.6, 30.2]]),
+    ],
+)
+def test_shape_mask(shape_type, points):
+    (xmin, ymin, xmax, ymax), mask = shape_mask(
+        dict(points=points, shape_type=shape_type), image_size=(100, 100)
+    )
+
+    assert mask.size == (xmax - xmin, ymax - ymin)
+    expected = np.zeros((100, 100), dtype=bool)
+    if shape_type == "polygon":
+        # polygon crops are cut as before: drawn at integer coordinates, with
+        # the bottom-right edge of the bbox left out
+        expected = labelme.utils.shape_to_mask(
+            expected.shape, [[int(x), int(y)] for x, y in points]
+        )
+    elif shape_type == "rectangle":
+        expected[ymin:ymax, xmin:xmax] = True
+    else:
+        expected = labelme.utils.shape_to_mask(expected.shape, points, shape_type)
+        assert expected[:ymin].sum() == expected[ymax:].sum() == 0
+        assert expected[:, :xmin].sum() == expected[:, xmax:].sum() == 0
+    # the bbox may stick out of the image, where the crop is transparent
+    expected = np.pad(expected, 10)
+    np.testing.assert_array_equal(
+        np.asarray(mask) > 0, expected[ymin + 10 : ymax + 10, xmin + 10 : xmax + 10]
+    )
+
+
+def test_DatasetExporter_export_incremental(tmp_path):
+    root = str(tmp_path)
+    _make_project(root)
+    exporter = DatasetExporter(types.SimpleNamespace(labelPath=root), max_workers=2)
+    progress = []
+    exporter.progress.connect(lambda done, total: progress.append((done, total)))
+    coco_file = osp.join(root, "annotations/coco/dataset_coco.json")
+
+    assert exporter.export()
+    with open(coco_file) as f:
+        coco_before = json.load(f)
+    person_crop = osp.join(root, "images/person/2011_000003_person_1.png")
+    mtime_before = os.stat(person_crop).st_mtime_ns
+
+    # drop the last sofa of one frame and remove another frame
+    json_file = osp.join(root, "annotations/labelme_jsons/2011_000006.json")
+    with open(json_file) as f:
+        data = json.load(f)
+    data["shapes"].pop()
+    with open(json_file, "w") as f:
+        json.dump(data, f)
+    os.remove(osp.join(root, "annotations/labelme_jsons/2011_000025.json"))
+
+    progress.clear()
+    assert exporter.export()
+
+    assert progress[:2] == [(0, 1), (1, 1)]
+    assert os.stat(person_crop).st_mtime_ns == mtime_before
+    assert sorted(os.listdir(osp.join(root, "images/sofa"))) == [
+        "2011_000006_sofa_%d.png" % i for i in range(1, 4)
+    ]
+    assert os.listdir(osp.join(root, "images/bus")) == []
+    assert os.listdir(osp.join(root, "images/car")) == []
+    assert not osp.exists(osp.join(root, "export_cache/2011_000025.json"))
+    with open(coco_file) as f:
+        coco = json.load(f)
+    assert coco["images"] == coco_before["images"][:2]
+    assert coco["annotations"] == coco_before["annotations"][:14]
+    assert coco["categories"] == coco_before["categories"]
+
+    # nothing changed: no frame is processed again
+    progress.clear()
+    os.utime(json_file)
+    assert exporter.export()
+    assert progress[0] == (0, 0)
+    assert progress[1][1] > 0  # archived files
+    with open(coco_file) as f:
+        assert json.load(f) == coco
+
+
+def test_DatasetExporter_export_keeps_failed_frame(tmp_path):
+    root = str(tmp_path)
+    _make_project(root)
+    exporter = DatasetExporter(types.SimpleNamespace(labelPath=root), max_workers=2)
+    coco_file = osp.join(root, "annotations/coco/dataset_coco.json")
+    assert exporter.export()
+    with open(coco_file) as f:
+        coco_before = json.load(f)
+    crops_before = sorted(glob.glob(osp.join(root, "images/*/*.png")))
+
+    # the frame changed, but its image cannot be read this time
+    json_file = osp.join(root, "annotations/labelme_jsons/2011_000006.json")
+    with open(json_file) as f:
+        data = json.load(f)
+    data["shapes"].pop()
+    with open(json_file, "w") as f:
+        json.dump(data, f)
+    image_file = osp.join(root, "origins/images/2011_000006.jpg")
+    os.rename(image_file, image_file + ".locked")
+    assert exporter.export()
+
+    assert sorted(glob.glob(osp.join(root, "images/*/*.png"))) == crops_before
+    with open(coco_file) as f:
+        assert json.load(f) == coco_before
+    assert exporter.load_manifest()["frames"]["2011_000006.json"]["retry"]
+
+    # retried once the image is back
+    os.rename(image_file + ".locked", image_file)
+    assert exporter.export()
+    with open(coco_file) as f:
+        coco = json.load(f)
+    assert coco["images"] == coco_before["images"]
+    assert len(coco["annotations"]) == len(coco_before["annotations"]) - 1
+    assert "retry" not in exporter.load_manifest()["frames"]["2011_000006.json"]
+
+
+def test_DatasetExporter_export_coco_gzip(tmp_path):
+    root = str(tmp_path)
+    _make_project(root)
+    coco_dir = osp.join(root, "annotations/coco")
+    exporter = DatasetExporter(types.SimpleNamespace(labelPath=root), max_workers=2)
+    assert exporter.export()
+    with open(osp.join(coco_dir, "dataset_coco.json")) as f:
+        coco = json.load(f)
+
+    # switching to gzip rewrites the COCO file even though no frame changed
+    exporter.coco_gzip = True
+    assert exporter.export()
+
+    assert os.listdir(coco_dir) == ["dataset_coco.json.gz"]
+    with gzip.open(osp.join(coco_dir, "dataset_coco.json.gz"), "rt") as f:
+        assert json.load(f) == coco
+
+
+def test_DatasetExporter_export_without_zstandard(tmp_path, monkeypatch):
+    root = str(tmp_path)
+    _make_project(root)
+    monkeypatch.setattr(archive, "zstandard", None)
+    exporter = DatasetExporter(
+        types.SimpleNamespace(labelPath=root), archive_format="tar.zst"
+    )
+    progress = []
+    exporter.progress.connect(lambda done, total: progress.append((done, total)))
+
+    # fails up front, before any frame is processed
+    assert not exporter.export()
+    assert progress == []
+    assert not osp.exists(osp.join(root, "images"))
@@ -0,0 +1,123 @@
+import io
+import json
+import os
+import os.path as osp
+
+import numpy as np
+import PIL.Image
+import pytest
+
+from labelme import utils
+from labelme.label_file import LabelFile
+from labelme.label_file import LabelFileError
+
+here = osp.dirname(osp.abspath(__file__))
+data_dir = osp.join(here, "data")
+
+
+def test_load_image_file_passthrough():
+    img_file = osp.join(data_dir, "raw/2011_000003.jpg")
+    with open(img_file, "rb") as f:
+        img_data = f.read()
+    assert LabelFile.load_image_file(img_file) == img_data
+
+
+def test_load_image_file_exif_transpose(tmp_path):
+    img_file = str(tmp_path / "rotated.jpg")
+    img = PIL.Image.fromarray(np.zeros((20, 10, 3), dtype=np.uint8))
+    exif = img.getexif()
+    exif[0x0112] = 6  # Orientation: rotate 270
+    img.save(img_file, exif=exif)
+
+    img_data = LabelFile.load_image_file(img_file)
+    assert PIL.Image.open(io.BytesIO(img_data)).size == (20, 10)
+
+
+def test_save_fixes_image_size(tmp_path):
+    img_file = osp.join(data_dir, "raw/2011_000003.jpg")
+    with open(img_file, "rb") as f:
+        img_data = f.read()
+    label_file = str(tmp_path / "2011_000003.json")
+    LabelFile().save(
+        filename=label_file,
+        shapes=[],
+        imagePath="2011_000003.jpg",
+        imageHeight=1,
+        imageWidth=1,
+        imageData=img_data,
+    )
+
+    loaded = LabelFile(label_file)
+    assert loaded.imageData == img_data
+    with open(label_file) as f:
+        data = json.load(f)
+    assert (data["imageWidth"], data["imageHeight"]) == PIL.Image.open(img_file).size
+
+
+def test_save_is_atomic(tmp_path):
+    label_file = str(tmp_path / "image.json")
+    kwargs = dict(imagePath="image.jpg", imageHeight=10, imageWidth=20)
+    LabelFile().save(filename=label_file, shapes=[], **kwargs)
+    with open(label_file) as f:
+        saved = f.read()
+
+    with pytest.raises(LabelFileError):
+        LabelFile().save(filename=label_file, shapes=[object()], **kwargs)
+    with open(label_file) as f:
+        assert f.read() == saved
+    assert os.listdir(tmp_path) == ["image.json"]
+
+
+@pytest.mark.parametrize("csv_layout", ["points", "columnar"])
+def test_save_and_load_csv(tmp_path, csv_layout):
+    label_file = str(tmp_path / "image.csv")
+    mask = np.zeros((4, 5), dtype=bool)
+    mask[1:3, 2:4] = True
+    shapes = [
+        dict(
+            label="cat",
+            points=[[1.5, 2.0], [3.25, 4.0], [5.0, 0.125]],
+            group_id=3,
+            description="",
+            shape_type="polygon",
+            flags={"occluded": True},
+            mask=None,
+        ),
+        dict(
+            label="dog",
+            points=[[0.0, 1.0], [4.0, 3.0]],
+            group_id=None,
+            description="",
+            shape_type="mask",
+            flags={},
+            mask=utils.img_arr_to_b64(mask.astype(np.uint8)),
+        ),
+    ]
+    LabelFile().save(
+        filename=label_file,
+        shapes=shapes,
+        imagePath="image.jpg",
+        imageHeight=10,
+        imageWidth=20,
+        csv_layout=csv_layout,
+    )
+
+    loaded = LabelFile(label_file, load_image=False)
+    assert loaded.imagePath == "image.jpg"
+    assert [s["points"] for s in loaded.shapes] == [s["points"] for s in shapes]
+    assert [s["group_id"] for s in loaded.shapes] == [3, None]
+    assert loaded.shapes[0]["flags"] == {"occluded": True}
+    np.testing.assert_array_equal(loaded.shapes[1]["mask"], mask)
+
+
+def test_save_csv_error(tmp_path):
+    label_file = str(tmp_path / "image.csv")
+    with pytest.raises(LabelFileError):
+        LabelFile().save(
+            filename=label_file,
+            shapes=[dict(label="cat", points=[])],  # no shape_type etc.
+            imagePath="image.jpg",
+            imageHeight=10,
+            imageWidth=20,
+        )
+    assert not os.path.exists(label_file)
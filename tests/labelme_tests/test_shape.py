@@ -0,0 +1,109 @@
+import copy
+
+import numpy as np
+import pytest
+from PyQt5 import QtCore
+from PyQt5 import QtGui
+
+from labelme.shape import Shape
+
+
+def _mask_shape():
+    mask = np.zeros((20, 30), dtype=bool)
+    mask[5:15, 10:20] = True
+    shape = Shape(shape_type="mask", mask=mask)
+    shape.scale = 1.0  # the class attribute is shared with any canvas
+    shape.points = [QtCore.QPointF(100, 50), QtCore.QPointF(129, 69)]
+    shape.line_color = QtGui.QColor(0, 255, 0, 128)
+    shape.fill_color = QtGui.QColor(255, 0, 0, 255)
+    shape.select_line_color = QtGui.QColor(255, 255, 255, 255)
+    shape.select_fill_color = QtGui.QColor(0, 0, 255, 255)
+    return shape
+
+
+def _paint(shape, size=(200, 200)):
+    image = QtGui.QImage(*size, QtGui.QImage.Format_ARGB32)
+    image.fill(0)
+    painter = QtGui.QPainter(image)
+    shape.paint(painter)
+    painter.end()
+    return image
+
+
+@pytest.mark.gui
+def test_Shape_paint_mask_is_cached(qtbot):
+    shape = _mask_shape()
+    image = _paint(shape)
+    assert image.pixelColor(115, 60) == QtGui.QColor(255, 0, 0, 255)
+    assert image.pixelColor(102, 52).alpha() == 0
+
+    mask_image = shape._mask_image_cache[2]
+    mask_path = shape._mask_path_cache[3]
+    _paint(shape)
+    assert shape._mask_image_cache[2] is mask_image
+    assert shape._mask_path_cache[3] is mask_path
+
+    shape.selected = True
+    image = _paint(shape)
+    assert image.pixelColor(115, 60) == QtGui.QColor(0, 0, 255, 255)
+    assert shape._mask_path_cache[3] is mask_path
+
+    shape.moveBy(QtCore.QPointF(10, 0))
+    _paint(shape)
+    assert shape._mask_path_cache[3] is not mask_path
+
+    shape.mask = shape.mask.copy()
+    _paint(shape)
+    assert shape._mask_image_cache[0] is shape.mask
+
+
+def test_Shape_copy_drops_render_cache():
+    shape = _mask_shape()
+    shape._maskImage(shape.fill_color)
+    shape_copy = copy.deepcopy(shape)
+    assert shape_copy._mask_image_cache is None
+    assert shape._mask_image_cache is not None
+    np.testing.assert_array_equal(shape_copy.mask, shape.mask)
+
+
+def _polygon_shape(points):
+    shape = Shape(shape_type="polygon")
+    shape.scale = 1.0
+    shape.points = [QtCore.QPointF(x, y) for x, y in points]
+    shape.point_labels = [1] * len(points)
+    shape.close()
+    return shape
+
+
+def test_Shape_nearest():
+    shape = _polygon_shape([(0, 0), (100, 0), (100, 100), (0, 100)])
+
+    assert shape.nearestVertex(QtCore.QPointF(98, 3), 5) == 1
+    assert shape.nearestVertex(QtCore.QPointF(50, 50), 5) is None
+    # edge i joins point i - 1 and point i
+    assert shape.nearestEdge(QtCore.QPointF(50, 2), 5) == 1
+    assert shape.nearestEdge(QtCore.QPointF(2, 50), 5) == 0
+    assert shape.nearestEdge(QtCore.QPointF(50, 50), 5) is None
+
+    shape.scale = 0.1  # epsilon is in widget pixels
+    assert shape.nearestVertex(QtCore.QPointF(50, 50), 5) is None
+    assert shape.nearestVertex(QtCore.QPointF(70, 80), 5) == 2
+
+
+def test_Shape_coords_follow_edits():
+    shape = _polygon_shape([(0, 0), (100, 0), (100, 100)])
+    np.testing.assert_array_equal(shape.coords(), [[0, 0], [100, 0], [100, 100]])
+
+    shape.moveVertexBy(2, QtCore.QPointF(-100, 0))
+    shape.insertPoint(1, QtCore.QPointF(50, -10))
+    shape.moveBy(QtCore.QPointF(1, 1))
+    np.testing.assert_array_equal(
+        shape.coords(), [[1, 1], [51, -9], [101, 1], [1, 101]]
+    )
+
+    shape.removePoint(1)
+    shape[0] = QtCore.QPointF(5, 5)
+    np.testing.assert_array_equal(shape.coords(), [[5, 5], [101, 1], [1, 101]])
+
+    shape.points = shape.points[:2]
+    np.testing.assert_array_equal(shape.coords(), [[5, 5], [101, 1]])
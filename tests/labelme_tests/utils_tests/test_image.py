@@ -1,3 +1,4 @@
+import base64
 import os.path as osp
 
 import numpy as np
@@ -29,3 +30,9 @@ def test_img_data_to_png_data():
         img_data = f.read()
     png_data = image_module.img_data_to_png_data(img_data)
     assert isinstance(png_data, bytes)
+
+
+def test_img_data_to_size():
+    _, data = get_img_and_data()
+    img_data = base64.b64decode(data["imageData"])
+    assert image_module.img_data_to_size(img_data) == (1210, 907)
@@ -0,0 +1,63 @@
+import pytest
+from PyQt5.QtCore import Qt
+
+from labelme.widgets import FileListModel
+from labelme.widgets import FileListView
+
+
+def test_FileListModel():
+    model = FileListModel()
+    model.setFilenames(["a.jpg", "b.jpg"], checked=[False, True])
+    model.appendFilenames(["b.jpg", "c.jpg"])
+
+    assert model.filenames() == ["a.jpg", "b.jpg", "c.jpg"]
+    assert model.rowOf("c.jpg") == 2
+    assert model.rowOf("d.jpg") == -1
+    assert model.data(model.index(1), Qt.CheckStateRole) == Qt.Checked
+
+    model.setChecked("c.jpg", True)
+    assert model.isChecked("c.jpg")
+
+    model.clear()
+    assert model.rowCount() == 0
+    assert not model.hasFilename("a.jpg")
+
+
+def test_FileListModel_append_existing():
+    model = FileListModel()
+    model.setFilenames(["a.jpg"], checked=[False])
+    model.appendFilenames(
+        ["a.jpg", "b.jpg", "c.jpg", "b.jpg", "d.jpg"],
+        checked=[True, False, True, True, True],
+    )
+
+    assert model.filenames() == ["a.jpg", "b.jpg", "c.jpg", "d.jpg"]
+    assert [model.rowOf(f) for f in model.filenames()] == [0, 1, 2, 3]
+    assert [model.isChecked(f) for f in model.filenames()] == [
+        False,
+        False,
+        True,
+        True,
+    ]
+
+
+@pytest.mark.gui
+def test_FileListView(qtbot):
+    model = FileListModel()
+    model.setFilenames(["a.jpg", "b.jpg"])
+    view = FileListView()
+    view.setModel(model)
+    qtbot.addWidget(view)
+
+    view.setCurrentRow(1)
+    assert view.currentRow() == 1
+    assert [index.row() for index in view.selectedIndexes()] == [1]
+    view.setCurrentRow(-1)
+    assert view.currentRow() == -1
+
+
+def test_FileListModel_markChecked():
+    model = FileListModel()
+    model.setFilenames(["a.jpg", "b.jpg", "c.jpg"], checked=[True, False, False])
+    model.markChecked(lambda filename: filename == "b.jpg")
+    assert [model.isChecked(f) for f in model.filenames()] == [True, True, False]